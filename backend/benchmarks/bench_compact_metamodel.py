@@ -0,0 +1,92 @@
+"""
+Compact Metamodel Benchmark
+Build time and retained memory of CompactMetamodel vs the pydantic Metamodel
+
+Schemas of 1k, 5k and 20k tables with 10 columns each (up to 200k
+columns) and one relationship per table, as metamodel-shaped dicts (the
+form to_dict() and JSON requests have). The pydantic side is built with
+Metamodel.model_validate, its fastest construction path. Retained memory
+is what tracemalloc still counts after the build, input excluded. Both
+sides are checked to convert into each other without loss. Run from
+backend/:
+
+    python -m benchmarks.bench_compact_metamodel
+"""
+
+import time
+import tracemalloc
+
+from models.compact_metamodel import CompactMetamodel
+from models.metamodel import Metamodel
+
+TABLE_COUNTS = [1_000, 5_000, 20_000]
+
+COLUMNS = [
+    {"name": "id", "data_type": "BIGINT", "is_primary_key": True, "is_nullable": False},
+    {"name": "code", "data_type": "VARCHAR", "length": 32, "is_unique": True, "is_nullable": False},
+    {"name": "name", "data_type": "VARCHAR", "length": 255},
+    {"name": "description", "data_type": "TEXT"},
+    {"name": "status", "data_type": "VARCHAR", "length": 20, "default_value": "active"},
+    {"name": "amount", "data_type": "DECIMAL", "length": 12},
+    {"name": "parent_id", "data_type": "BIGINT", "is_foreign_key": True},
+    {"name": "is_deleted", "data_type": "BOOLEAN", "is_nullable": False, "default_value": False},
+    {"name": "created_at", "data_type": "TIMESTAMP", "is_nullable": False},
+    {"name": "updated_at", "data_type": "TIMESTAMP"},
+]
+
+
+def build_schema(tables: int) -> dict:
+    entities = []
+    relationships = []
+    for i in range(tables):
+        entities.append({"name": f"table_{i}", "attributes": [dict(column) for column in COLUMNS]})
+        relationships.append({
+            "name": f"fk_table_{i}_parent",
+            "source_entity": f"table_{i}",
+            "target_entity": f"table_{(i * 7) % tables}",
+            "cardinality": "many_to_one",
+            "source_foreign_key": "parent_id"
+        })
+    return {"entities": entities, "relationships": relationships, "metadata": {"source": "reverse_engineered"}}
+
+
+def build_measured(build, data: dict):
+    """(result, build time in ms, retained MB); timed without tracemalloc, which slows allocation"""
+    start = time.perf_counter()
+    build(data)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    result = build(data)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed * 1000, retained / 1_000_000
+
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    print(f"{'tables':>7} {'columns':>8}  {'pydantic':>20}  {'compact':>20}  {'memory':>6}  {'to_metamodel':>12}  {'from_metamodel':>14}")
+    for tables in TABLE_COUNTS:
+        data = build_schema(tables)
+
+        metamodel, pydantic_ms, pydantic_mb = build_measured(Metamodel.model_validate, data)
+        compact, compact_ms, compact_mb = build_measured(CompactMetamodel.from_dict, data)
+
+        to_ms = timed(compact.to_metamodel)
+        from_ms = timed(lambda: CompactMetamodel.from_metamodel(metamodel))
+        assert compact.to_metamodel() == metamodel, "lossy conversion"
+        assert CompactMetamodel.from_metamodel(metamodel).to_dict() == metamodel.to_dict(), "lossy conversion"
+
+        print(
+            f"{tables:>7} {compact.attribute_count:>8}  {pydantic_ms:7.0f} ms {pydantic_mb:6.1f} MB  "
+            f"{compact_ms:7.0f} ms {compact_mb:6.1f} MB  {pydantic_mb / compact_mb:5.1f}x  "
+            f"{to_ms:9.0f} ms  {from_ms:11.0f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+JSON Repair Benchmark
+Compares the old regex salvage path with json_repair.parse_llm_json
+
+The corpus reproduces the failure modes seen in LLM extraction responses
+(prose and markdown fences around the JSON, trailing commas, raw newlines
+in strings, truncation mid-string/mid-array, mismatched brackets) at
+several schema sizes. Run from backend/:
+
+    python -m benchmarks.bench_json_repair
+"""
+
+import json
+import re
+import time
+
+from services.json_repair import parse_llm_json, JSONRepairError
+
+SCHEMA_SIZES = [5, 50, 500]
+ROUNDS = 20
+
+
+def build_schema(entity_count: int) -> dict:
+    entities = []
+    relationships = []
+    for i in range(entity_count):
+        entities.append({
+            "name": f"Entity{i}",
+            "description": f"Entity number {i}",
+            "attributes": [
+                {"name": "id", "data_type": "INTEGER", "is_primary_key": True, "is_nullable": False},
+                {"name": "name", "data_type": "VARCHAR", "length": 255, "is_nullable": False},
+                {"name": "created_at", "data_type": "TIMESTAMP"},
+            ]
+        })
+        if i:
+            relationships.append({
+                "name": f"rel_{i}",
+                "source_entity": f"Entity{i}",
+                "target_entity": f"Entity{i - 1}",
+                "cardinality": "many_to_one",
+                "source_foreign_key": f"entity{i - 1}_id"
+            })
+    return {"entities": entities, "relationships": relationships}
+
+
+def build_corpus(entity_count: int) -> dict:
+    clean = json.dumps(build_schema(entity_count), indent=2)
+    return {
+        "clean": clean,
+        "fenced": f"Here is the schema:\n```json\n{clean}\n```\nLet me know if you need changes.",
+        "trailing_commas": clean.replace("\n    }\n  ]", "\n    },\n  ]").replace('"is_nullable": false\n', '"is_nullable": false,\n'),
+        "raw_newline": clean.replace('"Entity number 1"', '"Entity number\n1"'),
+        "truncated_string": clean[: int(len(clean) * 0.8)].rsplit('"', 1)[0] + '"Entit',
+        "truncated_array": clean[: int(len(clean) * 0.6)].rsplit("}", 1)[0] + "},",
+        "mismatched": clean.replace("]\n}", "}\n}", 1),
+    }
+
+
+def legacy_parse(response: str):
+    """The salvage path generate_json used before json_repair"""
+    try:
+        return json.loads(response)
+    except json.JSONDecodeError:
+        json_match = re.search(r'\{.*\}', response, re.DOTALL)
+        if not json_match:
+            raise ValueError("no JSON found")
+        json_str = json_match.group()
+        try:
+            return json.loads(json_str)
+        except json.JSONDecodeError:
+            return json.loads(re.sub(r',(\s*[}\]])', r'\1', json_str))
+
+
+def new_parse(response: str):
+    return parse_llm_json(response)[0]
+
+
+def run(parser, response: str):
+    start = time.perf_counter()
+    ok = True
+    for _ in range(ROUNDS):
+        try:
+            parser(response)
+        except (ValueError, JSONRepairError):
+            ok = False
+    return ok, (time.perf_counter() - start) / ROUNDS * 1000
+
+
+def main():
+    print(f"{'entities':>8}  {'case':<18} {'bytes':>9}  {'legacy':>16}  {'json_repair':>16}")
+    for size in SCHEMA_SIZES:
+        for case, response in build_corpus(size).items():
+            legacy_ok, legacy_ms = run(legacy_parse, response)
+            new_ok, new_ms = run(new_parse, response)
+            print(
+                f"{size:>8}  {case:<18} {len(response):>9}  "
+                f"{'ok' if legacy_ok else 'FAIL':>4} {legacy_ms:8.3f} ms  "
+                f"{'ok' if new_ok else 'FAIL':>4} {new_ms:8.3f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Keyword Matcher Benchmark
+Compares per-pattern re.finditer with RealtimeValidator's single-scan KeywordMatcher
+
+Prompts are built from a realistic schema description repeated up to the
+target length (50 B to 50 KB). Both sides produce the same hit list; the
+benchmark checks that before timing. Run from backend/:
+
+    python -m benchmarks.bench_keyword_matcher
+"""
+
+import re
+import time
+
+from services.realtime_validator import RealtimeValidator
+
+PROMPT_LENGTHS = [50, 500, 5_000, 50_000]
+
+BASE_PROMPT = (
+    "Create a library database. Authors have books with a title, price and created date; "
+    "each book belongs to a category. Members have loans linked to books, one-to-many, "
+    "with a status and a due date. Customers place orders that contain items with quantity "
+    "and total amount. Payments reference invoices. Every table has an id primary key. "
+)
+
+
+def build_prompt(length: int) -> str:
+    return (BASE_PROMPT * (length // len(BASE_PROMPT) + 1))[:length]
+
+
+def legacy_scan(validator: RealtimeValidator, prompt: str) -> list:
+    """What analyze_prompt_realtime did before: one finditer per pattern"""
+    hits = []
+    pattern_lists = [
+        validator.domain_keywords,
+        validator.entity_keywords,
+        validator.relationship_keywords,
+        validator.attribute_keywords,
+    ]
+    for rank, patterns in enumerate(pattern_lists):
+        for index, pattern in enumerate(patterns):
+            for match in re.finditer(pattern, prompt, re.IGNORECASE):
+                hits.append((rank, index, match.start(), match.end()))
+    return hits
+
+
+def timed(func, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - start) / rounds * 1000
+
+
+def main():
+    validator = RealtimeValidator()
+    matcher = validator.keyword_matcher
+
+    print(f"{'chars':>7} {'hits':>6}  {'per-pattern':>12}  {'single scan':>12}  {'speedup':>7}  {'analyze':>10}")
+    for length in PROMPT_LENGTHS:
+        prompt = build_prompt(length)
+        expected = sorted(legacy_scan(validator, prompt))
+        assert sorted(matcher.scan(prompt)) == expected, f"hit mismatch at {length} chars"
+
+        rounds = max(5, 200_000 // length)
+        legacy_ms = timed(lambda: legacy_scan(validator, prompt), rounds)
+        scan_ms = timed(lambda: matcher.scan(prompt), rounds)
+        analyze_ms = timed(lambda: validator.analyze_prompt_realtime(prompt), rounds)
+        print(
+            f"{length:>7} {len(expected):>6}  {legacy_ms:9.3f} ms  {scan_ms:9.3f} ms  "
+            f"{legacy_ms / scan_ms:6.1f}x  {analyze_ms:7.3f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
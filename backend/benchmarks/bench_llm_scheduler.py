@@ -0,0 +1,134 @@
+"""
+LLM Scheduler Benchmark
+Burst of extractions against a rate-limited fake provider
+
+The fake provider enforces a requests-per-minute window and answers 429
+when it is exceeded, like Groq does. A burst of batch extractions is
+started, then interactive deep analyses arrive while the batch is queued.
+Compared:
+
+  - semaphore: the previous GROQ_MAX_CONCURRENCY semaphore, no retries
+  - scheduler: LLMScheduler with RPM bucket, priorities and 429 retries
+
+Limits are scaled down (one "minute" lasts WINDOW seconds) so the run
+takes a few seconds. Run from backend/:
+
+    python -m benchmarks.bench_llm_scheduler
+"""
+
+import asyncio
+import time
+
+from services.llm_scheduler import LLMScheduler, Priority
+
+WINDOW = 2.0  # seconds standing in for one minute
+RPM = 10
+CALL_LATENCY = 0.05
+BATCH_CALLS = 30
+INTERACTIVE_CALLS = 5
+
+
+class RateLimitError(Exception):
+    """Stand-in for groq.RateLimitError"""
+    status_code = 429
+
+    def __init__(self, retry_after: float):
+        super().__init__("Rate limit reached")
+        self.response = type("Response", (), {"headers": {"retry-after": str(retry_after)}})()
+
+
+class FakeProvider:
+    """Fixed-window request limiter"""
+
+    def __init__(self):
+        self.window_start = time.monotonic()
+        self.count = 0
+
+    async def call(self):
+        now = time.monotonic()
+        if now - self.window_start >= WINDOW:
+            self.window_start, self.count = now, 0
+        if self.count >= RPM:
+            raise RateLimitError(round(self.window_start + WINDOW - now, 3))
+        self.count += 1
+        await asyncio.sleep(CALL_LATENCY)
+        return "ok"
+
+
+async def run_semaphore(provider: FakeProvider) -> dict:
+    semaphore = asyncio.Semaphore(8)
+
+    async def call(priority):
+        start = time.monotonic()
+        try:
+            async with semaphore:
+                await provider.call()
+            return priority, True, time.monotonic() - start
+        except RateLimitError:
+            return priority, False, time.monotonic() - start
+
+    return await burst(call)
+
+
+async def run_scheduler(provider: FakeProvider) -> dict:
+    # The bucket refills RPM per WINDOW instead of per minute
+    scheduler = LLMScheduler(
+        "bench",
+        max_concurrency=8,
+        requests_per_minute=int(RPM * 60 / WINDOW),
+        backoff_base=0.05,
+        backoff_max=WINDOW
+    )
+    scheduler.request_bucket.capacity = scheduler.request_bucket.tokens = RPM
+
+    async def call(priority):
+        start = time.monotonic()
+        try:
+            await scheduler.run(provider.call, 100, priority)
+            return priority, True, time.monotonic() - start
+        except Exception:
+            return priority, False, time.monotonic() - start
+
+    result = await burst(call)
+    result["retries"] = scheduler.stats["retries"]
+    return result
+
+
+async def burst(call) -> dict:
+    tasks = [asyncio.ensure_future(call(Priority.BATCH)) for _ in range(BATCH_CALLS)]
+    await asyncio.sleep(0.01)
+    tasks += [asyncio.ensure_future(call(Priority.INTERACTIVE)) for _ in range(INTERACTIVE_CALLS)]
+    results = await asyncio.gather(*tasks)
+
+    summary = {}
+    for priority in (Priority.INTERACTIVE, Priority.BATCH):
+        rows = [r for r in results if r[0] == priority]
+        latencies = sorted(r[2] for r in rows)
+        summary[priority.name.lower()] = {
+            "ok": sum(1 for r in rows if r[1]),
+            "total": len(rows),
+            "p50_ms": latencies[len(latencies) // 2] * 1000,
+            "max_ms": latencies[-1] * 1000,
+        }
+    return summary
+
+
+def report(name: str, summary: dict):
+    for cls in ("interactive", "batch"):
+        row = summary[cls]
+        print(
+            f"{name:<10} {cls:<12} succeeded {row['ok']:>2}/{row['total']:<2}"
+            f"  p50={row['p50_ms']:8.1f} ms  max={row['max_ms']:8.1f} ms"
+        )
+    if "retries" in summary:
+        print(f"{'':<10} 429 retries: {summary['retries']}")
+
+
+async def main():
+    print(f"{BATCH_CALLS} batch + {INTERACTIVE_CALLS} interactive calls, limit {RPM} requests per {WINDOW}s\n")
+    report("semaphore", await run_semaphore(FakeProvider()))
+    report("scheduler", await run_scheduler(FakeProvider()))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,98 @@
+"""
+Metamodel Index Benchmark
+Diagram and analysis passes over large metamodels, with and without the cached indexes
+
+Builds synthetic schemas of 1k and 10k entities (two relationships per
+entity, some many-to-many) and times PlantUML colouring, validation,
+entity lookups and the optimization analysis. The per-entity cost of the
+indexed passes stays flat as the schema grows; the legacy relationship
+count (a scan of every relationship per entity) grows with its size.
+The legacy pass at 10k entities takes tens of seconds. Fingerprint memos
+are cleared before each pass so every one does its work. Run from backend/:
+
+    python -m benchmarks.bench_metamodel_index
+"""
+
+import time
+
+from models.metamodel import Attribute, DataType, Entity, Metamodel, Relationship
+from services.optimization_service import OptimizationService
+from services.plantuml_generator import PlantUMLGenerator
+
+ENTITY_COUNTS = [1_000, 10_000]
+CARDINALITIES = ["one_to_many", "many_to_one", "one_to_one", "many_to_many"]
+
+
+def build_metamodel(count: int) -> Metamodel:
+    entities = []
+    for i in range(count):
+        entities.append(Entity(
+            name=f"Entity{i}",
+            attributes=[
+                Attribute(name="id", data_type=DataType.INTEGER, is_primary_key=True, is_nullable=False),
+                Attribute(name="name", data_type=DataType.VARCHAR, length=255),
+                Attribute(name="parent_id", data_type=DataType.INTEGER, is_foreign_key=True),
+                Attribute(name="created_at", data_type=DataType.TIMESTAMP),
+            ]
+        ))
+    relationships = []
+    for i in range(count):
+        for step in (1, 7):
+            target = (i * 31 + step) % count
+            relationships.append(Relationship(
+                name=f"rel_{i}_{target}",
+                source_entity=f"Entity{i}",
+                target_entity=f"Entity{target}",
+                cardinality=CARDINALITIES[(i + step) % len(CARDINALITIES)],
+                target_foreign_key="parent_id"
+            ))
+    return Metamodel(entities=entities, relationships=relationships)
+
+
+def legacy_relationship_counts(metamodel: Metamodel) -> dict:
+    """What generate_with_colors did before: one pass over the relationships per entity"""
+    return {
+        entity.name: sum(
+            1 for rel in metamodel.relationships
+            if rel.source_entity == entity.name or rel.target_entity == entity.name
+        )
+        for entity in metamodel.entities
+    }
+
+
+def timed(func, rounds: int = 3) -> float:
+    """Best of rounds, in ms"""
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    plantuml = PlantUMLGenerator()
+    optimizer = OptimizationService()
+
+    print(f"{'entities':>8}  {'index build':>11}  {'lookups':>9}  {'colors':>9}  {'validate':>9}  {'optimize':>9}  {'legacy counts':>13}")
+    for count in ENTITY_COUNTS:
+        metamodel = build_metamodel(count)
+
+        build_ms = timed(lambda: metamodel.model_copy().index)
+        lookup_ms = timed(lambda: [metamodel.get_primary_key(f"Entity{i}") for i in range(count)])
+        colors_ms = timed(lambda: plantuml.memo.clear() or plantuml.generate_with_colors(metamodel))
+        validate_ms = timed(metamodel.validate)
+        optimize_ms = timed(lambda: optimizer.memo.clear() or optimizer.analyze_schema(metamodel))
+
+        legacy = {}
+        legacy_ms = timed(lambda: legacy.update(legacy_relationship_counts(metamodel)), rounds=1)
+        assert all(metamodel.relationship_count(name) == n for name, n in legacy.items())
+
+        print(
+            f"{count:>8}  {build_ms:8.1f} ms  {lookup_ms:6.1f} ms  {colors_ms:6.1f} ms  "
+            f"{validate_ms:6.1f} ms  {optimize_ms:6.1f} ms  {legacy_ms:10.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
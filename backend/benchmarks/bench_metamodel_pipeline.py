@@ -0,0 +1,133 @@
+"""
+Metamodel Pipeline Benchmark
+Time and peak memory of /diagram/generate's post-extraction steps, dict round-trips vs one typed metamodel
+
+The legacy column replays what the endpoint did before: model_dump() the
+new metamodel, re-parse it to validate, parse it again for PlantUML,
+then let the response model re-validate and re-serialize the dict. The
+typed column builds the Metamodel once, validates and renders it in
+place and serializes it once with to_dict(). "trusted" also validates
+the extracted dicts in a single pydantic-core pass, as done for
+structured LLM output and drafts. Peak memory is measured with
+tracemalloc; it is dominated by the response payload itself. The
+PlantUML memo is cleared before every run so each one renders. Run from
+backend/:
+
+    python -m benchmarks.bench_metamodel_pipeline
+"""
+
+import json
+import time
+import tracemalloc
+
+from pydantic import BaseModel, TypeAdapter
+from typing import Optional
+
+from models.metamodel import Metamodel
+from services.plantuml_generator import PlantUMLGenerator
+from services.uml_generator import UMLGenerator
+
+ENTITY_COUNTS = [100, 1_000, 5_000]
+
+uml_generator = UMLGenerator()
+plantuml_generator = PlantUMLGenerator()
+
+
+class DiagramGenerationResponse(BaseModel):
+    """Mirror of the router's response model"""
+    metamodel: dict
+    plantuml_code: Optional[str] = None
+    mermaid_code: Optional[str] = None
+    diagram_image_base64: Optional[str] = None
+    validation_status: str = "unknown"
+
+
+response_adapter = TypeAdapter(DiagramGenerationResponse)
+
+
+def build_structure(count: int) -> dict:
+    """Extraction output as parsed from LLM JSON"""
+    entities = []
+    relationships = []
+    for i in range(count):
+        entities.append({
+            "name": f"Entity{i}",
+            "description": f"Entity number {i}",
+            "attributes": [
+                {"name": "id", "data_type": "INTEGER", "is_primary_key": True, "is_nullable": False},
+                {"name": "name", "data_type": "VARCHAR", "length": 255, "is_nullable": False},
+                {"name": "email", "data_type": "VARCHAR", "length": 255, "is_unique": True},
+                {"name": "parent_id", "data_type": "INTEGER", "is_foreign_key": True},
+                {"name": "created_at", "data_type": "TIMESTAMP"},
+            ]
+        })
+        if i:
+            relationships.append({
+                "name": f"entity{i}_parent",
+                "source_entity": f"Entity{i}",
+                "target_entity": f"Entity{(i * 7) % i}",
+                "cardinality": "many_to_one",
+                "source_foreign_key": "parent_id"
+            })
+    return json.loads(json.dumps({"entities": entities, "relationships": relationships}))
+
+
+def legacy_pipeline(structure: dict) -> str:
+    metamodel = uml_generator.build_metamodel(structure["entities"], structure["relationships"]).model_dump()
+    validation = Metamodel(**metamodel).validate()
+    plantuml_code = plantuml_generator.generate(Metamodel(**metamodel))
+    response = DiagramGenerationResponse(
+        metamodel=metamodel,
+        plantuml_code=plantuml_code,
+        validation_status="valid" if validation["is_valid"] else "invalid"
+    )
+    # FastAPI: dump the returned model, validate it against response_model, serialize
+    validated = response_adapter.validate_python(response.model_dump())
+    return json.dumps(response_adapter.dump_python(validated, mode="json"))
+
+
+def typed_pipeline(structure: dict, trusted: bool = False) -> str:
+    metamodel = uml_generator.build_metamodel(structure["entities"], structure["relationships"], trusted=trusted)
+    validation = metamodel.validate()
+    return json.dumps({
+        "metamodel": metamodel.to_dict(),
+        "plantuml_code": plantuml_generator.generate(metamodel),
+        "mermaid_code": None,
+        "diagram_image_base64": None,
+        "validation_status": "valid" if validation["is_valid"] else "invalid"
+    })
+
+
+def measure(func, structure: dict):
+    """(best time in ms over 3 runs, peak traced memory in MB of one run)"""
+    best = float("inf")
+    for _ in range(3):
+        plantuml_generator.memo.clear()
+        start = time.perf_counter()
+        func(structure)
+        best = min(best, time.perf_counter() - start)
+    plantuml_generator.memo.clear()
+    tracemalloc.start()
+    func(structure)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best * 1000, peak / 1_000_000
+
+
+def main():
+    print(f"{'entities':>8}  {'legacy':>20}  {'typed':>20}  {'trusted':>20}")
+    for count in ENTITY_COUNTS:
+        structure = build_structure(count)
+        assert json.loads(legacy_pipeline(structure)) == json.loads(typed_pipeline(structure)), "payload mismatch"
+        assert json.loads(typed_pipeline(structure)) == json.loads(typed_pipeline(structure, trusted=True)), "payload mismatch"
+
+        columns = [
+            measure(legacy_pipeline, structure),
+            measure(typed_pipeline, structure),
+            measure(lambda s: typed_pipeline(s, trusted=True), structure),
+        ]
+        print(f"{count:>8}  " + "  ".join(f"{ms:7.1f} ms {mb:6.1f} MB" for ms, mb in columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Pipeline Replay Benchmark
+Profiles /diagram/generate end to end from a recorded LLM cassette
+
+Record once against a live provider (Groq key or running Ollama):
+
+    python -m benchmarks.bench_pipeline_replay --record
+
+then replay offline, as often as needed, with a fixed synthetic latency:
+
+    python -m benchmarks.bench_pipeline_replay [--latency-ms 300] [--concurrency 8]
+
+Replay needs no network; a prompt missing from the cassette fails its
+request instead of reaching a provider. The cassette path comes from
+LLM_CASSETTE_PATH. Run from backend/.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import statistics
+import time
+
+PROMPTS = [
+    "A library system with books, authors, members and loans. Each loan links a member to a book.",
+    "An online shop with customers, products, categories, orders and order items.",
+    "A hospital with patients, doctors, appointments and prescriptions.",
+    "A university with students, courses, professors and enrollments with grades.",
+    "A blog platform with users, posts, comments and tags on posts.",
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--record", action="store_true", help="call the live provider and record the cassette")
+    parser.add_argument("--latency-ms", type=float, default=None, help="replay latency per LLM call (default: recorded)")
+    parser.add_argument("--rounds", type=int, default=5, help="passes over the prompt list")
+    parser.add_argument("--concurrency", type=int, default=4, help="concurrent requests")
+    return parser.parse_args()
+
+
+async def run(args):
+    import httpx
+    from main import app
+    from services.llm_provider_router import get_router_stats
+
+    transport = httpx.ASGITransport(app=app)
+    requests = PROMPTS * (1 if args.record else args.rounds)
+    concurrency = 1 if args.record else args.concurrency
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, failures = [], 0
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+        async def one(prompt: str):
+            nonlocal failures
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post("/api/v1/diagram/generate", json={"prompt": prompt, "format": "both"})
+                latencies.append((time.perf_counter() - start) * 1000)
+                entities = response.json().get("metamodel", {}).get("entities", []) if response.status_code == 200 else []
+                failures += not entities
+
+        start = time.perf_counter()
+        # Silence per-request service logging while measuring
+        with contextlib.redirect_stdout(io.StringIO()):
+            await asyncio.gather(*(one(prompt) for prompt in requests))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    cassette = next(iter(get_router_stats()["providers"].values())).get("cassette", {})
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{'record' if args.record else 'replay'}: {len(requests)} requests, concurrency {concurrency}, "
+          f"{failures} failed (no entities)")
+    print(f"p50={statistics.median(latencies):8.1f} ms  p99={p99:8.1f} ms  "
+          f"max={latencies[-1]:8.1f} ms  throughput={len(requests) / elapsed:6.1f} req/s")
+    print(f"cassette: {cassette}")
+
+
+def main():
+    args = parse_args()
+    os.environ["LLM_CASSETTE_MODE"] = "record" if args.record else "replay"
+    # Every call must reach the cassette, not the response cache
+    os.environ["LLM_CACHE_ENABLED"] = "false"
+    if args.latency_ms is not None:
+        os.environ["LLM_CASSETTE_LATENCY_MS"] = str(args.latency_ms)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
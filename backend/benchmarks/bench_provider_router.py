@@ -0,0 +1,82 @@
+"""
+Provider Router Benchmark
+Tail latency of generate_json when the primary provider degrades
+
+Two fake providers: the primary answers in ~50ms but 10% of its calls
+stall for 2s (a degraded backend); the secondary always answers in
+~150ms. Compared:
+
+  - single: every call goes to the primary (one service per constructor)
+  - router: LLMProviderRouter hedging to the secondary after 200ms
+
+Run from backend/:
+
+    python -m benchmarks.bench_provider_router
+"""
+
+import asyncio
+import random
+import time
+
+from services.llm_provider_router import LLMProviderRouter
+
+CALLS = 200
+CONCURRENCY = 10
+HEDGE_DELAY = 0.2
+
+
+class FakeProvider:
+    def __init__(self, latency: float, stall_rate: float = 0.0, stall: float = 0.0):
+        self.latency = latency
+        self.stall_rate = stall_rate
+        self.stall = stall
+
+    async def generate_json(self, prompt: str, **kwargs) -> dict:
+        delay = self.stall if random.random() < self.stall_rate else self.latency
+        await asyncio.sleep(delay * random.uniform(0.9, 1.1))
+        return {"entities": []}
+
+
+async def measure(service) -> list:
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    latencies = []
+
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            await service.generate_json(f"prompt {i}")
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(one(i) for i in range(CALLS)))
+    return sorted(latencies)
+
+
+def report(label: str, latencies: list):
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))]
+    print(f"{label:<8} p50={pct(0.5):8.1f} ms  p95={pct(0.95):8.1f} ms  p99={pct(0.99):8.1f} ms  max={latencies[-1]:8.1f} ms")
+
+
+async def main():
+    random.seed(7)
+    primary = FakeProvider(0.05, stall_rate=0.1, stall=2.0)
+    secondary = FakeProvider(0.15)
+
+    print(f"{CALLS} calls, primary stalls 10% of the time for 2s, hedge after {HEDGE_DELAY * 1000:.0f} ms\n")
+    report("single", await measure(primary))
+
+    router = LLMProviderRouter({"primary": primary, "secondary": secondary}, hedge_delay=HEDGE_DELAY)
+    report("router", await measure(router))
+
+    stats = router.get_stats()["providers"]
+    print(f"\nhedges started: {stats['secondary']['hedges_started']}, won: {stats['secondary']['hedges_won']}")
+
+
+if __name__ == "__main__":
+    import contextlib
+    import io
+
+    # Silence the per-hedge log lines
+    with contextlib.redirect_stdout(io.StringIO()) as captured:
+        asyncio.run(main())
+    print("\n".join(line for line in captured.getvalue().splitlines() if not line.startswith("[")))
@@ -0,0 +1,154 @@
+"""
+Realtime Endpoint Latency Under Load
+Measures /prompt/analyze-realtime latency while /diagram/generate calls are in flight
+
+Groq is replaced with a fake client that simulates network latency, either
+asynchronously (the AsyncGroq path) or by blocking the thread (the old
+synchronous client). Run from backend/:
+
+    python -m benchmarks.bench_realtime_under_load
+"""
+
+import asyncio
+import contextlib
+import io
+import json
+import os
+import statistics
+import time
+
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+os.environ.setdefault("USE_GROQ", "true")
+os.environ["LLM_CACHE_ENABLED"] = "false"
+os.environ["LLM_PROVIDERS"] = "groq"  # No Ollama hedges in the measurement
+os.environ["GROQ_RPM_LIMIT"] = "0"  # The fake client has no quota
+os.environ["GROQ_TPM_LIMIT"] = "0"
+
+import httpx
+
+from main import app
+from routers import diagram_router
+
+GROQ_LATENCY = 0.25  # seconds per simulated completion
+GENERATE_CONCURRENCY = 8
+MEASURE_SECONDS = 5.0
+KEYSTROKE_INTERVAL = 0.02  # seconds between realtime requests
+
+FAKE_SCHEMA = json.dumps({
+    "entities": [{"name": "User", "attributes": [
+        {"name": "id", "data_type": "INTEGER", "is_primary_key": True, "is_nullable": False}
+    ]}],
+    "relationships": []
+})
+
+
+class _FakeMessage:
+    content = FAKE_SCHEMA
+
+
+class _FakeChoice:
+    message = _FakeMessage()
+    finish_reason = "stop"
+
+
+class _FakeResponse:
+    choices = [_FakeChoice()]
+
+
+class _FakeCompletions:
+    def __init__(self, blocking: bool):
+        self.blocking = blocking
+
+    async def create(self, **kwargs):
+        if self.blocking:
+            time.sleep(GROQ_LATENCY)  # What the synchronous client did
+            await asyncio.sleep(0)
+        else:
+            await asyncio.sleep(GROQ_LATENCY)
+        return _FakeResponse()
+
+
+class _FakeChat:
+    def __init__(self, blocking: bool):
+        self.completions = _FakeCompletions(blocking)
+
+
+class FakeGroqClient:
+    def __init__(self, blocking: bool):
+        self.chat = _FakeChat(blocking)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def measure_realtime(client: httpx.AsyncClient) -> list:
+    """
+    Fire realtime requests on a fixed keystroke schedule
+
+    Latency is measured from the scheduled send time, so time spent waiting
+    for a blocked event loop is counted rather than hidden.
+    """
+    latencies = []
+    payload = {"prompt": "A library system where users borrow books, each book has an author and a title"}
+    start = time.perf_counter()
+    scheduled = start
+    while scheduled < start + MEASURE_SECONDS:
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        response = await client.post("/api/v1/prompt/analyze-realtime", json=payload)
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - scheduled) * 1000)
+        scheduled += KEYSTROKE_INTERVAL
+    return latencies
+
+
+async def generate_load(client: httpx.AsyncClient, stop: asyncio.Event):
+    async def worker(i: int):
+        n = 0
+        while not stop.is_set():
+            await client.post(
+                "/api/v1/diagram/generate",
+                json={"prompt": f"Schema variant {i}-{n}", "format": "mermaid"}
+            )
+            n += 1
+
+    await asyncio.gather(*(worker(i) for i in range(GENERATE_CONCURRENCY)))
+
+
+async def run_scenario(label: str, blocking: bool, with_load: bool):
+    diagram_router.entity_extractor.llm_service.services["groq"].client = FakeGroqClient(blocking)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+        # Silence the per-request service logging while measuring
+        with contextlib.redirect_stdout(io.StringIO()):
+            stop = asyncio.Event()
+            load_task = asyncio.create_task(generate_load(client, stop)) if with_load else None
+            await asyncio.sleep(0.05)
+
+            latencies = await measure_realtime(client)
+
+            stop.set()
+            if load_task:
+                await load_task
+
+    print(
+        f"{label:<32} n={len(latencies):<5} p50={statistics.median(latencies):8.2f} ms  "
+        f"p99={percentile(latencies, 99):8.2f} ms  max={max(latencies):8.2f} ms"
+    )
+
+
+async def main():
+    print(f"Realtime latency over {MEASURE_SECONDS}s, "
+          f"{GENERATE_CONCURRENCY} concurrent generate workers, {GROQ_LATENCY}s per Groq call\n")
+    await run_scenario("idle", blocking=False, with_load=False)
+    await run_scenario("under load (async client)", blocking=False, with_load=True)
+    await run_scenario("under load (blocking client)", blocking=True, with_load=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
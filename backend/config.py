@@ -26,10 +26,71 @@ class Settings(BaseSettings):
     OLLAMA_MODEL_PRIMARY: str = "llama3.1:70b"  # For complex tasks
     OLLAMA_MODEL_SECONDARY: str = "llama3.1:8b"  # For simple tasks
     OLLAMA_TIMEOUT: int = 120  # seconds
+    OLLAMA_HTTP2: bool = False  # Requires the 'h2' package
+    OLLAMA_MAX_CONNECTIONS: int = 20
+    OLLAMA_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    OLLAMA_KEEPALIVE_EXPIRY: float = 60.0  # seconds an idle connection stays open
+    OLLAMA_MAX_CONCURRENCY: int = 2  # Concurrent generations sent to Ollama
+    OLLAMA_KEEP_ALIVE: str = "30m"  # How long Ollama keeps a model loaded after a request
+    OLLAMA_NUM_CTX_PRIMARY: int = 8192  # Context window of the primary model
+    OLLAMA_NUM_CTX_SECONDARY: int = 4096  # Context window of the secondary model
+    OLLAMA_WARMUP_ON_STARTUP: bool = True  # Preload models when Ollama is a provider
+    OLLAMA_REWARM_INTERVAL: float = 1500.0  # seconds; keep below OLLAMA_KEEP_ALIVE
 
     # LLM Settings (Groq - SUPER FAST!)
     GROQ_API_KEY: Optional[str] = None  # Get free key at https://console.groq.com
     USE_GROQ: bool = False  # Will be set to True from .env file
+    GROQ_MAX_CONCURRENCY: int = 8  # Max concurrent Groq calls per process
+    # Requests/tokens per minute must match your Groq account tier; calls are charged their
+    # full output budget at admission and refunded down to the reported usage afterwards
+    GROQ_RPM_LIMIT: int = 30  # Requests per minute (0 = unlimited)
+    GROQ_TPM_LIMIT: int = 6000  # Tokens per minute, prompt + output (0 = unlimited)
+    GROQ_MODEL_PRIMARY: str = "llama-3.3-70b-versatile"  # For complex tasks
+    GROQ_MODEL_SECONDARY: str = "llama-3.1-8b-instant"  # For simple tasks
+
+    # LLM Rate Limit Retries (HTTP 429)
+    LLM_RATE_LIMIT_MAX_RETRIES: int = 4
+    LLM_RATE_LIMIT_BACKOFF_BASE: float = 1.0  # seconds, doubled per retry
+    LLM_RATE_LIMIT_BACKOFF_MAX: float = 30.0  # seconds
+
+    # LLM Provider Routing (hedged requests + circuit breaker)
+    LLM_PROVIDERS: str = ""  # Order of preference, e.g. "groq,ollama"; empty = Groq if USE_GROQ + key, else Ollama
+    LLM_HEDGING_ENABLED: bool = False  # Duplicate slow calls to the next provider (needs several providers)
+    LLM_HEDGE_DELAY: float = 4.0  # seconds before a duplicate goes to the next provider
+    LLM_CIRCUIT_FAILURE_THRESHOLD: int = 3  # consecutive failures that open the circuit
+    LLM_CIRCUIT_RESET_SECONDS: float = 30.0  # open time before a trial call
+
+    # LLM Cassette (record/replay for offline benchmarking)
+    LLM_CASSETTE_MODE: str = "off"  # "off", "record" (wrap real providers) or "replay" (no network)
+    LLM_CASSETTE_PATH: str = "./cassettes/llm_cassette.jsonl"
+    LLM_CASSETTE_LATENCY_MS: float = -1  # replay latency per call; negative = recorded latency
+
+    # LLM Output Budget (tokens)
+    LLM_MIN_OUTPUT_TOKENS: int = 512
+    LLM_MAX_OUTPUT_TOKENS: int = 8000
+    LLM_DEFAULT_JSON_TOKENS: int = 1024  # Budget when no estimate applies
+    LLM_MAX_CONTINUATIONS: int = 2  # Follow-up calls for truncated responses
+
+    # Model Tiering (small model for simple prompts, large for complex schemas)
+    MODEL_TIERING_ENABLED: bool = True  # off = always the primary (large) model
+    MODEL_TIER_THRESHOLD: float = 0.6  # complexity score (0-1) from which the large model is used
+    MODEL_TIER_ENTITY_SCALE: int = 6  # detected entities at which that signal saturates
+    MODEL_TIER_RELATIONSHIP_SCALE: int = 4  # detected relationship cues at which that signal saturates
+    MODEL_TIER_LENGTH_SCALE: int = 1500  # prompt characters at which that signal saturates
+
+    # Structured Output (schema-constrained JSON, validated in one pass)
+    LLM_STRUCTURED_OUTPUT: bool = True  # extraction/validation calls send their JSON schema
+
+    # LLM Response Cache (memory LRU + SQLite on disk)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_TTL: int = 3600  # seconds
+    LLM_CACHE_MAX_ENTRIES: int = 512  # in-memory tier size
+    LLM_CACHE_DB_PATH: str = "./cache/llm_cache.db"  # empty string disables disk tier
+
+    # Health Probing (background; /health answers from the cache)
+    HEALTH_CHECK_INTERVAL: float = 15.0  # seconds between probe rounds
+    HEALTH_CHECK_TIMEOUT: float = 5.0  # seconds per probe
+    HEALTH_DATABASE_URLS: str = ""  # comma-separated SQLAlchemy URLs to probe
 
     # PlantUML Settings
     PLANTUML_SERVER_URL: str = "http://www.plantuml.com/plantuml"
@@ -47,6 +108,18 @@ class Settings(BaseSettings):
     DEFAULT_DIAGRAM_FORMAT: str = "mermaid"  # "plantuml" or "mermaid"
     DIAGRAM_RENDER_TIMEOUT: int = 30  # seconds
 
+    # Batch Extraction
+    BATCH_DEFAULT_CONCURRENCY: int = 4  # prompts processed at once
+    BATCH_MAX_CONCURRENCY: int = 16
+    BATCH_MAX_PROMPTS: int = 500
+
+    # Realtime Analysis Sessions (edit-based prompt analysis and /prompt/ws)
+    REALTIME_MAX_SESSIONS: int = 1000  # least recently used sessions are dropped beyond this
+    REALTIME_DEBOUNCE_SECONDS: float = 0.3  # quiet time before /prompt/ws re-runs local analysis
+
+    # Fingerprint Memoization (SQL, diagrams, analysis and sample data per metamodel fingerprint)
+    FINGERPRINT_MEMO_MAX_ENTRIES: int = 256  # per artifact kind; 0 disables memoization
+
     # Validation Settings
     MAX_ENTITIES: int = 50
     MAX_RELATIONSHIPS: int = 100
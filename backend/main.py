@@ -5,8 +5,12 @@ Entry point for the backend server
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from routers import prompt_router, diagram_router, sql_router, optimization_router, sample_data_router, database_router
-from services.llm_service import LLMService
+from routers import prompt_router, diagram_router, sql_router, optimization_router, sample_data_router, database_router, llm_router
+from services.ollama_client import get_ollama_client, close_ollama_client
+from services.health_monitor import get_health_monitor
+from services.llm_provider_router import create_llm_service
+from services.model_warmup import get_warmup_manager
+from config import settings
 
 app = FastAPI(
     title="NL2SQL Generator API",
@@ -25,6 +29,24 @@ app.add_middleware(
 )
 
 
+@app.on_event("startup")
+async def startup():
+    """Create long-lived clients shared across requests"""
+    get_ollama_client()
+    await get_health_monitor().start()
+    # Load Ollama models in the background so the first request finds them warm
+    if settings.OLLAMA_WARMUP_ON_STARTUP and "ollama" in create_llm_service().services:
+        await get_warmup_manager().start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Release shared clients"""
+    await get_health_monitor().stop()
+    await get_warmup_manager().stop()
+    await close_ollama_client()
+
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
@@ -37,21 +59,17 @@ async def root():
 
 @app.get("/health")
 async def health():
-    """Detailed health check"""
-    # Check LLM service
-    try:
-        llm_service = LLMService()
-        llm_status = "online" if await llm_service.check_health() else "offline"
-    except:
-        llm_status = "offline"
+    """Detailed health check (served from the background prober's cache)"""
+    snapshot = get_health_monitor().snapshot()
 
     return {
-        "status": "healthy" if llm_status == "online" else "degraded",
+        "status": "healthy" if snapshot["llm"] == "online" else "degraded",
         "services": {
             "api": "online",
-            "llm": llm_status,
-            "database": "not_configured"  # Phase 3
-        }
+            "llm": snapshot["llm"],
+            "database": snapshot["database"]
+        },
+        "checks": snapshot["components"]
     }
 
 
@@ -62,6 +80,7 @@ app.include_router(sql_router.router, prefix="/api/v1/sql", tags=["SQL"])
 app.include_router(optimization_router.router, prefix="/api/v1/optimization", tags=["Optimization"])
 app.include_router(sample_data_router.router, prefix="/api/v1/sample-data", tags=["Sample Data"])
 app.include_router(database_router.router, prefix="/api/v1/database", tags=["Database"])
+app.include_router(llm_router.router, prefix="/api/v1/llm", tags=["LLM"])
 # app.include_router(export_router.router, prefix="/api/v1/export", tags=["Export"])  # Phase 4
 
 
@@ -0,0 +1,416 @@
+"""
+Compact Metamodel
+Columnar, array-backed metamodel representation for very large schemas
+"""
+
+from array import array
+from typing import Any, Dict, Iterator, List, Optional
+import sys
+from .metamodel import Attribute, CardinalityType, DataType, Entity, Metamodel, Relationship
+
+
+# Attribute flag bits
+PRIMARY_KEY = 1
+FOREIGN_KEY = 2
+UNIQUE = 4
+NULLABLE = 8
+HAS_LENGTH = 16  # length is set (lengths[row] is meaningless otherwise)
+
+_DATA_TYPES: List[DataType] = list(DataType)
+_TYPE_CODES: Dict[str, int] = {data_type.value: code for code, data_type in enumerate(_DATA_TYPES)}
+_CARDINALITIES: List[CardinalityType] = list(CardinalityType)
+_CARDINALITY_CODES: Dict[str, int] = {card.value: code for code, card in enumerate(_CARDINALITIES)}
+
+
+def _flags(is_primary_key: bool, is_foreign_key: bool, is_unique: bool, is_nullable: bool, length: Optional[int]) -> int:
+    return (
+        (PRIMARY_KEY if is_primary_key else 0)
+        | (FOREIGN_KEY if is_foreign_key else 0)
+        | (UNIQUE if is_unique else 0)
+        | (NULLABLE if is_nullable else 0)
+        | (HAS_LENGTH if length is not None else 0)
+    )
+
+
+class AttributeView:
+    """Read-only view of one attribute row (same fields as Attribute)"""
+    __slots__ = ("_model", "_row")
+
+    def __init__(self, model: "CompactMetamodel", row: int):
+        self._model = model
+        self._row = row
+
+    @property
+    def name(self) -> str:
+        return self._model.attr_names[self._row]
+
+    @property
+    def data_type(self) -> DataType:
+        return _DATA_TYPES[self._model.attr_types[self._row]]
+
+    @property
+    def length(self) -> Optional[int]:
+        return self._model.attr_lengths[self._row] if self._model.attr_flags[self._row] & HAS_LENGTH else None
+
+    @property
+    def is_primary_key(self) -> bool:
+        return bool(self._model.attr_flags[self._row] & PRIMARY_KEY)
+
+    @property
+    def is_foreign_key(self) -> bool:
+        return bool(self._model.attr_flags[self._row] & FOREIGN_KEY)
+
+    @property
+    def is_unique(self) -> bool:
+        return bool(self._model.attr_flags[self._row] & UNIQUE)
+
+    @property
+    def is_nullable(self) -> bool:
+        return bool(self._model.attr_flags[self._row] & NULLABLE)
+
+    @property
+    def default_value(self) -> Any:
+        return self._model.attr_defaults.get(self._row)
+
+    @property
+    def description(self) -> Optional[str]:
+        return self._model.attr_descriptions.get(self._row)
+
+    def to_attribute(self) -> Attribute:
+        return Attribute.model_validate(self._model._attribute_dict(self._row))
+
+
+class EntityView:
+    """Read-only view of one entity and its attribute rows"""
+    __slots__ = ("_model", "_index")
+
+    def __init__(self, model: "CompactMetamodel", index: int):
+        self._model = model
+        self._index = index
+
+    @property
+    def name(self) -> str:
+        return self._model.entity_names[self._index]
+
+    @property
+    def description(self) -> Optional[str]:
+        return self._model.entity_descriptions.get(self._index)
+
+    @property
+    def position(self) -> Optional[Dict[str, int]]:
+        return self._model.entity_positions.get(self._index)
+
+    @property
+    def rows(self) -> range:
+        """Attribute row numbers of this entity"""
+        starts = self._model.attr_starts
+        return range(starts[self._index], starts[self._index + 1])
+
+    @property
+    def attributes(self) -> List[AttributeView]:
+        return [AttributeView(self._model, row) for row in self.rows]
+
+    def get_primary_key(self) -> Optional[AttributeView]:
+        flags = self._model.attr_flags
+        for row in self.rows:
+            if flags[row] & PRIMARY_KEY:
+                return AttributeView(self._model, row)
+        return None
+
+    def to_entity(self) -> Entity:
+        return Entity.model_validate(self._model._entity_dict(self._index))
+
+
+class RelationshipView:
+    """Read-only view of one relationship (same fields as Relationship)"""
+    __slots__ = ("_model", "_index")
+
+    def __init__(self, model: "CompactMetamodel", index: int):
+        self._model = model
+        self._index = index
+
+    @property
+    def name(self) -> str:
+        return self._model.rel_names[self._index]
+
+    @property
+    def source_entity(self) -> str:
+        return self._model.rel_sources[self._index]
+
+    @property
+    def target_entity(self) -> str:
+        return self._model.rel_targets[self._index]
+
+    @property
+    def cardinality(self) -> CardinalityType:
+        return _CARDINALITIES[self._model.rel_cardinalities[self._index]]
+
+    @property
+    def source_foreign_key(self) -> Optional[str]:
+        return self._model.rel_source_keys[self._index]
+
+    @property
+    def target_foreign_key(self) -> Optional[str]:
+        return self._model.rel_target_keys[self._index]
+
+    @property
+    def description(self) -> Optional[str]:
+        return self._model.rel_descriptions.get(self._index)
+
+    def to_relationship(self) -> Relationship:
+        return Relationship.model_validate(self._model._relationship_dict(self._index))
+
+
+class CompactMetamodel:
+    """
+    Metamodel stored as columns instead of one object per attribute
+
+    All attributes live in shared columns: interned names, a data type
+    code (array 'B'), a length (array 'q') and a flag bitmask (array 'B'),
+    with the rarely set default values and descriptions in sparse dicts.
+    Entity i owns rows attr_starts[i]:attr_starts[i + 1]. Relationships
+    are columns too. Views (EntityView, AttributeView, RelationshipView)
+    expose rows with the attribute names of the pydantic classes, and
+    to_metamodel()/from_metamodel() convert losslessly.
+
+    Meant for reverse-engineered schemas with thousands of tables; the
+    pydantic Metamodel stays the API and pipeline type.
+    """
+
+    __slots__ = (
+        "entity_names", "entity_descriptions", "entity_positions", "attr_starts",
+        "attr_names", "attr_types", "attr_lengths", "attr_flags", "attr_defaults", "attr_descriptions",
+        "rel_names", "rel_sources", "rel_targets", "rel_cardinalities", "rel_source_keys", "rel_target_keys",
+        "rel_descriptions", "metadata", "_by_name",
+    )
+
+    def __init__(self):
+        self.entity_names: List[str] = []
+        self.entity_descriptions: Dict[int, str] = {}
+        self.entity_positions: Dict[int, Dict[str, int]] = {}
+        self.attr_starts = array("I", [0])
+        self.attr_names: List[str] = []
+        self.attr_types = array("B")
+        self.attr_lengths = array("q")
+        self.attr_flags = array("B")
+        self.attr_defaults: Dict[int, Any] = {}
+        self.attr_descriptions: Dict[int, str] = {}
+        self.rel_names: List[str] = []
+        self.rel_sources: List[str] = []
+        self.rel_targets: List[str] = []
+        self.rel_cardinalities = array("B")
+        self.rel_source_keys: List[Optional[str]] = []
+        self.rel_target_keys: List[Optional[str]] = []
+        self.rel_descriptions: Dict[int, str] = {}
+        self.metadata: Dict[str, Any] = {}
+        self._by_name: Optional[Dict[str, int]] = None
+
+    # Building
+
+    def add_entity(self, name: str, description: Optional[str] = None, position: Optional[Dict[str, int]] = None):
+        """Start a new entity; following add_attribute() calls belong to it"""
+        index = len(self.entity_names)
+        self.entity_names.append(name)
+        if description is not None:
+            self.entity_descriptions[index] = description
+        if position is not None:
+            self.entity_positions[index] = position
+        self.attr_starts.append(self.attr_starts[-1])
+        self._by_name = None
+
+    def add_attribute(
+        self,
+        name: str,
+        data_type: Any,
+        length: Optional[int] = None,
+        is_primary_key: bool = False,
+        is_foreign_key: bool = False,
+        is_unique: bool = False,
+        is_nullable: bool = True,
+        default_value: Any = None,
+        description: Optional[str] = None
+    ):
+        """Append an attribute to the last added entity"""
+        if len(self.entity_names) == 0:
+            raise ValueError("add_entity() must be called before add_attribute()")
+        data_type = getattr(data_type, "value", data_type)  # DataType member or its value
+        try:
+            type_code = _TYPE_CODES[data_type]
+        except KeyError:
+            raise ValueError(f"Unknown data type: {data_type}")
+        row = len(self.attr_names)
+        self.attr_names.append(sys.intern(name))
+        self.attr_types.append(type_code)
+        self.attr_lengths.append(length if length is not None else 0)
+        self.attr_flags.append(_flags(is_primary_key, is_foreign_key, is_unique, is_nullable, length))
+        if default_value is not None:
+            self.attr_defaults[row] = default_value
+        if description is not None:
+            self.attr_descriptions[row] = description
+        self.attr_starts[-1] = row + 1
+
+    def add_relationship(
+        self,
+        name: str,
+        source_entity: str,
+        target_entity: str,
+        cardinality: Any,
+        source_foreign_key: Optional[str] = None,
+        target_foreign_key: Optional[str] = None,
+        description: Optional[str] = None
+    ):
+        cardinality = getattr(cardinality, "value", cardinality)
+        try:
+            code = _CARDINALITY_CODES[cardinality]
+        except KeyError:
+            raise ValueError(f"Unknown cardinality: {cardinality}")
+        if description is not None:
+            self.rel_descriptions[len(self.rel_names)] = description
+        self.rel_names.append(name)
+        self.rel_sources.append(sys.intern(source_entity))
+        self.rel_targets.append(sys.intern(target_entity))
+        self.rel_cardinalities.append(code)
+        self.rel_source_keys.append(source_foreign_key)
+        self.rel_target_keys.append(target_foreign_key)
+
+    @classmethod
+    def from_metamodel(cls, metamodel: Metamodel) -> "CompactMetamodel":
+        compact = cls()
+        for entity in metamodel.entities:
+            compact.add_entity(entity.name, entity.description, entity.position)
+            for attr in entity.attributes:
+                compact.add_attribute(
+                    attr.name, attr.data_type, attr.length, attr.is_primary_key, attr.is_foreign_key,
+                    attr.is_unique, attr.is_nullable, attr.default_value, attr.description
+                )
+        for rel in metamodel.relationships:
+            compact.add_relationship(
+                rel.name, rel.source_entity, rel.target_entity, rel.cardinality,
+                rel.source_foreign_key, rel.target_foreign_key, rel.description
+            )
+        compact.metadata = dict(metamodel.metadata)
+        return compact
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CompactMetamodel":
+        """
+        Build directly from metamodel-shaped dicts (no pydantic objects)
+
+        Data types and cardinalities are checked; other values are taken
+        as they are, so use this for data already in metamodel form
+        (to_dict() output, schema introspection), not raw LLM output.
+        """
+        compact = cls()
+        for entity in data.get("entities", []):
+            compact.add_entity(entity["name"], entity.get("description"), entity.get("position"))
+            for attr in entity.get("attributes", []):
+                compact.add_attribute(
+                    attr["name"],
+                    attr["data_type"],
+                    attr.get("length"),
+                    attr.get("is_primary_key", False),
+                    attr.get("is_foreign_key", False),
+                    attr.get("is_unique", False),
+                    attr.get("is_nullable", True),
+                    attr.get("default_value"),
+                    attr.get("description")
+                )
+        for rel in data.get("relationships", []):
+            compact.add_relationship(
+                rel["name"], rel["source_entity"], rel["target_entity"], rel["cardinality"],
+                rel.get("source_foreign_key"), rel.get("target_foreign_key"), rel.get("description")
+            )
+        compact.metadata = dict(data.get("metadata", {}))
+        return compact
+
+    # Reading
+
+    def __len__(self) -> int:
+        return len(self.entity_names)
+
+    @property
+    def attribute_count(self) -> int:
+        return len(self.attr_names)
+
+    def entities(self) -> Iterator[EntityView]:
+        for index in range(len(self.entity_names)):
+            yield EntityView(self, index)
+
+    def relationships(self) -> Iterator[RelationshipView]:
+        for index in range(len(self.rel_names)):
+            yield RelationshipView(self, index)
+
+    def get_entity(self, name: str) -> Optional[EntityView]:
+        if self._by_name is None:
+            self._by_name = {}
+            for index, entity_name in enumerate(self.entity_names):
+                self._by_name.setdefault(entity_name, index)
+        index = self._by_name.get(name)
+        return EntityView(self, index) if index is not None else None
+
+    def validate(self) -> Dict[str, Any]:
+        """Same checks and messages as Metamodel.validate(), on the columns"""
+        errors = []
+        flags = self.attr_flags
+        starts = self.attr_starts
+        for index, name in enumerate(self.entity_names):
+            if not any(flags[row] & PRIMARY_KEY for row in range(starts[index], starts[index + 1])):
+                errors.append(f"Entity '{name}' has no primary key")
+
+        entity_names = set(self.entity_names)
+        for index, rel_name in enumerate(self.rel_names):
+            if self.rel_sources[index] not in entity_names:
+                errors.append(f"Relationship '{rel_name}' references unknown entity '{self.rel_sources[index]}'")
+            if self.rel_targets[index] not in entity_names:
+                errors.append(f"Relationship '{rel_name}' references unknown entity '{self.rel_targets[index]}'")
+
+        return {"is_valid": len(errors) == 0, "errors": errors, "warnings": []}
+
+    # Converting back
+
+    def _attribute_dict(self, row: int) -> Dict[str, Any]:
+        flags = self.attr_flags[row]
+        return {
+            "name": self.attr_names[row],
+            "data_type": _DATA_TYPES[self.attr_types[row]].value,
+            "length": self.attr_lengths[row] if flags & HAS_LENGTH else None,
+            "is_primary_key": bool(flags & PRIMARY_KEY),
+            "is_foreign_key": bool(flags & FOREIGN_KEY),
+            "is_unique": bool(flags & UNIQUE),
+            "is_nullable": bool(flags & NULLABLE),
+            "default_value": self.attr_defaults.get(row),
+            "description": self.attr_descriptions.get(row),
+        }
+
+    def _entity_dict(self, index: int) -> Dict[str, Any]:
+        return {
+            "name": self.entity_names[index],
+            "attributes": [
+                self._attribute_dict(row) for row in range(self.attr_starts[index], self.attr_starts[index + 1])
+            ],
+            "description": self.entity_descriptions.get(index),
+            "position": self.entity_positions.get(index),
+        }
+
+    def _relationship_dict(self, index: int) -> Dict[str, Any]:
+        return {
+            "name": self.rel_names[index],
+            "source_entity": self.rel_sources[index],
+            "target_entity": self.rel_targets[index],
+            "cardinality": _CARDINALITIES[self.rel_cardinalities[index]].value,
+            "source_foreign_key": self.rel_source_keys[index],
+            "target_foreign_key": self.rel_target_keys[index],
+            "description": self.rel_descriptions.get(index),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Same shape and values as Metamodel.to_dict()"""
+        return {
+            "entities": [self._entity_dict(index) for index in range(len(self.entity_names))],
+            "relationships": [self._relationship_dict(index) for index in range(len(self.rel_names))],
+            "metadata": dict(self.metadata),
+        }
+
+    def to_metamodel(self) -> Metamodel:
+        # One pydantic-core pass over plain dicts beats building each object in Python
+        return Metamodel.model_validate(self.to_dict())
@@ -0,0 +1,121 @@
+"""
+Metamodel Fingerprints
+Canonical, order-insensitive content hashes of entities, relationships and metamodels
+"""
+
+from typing import Dict, Any, List, Union
+import hashlib
+
+from models.metamodel import Entity, Relationship, Metamodel
+
+
+def _digest(key: tuple) -> str:
+    """128-bit BLAKE2b of the repr of a tuple of plain values"""
+    return hashlib.blake2b(repr(key).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _value(member: Any) -> Any:
+    """Enum members (typed metamodel) and their values (JSON form) hash alike"""
+    return getattr(member, "value", member)
+
+
+def entity_fingerprint(entity: Union[Entity, Dict[str, Any]]) -> str:
+    """
+    Fingerprint of an entity, typed or in its JSON form
+
+    Attribute order is part of the content (it is the column order of the
+    generated table). Missing dict fields count as their model defaults,
+    and position is ignored: it only places the entity in the visual editor.
+    """
+    if isinstance(entity, dict):
+        return _digest((
+            entity.get("name", ""),
+            entity.get("description"),
+            tuple(
+                (
+                    attr.get("name", ""),
+                    _value(attr.get("data_type")),
+                    attr.get("length"),
+                    attr.get("is_primary_key", False),
+                    attr.get("is_foreign_key", False),
+                    attr.get("is_unique", False),
+                    attr.get("is_nullable", True),
+                    attr.get("default_value"),
+                    attr.get("description"),
+                )
+                for attr in entity.get("attributes", [])
+            ),
+        ))
+    return _digest((
+        entity.name,
+        entity.description,
+        tuple(
+            (
+                attr.name,
+                attr.data_type.value,
+                attr.length,
+                attr.is_primary_key,
+                attr.is_foreign_key,
+                attr.is_unique,
+                attr.is_nullable,
+                attr.default_value,
+                attr.description,
+            )
+            for attr in entity.attributes
+        ),
+    ))
+
+
+def relationship_fingerprint(relationship: Union[Relationship, Dict[str, Any]]) -> str:
+    """Fingerprint of a relationship, typed or in its JSON form"""
+    if isinstance(relationship, dict):
+        return _digest((
+            relationship.get("name", ""),
+            relationship.get("source_entity", ""),
+            relationship.get("target_entity", ""),
+            _value(relationship.get("cardinality")),
+            relationship.get("source_foreign_key"),
+            relationship.get("target_foreign_key"),
+            relationship.get("description"),
+        ))
+    return _digest((
+        relationship.name,
+        relationship.source_entity,
+        relationship.target_entity,
+        relationship.cardinality.value,
+        relationship.source_foreign_key,
+        relationship.target_foreign_key,
+        relationship.description,
+    ))
+
+
+def compute_fingerprints(metamodel: Union[Metamodel, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Fingerprints of a metamodel, typed or in its JSON form
+
+    Returns:
+        {
+            "metamodel": str,            # independent of entity and relationship order
+            "ordered": str,              # also covers the order (keys for rendered output)
+            "entities": List[str],       # one per entity, in list order
+            "relationships": List[str]   # one per relationship, in list order
+        }
+
+    The metamodel fingerprint covers entities and relationships only, not
+    metadata; callers whose output depends on metadata (such as the SQL
+    schema name) add it to their own key.
+    """
+    if isinstance(metamodel, dict):
+        entity_items = metamodel.get("entities", [])
+        relationship_items = metamodel.get("relationships", [])
+    else:
+        entity_items = metamodel.entities
+        relationship_items = metamodel.relationships
+    entities: List[str] = [entity_fingerprint(entity) for entity in entity_items]
+    relationships: List[str] = [relationship_fingerprint(rel) for rel in relationship_items]
+    return {
+        "metamodel": _digest((tuple(sorted(entities)), tuple(sorted(relationships)))),
+        "ordered": _digest((tuple(entities), tuple(relationships))),
+        "entities": entities,
+        "relationships": relationships,
+    }
@@ -0,0 +1,116 @@
+"""
+LLM Output Schemas
+Shapes the LLM must return in structured-output mode
+"""
+
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Optional, Dict, Any
+from .metamodel import DataType, CardinalityType
+from .schemas import PromptValidationResponse
+
+
+# Type names LLMs commonly use that are not DataType values
+_DATA_TYPE_ALIASES = {
+    "INT": DataType.INTEGER,
+    "SMALLINT": DataType.INTEGER,
+    "SERIAL": DataType.INTEGER,
+    "BIGSERIAL": DataType.BIGINT,
+    "STRING": DataType.VARCHAR,
+    "NVARCHAR": DataType.VARCHAR,
+    "UUID": DataType.VARCHAR,
+    "BOOL": DataType.BOOLEAN,
+    "NUMERIC": DataType.DECIMAL,
+    "DOUBLE PRECISION": DataType.DOUBLE,
+}
+
+_CARDINALITY_ALIASES = {
+    "1:1": CardinalityType.ONE_TO_ONE,
+    "1:n": CardinalityType.ONE_TO_MANY,
+    "n:1": CardinalityType.MANY_TO_ONE,
+    "n:m": CardinalityType.MANY_TO_MANY,
+    "m:n": CardinalityType.MANY_TO_MANY,
+}
+
+
+def _coerce_data_type(value: Any) -> Any:
+    """VARCHAR for missing or unknown types, as the lenient UMLGenerator path defaults"""
+    if value is None:
+        return DataType.VARCHAR
+    if isinstance(value, DataType) or not isinstance(value, str):
+        return value
+    name = value.split("(", 1)[0].strip().upper()  # VARCHAR(255) -> VARCHAR
+    if name in DataType.__members__:
+        return DataType[name]
+    return _DATA_TYPE_ALIASES.get(name, DataType.VARCHAR)
+
+
+def _coerce_cardinality(value: Any) -> Any:
+    """one_to_many for missing or unknown cardinalities"""
+    if value is None:
+        return CardinalityType.ONE_TO_MANY
+    if isinstance(value, CardinalityType) or not isinstance(value, str):
+        return value
+    name = value.strip().lower().replace("-", "_").replace(" ", "_")
+    if name in CardinalityType._value2member_map_:
+        return CardinalityType(name)
+    return _CARDINALITY_ALIASES.get(name.replace("_", ""), CardinalityType.ONE_TO_MANY)
+
+
+# The extraction shapes mirror the metamodel but with the defaults of
+# UMLGenerator's lenient conversion: Groq's JSON mode guarantees valid
+# JSON, not the schema, so a missing name or an "INT" type must not fail
+# the whole extraction.
+
+class ExtractedAttribute(BaseModel):
+    """Attribute as returned by the extraction prompt"""
+    name: str = ""
+    data_type: DataType = DataType.VARCHAR
+    length: Optional[int] = None
+    is_primary_key: bool = False
+    is_foreign_key: bool = False
+    is_unique: bool = False
+    is_nullable: bool = True
+    default_value: Optional[Any] = None
+    description: Optional[str] = None
+
+    _data_type = field_validator("data_type", mode="before")(_coerce_data_type)
+
+
+class ExtractedEntity(BaseModel):
+    """Entity as returned by the extraction prompt (no editor layout)"""
+    name: str = ""
+    description: Optional[str] = None
+    attributes: List[ExtractedAttribute] = []
+
+
+class ExtractedRelationship(BaseModel):
+    """Relationship as returned by the extraction prompt"""
+    name: str = ""
+    source_entity: str = ""
+    target_entity: str = ""
+    cardinality: CardinalityType = CardinalityType.ONE_TO_MANY
+    source_foreign_key: Optional[str] = None
+    target_foreign_key: Optional[str] = None
+    description: Optional[str] = None
+
+    _cardinality = field_validator("cardinality", mode="before")(_coerce_cardinality)
+
+
+class ExtractionOutput(BaseModel):
+    """Response of the extraction prompt (prompts/extraction_prompt.txt)"""
+    entities: List[ExtractedEntity]
+    relationships: List[ExtractedRelationship] = []
+
+
+class PromptValidationOutput(PromptValidationResponse):
+    """Response of the validation prompt (prompts/validation_prompt.txt)"""
+
+
+class PromptAnalysisOutput(BaseModel):
+    """Response of the real-time validator's deep analysis prompt"""
+    quality_score: int = Field(ge=0, le=100)
+    detected_entities: List[str] = []
+    detected_relationships: List[str] = []
+    missing_components: List[str] = []
+    suggestions: List[str] = []
+    inferred_schema: Dict[str, Any] = {}
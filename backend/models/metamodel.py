@@ -3,9 +3,10 @@ UML Metamodel Classes
 Core data structures for database schema representation
 """
 
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr
+from typing import List, Optional, Dict, Any, Tuple
 from enum import Enum
+import copy
 
 
 class DataType(str, Enum):
@@ -38,6 +39,8 @@ class CardinalityType(str, Enum):
 
 class Attribute(BaseModel):
     """Entity attribute/column"""
+    model_config = ConfigDict(frozen=True)
+
     name: str
     data_type: DataType
     length: Optional[int] = None
@@ -50,22 +53,46 @@ class Attribute(BaseModel):
 
 
 class Entity(BaseModel):
-    """Database entity/table"""
+    """
+    Database entity/table
+
+    Immutable like the other metamodel classes: derive a changed entity
+    with model_copy(update=...) instead of editing it in place.
+    """
+    model_config = ConfigDict(frozen=True)
+
     name: str
-    attributes: List[Attribute] = []
+    attributes: Tuple[Attribute, ...] = ()
     description: Optional[str] = None
     position: Optional[Dict[str, int]] = None  # For visual editor (x, y)
 
+    # (primary key,) once looked up
+    _primary_key: Optional[Tuple[Optional[Attribute]]] = PrivateAttr(default=None)
+
+    def __eq__(self, other: Any) -> bool:
+        # The cached primary key is not part of the value
+        if not isinstance(other, Entity):
+            return NotImplemented
+        return type(self) is type(other) and self.__dict__ == other.__dict__
+
+    def model_copy(self, *, update: Optional[Dict[str, Any]] = None, deep: bool = False) -> "Entity":
+        copied = super().model_copy(update=update, deep=deep)
+        copied._primary_key = None
+        return copied
+
     def get_primary_key(self) -> Optional[Attribute]:
-        """Get primary key attribute"""
-        for attr in self.attributes:
-            if attr.is_primary_key:
-                return attr
-        return None
+        """Get primary key attribute (looked up once)"""
+        cached = self.__pydantic_private__["_primary_key"]  # direct read: private __getattr__ is slow
+        if cached is None:
+            cached = (next((attr for attr in self.attributes if attr.is_primary_key), None),)
+            self._primary_key = cached
+        return cached[0]
 
 
 class Relationship(BaseModel):
     """Relationship between entities"""
+    model_config = ConfigDict(frozen=True)
+
     name: str
     source_entity: str
     target_entity: str
@@ -75,18 +102,178 @@ class Relationship(BaseModel):
     description: Optional[str] = None
 
 
+class MetamodelIndex:
+    """Lookup tables over a metamodel's entities and relationships, built in one pass over both"""
+
+    def __init__(self, entities: Tuple[Entity, ...], relationships: Tuple[Relationship, ...]):
+        self.by_name: Dict[str, Entity] = {}
+        for entity in entities:
+            # The first entity wins, as with a front-to-back search
+            self.by_name.setdefault(entity.name, entity)
+        self.outgoing: Dict[str, List[Relationship]] = {}
+        self.incoming: Dict[str, List[Relationship]] = {}
+        for rel in relationships:
+            self.outgoing.setdefault(rel.source_entity, []).append(rel)
+            self.incoming.setdefault(rel.target_entity, []).append(rel)
+
+
+class _ReadOnlyDict(dict):
+    """dict that refuses in-place changes (copies are plain dicts)"""
+
+    def _refuse(self, *args: Any, **kwargs: Any):
+        raise TypeError("Metamodel.to_dict() output is read-only; copy it before editing")
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = __ior__ = _refuse
+
+    def __copy__(self) -> Dict[str, Any]:
+        return dict(self)
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> Dict[str, Any]:
+        return {key: copy.deepcopy(value, memo) for key, value in self.items()}
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+
+class _ReadOnlyList(list):
+    """list that refuses in-place changes (copies are plain lists)"""
+
+    def _refuse(self, *args: Any, **kwargs: Any):
+        raise TypeError("Metamodel.to_dict() output is read-only; copy it before editing")
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _refuse
+    append = extend = insert = pop = remove = clear = sort = reverse = _refuse
+
+    def __copy__(self) -> List[Any]:
+        return list(self)
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> List[Any]:
+        return [copy.deepcopy(value, memo) for value in self]
+
+    def __reduce__(self):
+        return (list, (list(self),))
+
+
+def _freeze(value: Any) -> Any:
+    """Read-only version of a JSON-ready value"""
+    if isinstance(value, dict):
+        return _ReadOnlyDict({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return _ReadOnlyList(_freeze(item) for item in value)
+    return value
+
+
 class Metamodel(BaseModel):
-    """Complete UML metamodel"""
-    entities: List[Entity] = []
-    relationships: List[Relationship] = []
+    """
+    Complete UML metamodel
+
+    Entities, relationships and attributes are immutable after
+    construction (frozen models in tuples), so the index, serialized form
+    and fingerprints computed from them are built once and never go
+    stale. Derive changed metamodels with model_copy(update=...), which
+    starts with empty caches. metadata stays a plain, editable dict and
+    is not part of any cache.
+    """
+    model_config = ConfigDict(frozen=True)
+
+    entities: Tuple[Entity, ...] = ()
+    relationships: Tuple[Relationship, ...] = ()
     metadata: Dict[str, Any] = {}
 
+    _index: Optional[MetamodelIndex] = PrivateAttr(default=None)
+    # Read-only JSON form of entities and relationships, from the first to_dict()
+    _items_dict: Optional[Dict[str, Any]] = PrivateAttr(default=None)
+    _fingerprint: Optional[Dict[str, Any]] = PrivateAttr(default=None)
+
+    def __eq__(self, other: Any) -> bool:
+        # Cached indexes, serialization and fingerprints are not part of the value
+        if not isinstance(other, Metamodel):
+            return NotImplemented
+        return type(self) is type(other) and self.__dict__ == other.__dict__
+
+    def model_copy(self, *, update: Optional[Dict[str, Any]] = None, deep: bool = False) -> "Metamodel":
+        copied = super().model_copy(update=update, deep=deep)
+        copied._index = None
+        copied._items_dict = None
+        copied._fingerprint = None
+        return copied
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        JSON-ready dict of the metamodel (enum values as strings)
+
+        Entities and relationships are serialized once and shared by every
+        call, so a response that embeds the metamodel and renders SQL from
+        it pays for one model_dump. The result is read-only: in-place
+        edits raise TypeError, while copy.copy/deepcopy give plain,
+        editable dicts and lists.
+        """
+        items = self.__pydantic_private__["_items_dict"]  # direct read: private __getattr__ is slow
+        if items is None:
+            items = _freeze(self.model_dump(mode="json", exclude={"metadata"}))
+            self._items_dict = items
+        metadata = self.model_dump(mode="json", include={"metadata"})["metadata"]
+        return _ReadOnlyDict({**items, "metadata": _freeze(metadata)})
+
+    def fingerprint(self) -> str:
+        """
+        Order-insensitive content hash of the entities and relationships
+
+        Computed from the typed items on first use and kept in a private
+        attribute (see models.fingerprint): reading it never changes the
+        model, its equality or its serialized form.
+        """
+        return self._fingerprints()["metamodel"]
+
+    def ordered_fingerprint(self) -> str:
+        """
+        Content hash that also covers entity and relationship order
+
+        Key for anything rendered item by item (SQL, diagram code,
+        reports), whose output follows the list order.
+        """
+        return self._fingerprints()["ordered"]
+
+    def _fingerprints(self) -> Dict[str, Any]:
+        """Fingerprints of the content, computed once"""
+        fingerprints = self.__pydantic_private__["_fingerprint"]  # direct read: private __getattr__ is slow
+        if fingerprints is None:
+            from models.fingerprint import compute_fingerprints
+            fingerprints = compute_fingerprints(self)
+            self._fingerprint = fingerprints
+        return fingerprints
+
+    @property
+    def index(self) -> MetamodelIndex:
+        """Name and adjacency indexes, built on first use"""
+        index = self.__pydantic_private__["_index"]  # direct read: private __getattr__ is slow
+        if index is None:
+            index = MetamodelIndex(self.entities, self.relationships)
+            self._index = index
+        return index
+
     def get_entity(self, name: str) -> Optional[Entity]:
         """Get entity by name"""
-        for entity in self.entities:
-            if entity.name == name:
-                return entity
-        return None
+        return self.index.by_name.get(name)
+
+    def get_primary_key(self, entity_name: str) -> Optional[Attribute]:
+        """Primary key attribute of an entity (None if unknown or without one)"""
+        entity = self.get_entity(entity_name)
+        return entity.get_primary_key() if entity else None
+
+    def outgoing_relationships(self, entity_name: str) -> List[Relationship]:
+        """Relationships whose source is entity_name"""
+        return self.index.outgoing.get(entity_name, [])
+
+    def incoming_relationships(self, entity_name: str) -> List[Relationship]:
+        """Relationships whose target is entity_name"""
+        return self.index.incoming.get(entity_name, [])
+
+    def relationship_count(self, entity_name: str) -> int:
+        """Relationships touching entity_name (a self-reference counts once)"""
+        outgoing = self.outgoing_relationships(entity_name)
+        self_references = sum(1 for rel in outgoing if rel.target_entity == entity_name)
+        return len(outgoing) + len(self.incoming_relationships(entity_name)) - self_references
 
     def validate(self) -> Dict[str, Any]:
         """
@@ -108,7 +295,7 @@ class Metamodel(BaseModel):
                 errors.append(f"Entity '{entity.name}' has no primary key")
 
         # Check if relationships reference valid entities
-        entity_names = {e.name for e in self.entities}
+        entity_names = self.index.by_name
         for rel in self.relationships:
             if rel.source_entity not in entity_names:
                 errors.append(f"Relationship '{rel.name}' references unknown entity '{rel.source_entity}'")
@@ -4,12 +4,19 @@ Handles UML diagram generation and modification
 """
 
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, Literal
+from typing import Any, Dict, List, Optional, Literal
+import json
+import time
+from models.metamodel import Metamodel
 from services.entity_extractor import EntityExtractor
 from services.uml_generator import UMLGenerator
 from services.mermaid_service import MermaidService
 from services.plantuml_generator import PlantUMLGenerator
+from services.batch_extraction import BatchExtractionService
+from services.draft_extractor import DraftSchemaExtractor
+from config import settings
 
 router = APIRouter()
 
@@ -18,6 +25,8 @@ entity_extractor = EntityExtractor()
 uml_generator = UMLGenerator()
 mermaid_service = MermaidService()
 plantuml_generator = PlantUMLGenerator()
+batch_service = BatchExtractionService(entity_extractor, uml_generator)
+draft_extractor = DraftSchemaExtractor()
 
 
 class DiagramGenerationRequest(BaseModel):
@@ -25,6 +34,7 @@ class DiagramGenerationRequest(BaseModel):
     prompt: str
     format: Literal["plantuml", "mermaid", "both"] = "both"
     style: str = "default"
+    session_id: Optional[str] = None  # Continue an earlier generation's LLM conversation
 
 
 class DiagramGenerationResponse(BaseModel):
@@ -36,6 +46,12 @@ class DiagramGenerationResponse(BaseModel):
     validation_status: str = "unknown"
 
 
+class BatchGenerationRequest(BaseModel):
+    """Request model for batch metamodel generation"""
+    prompts: List[str]
+    concurrency: Optional[int] = None  # defaults to BATCH_DEFAULT_CONCURRENCY
+
+
 class DiagramModificationRequest(BaseModel):
     """Request model for diagram modification"""
     current_metamodel: dict
@@ -52,47 +68,196 @@ async def generate_diagram(request: DiagramGenerationRequest):
     """
     try:
         # Step 1: Extract entities and relationships from prompt
-        structure = await entity_extractor.extract_structure(request.prompt)
+        structure = await entity_extractor.extract_structure(request.prompt, session_id=request.session_id)
         entities = structure.get("entities", [])
         relationships = structure.get("relationships", [])
 
-        # Step 2: Generate UML metamodel
-        metamodel = uml_generator.generate_metamodel(entities, relationships)
+        # Step 2: Generate UML metamodel (structured output was validated against the schema already)
+        metamodel = uml_generator.build_metamodel(entities, relationships, trusted=settings.LLM_STRUCTURED_OUTPUT)
 
         # Step 3: Validate metamodel
         validation = uml_generator.validate_metamodel(metamodel)
         validation_status = "valid" if validation.get("is_valid") else "invalid"
 
         # Step 4: Generate diagram code
-        mermaid_code = None
-        plantuml_code = None
+        return JSONResponse(_render_diagrams(metamodel, request.format, validation_status))
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Diagram generation failed: {str(e)}")
+
+
+def _render_diagrams(metamodel: Metamodel, diagram_format: str, validation_status: str) -> Dict[str, Any]:
+    """
+    DiagramGenerationResponse payload for a metamodel
+
+    Both diagrams are rendered from the typed metamodel, which is
+    serialized once (to_dict) for the payload.
+    """
+    plantuml_code = None
+    if diagram_format in ["plantuml", "both"]:
+        try:
+            plantuml_code = plantuml_generator.generate(metamodel)
+            print(f"[PLANTUML] SUCCESS: Generated {len(plantuml_code)} characters")
+        except Exception as puml_err:
+            print(f"[PLANTUML] ERROR: {str(puml_err)}")
+
+    return {
+        "metamodel": metamodel.to_dict(),
+        "plantuml_code": plantuml_code,
+        "mermaid_code": mermaid_service.generate_code(metamodel) if diagram_format in ["mermaid", "both"] else None,
+        "diagram_image_base64": None,  # Image rendering in Phase 2
+        "validation_status": validation_status
+    }
+
+
+def _draft_response(request: DiagramGenerationRequest) -> Dict[str, Any]:
+    """Rule-based draft diagram for a prompt (no LLM call)"""
+    start = time.perf_counter()
+    structure = draft_extractor.extract(request.prompt)
+    metamodel = uml_generator.build_metamodel(
+        structure["entities"],
+        structure["relationships"],
+        metadata={"draft": True, "source": "rules"},
+        trusted=True  # The draft extractor only emits valid types and cardinalities
+    )
+
+    response = _render_diagrams(metamodel, request.format, "draft")
+    print(f"[DRAFT] {len(metamodel.entities)} entities, {len(metamodel.relationships)} relationships "
+          f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+    return response
+
+
+@router.post("/draft", response_model=DiagramGenerationResponse)
+async def draft_diagram(request: DiagramGenerationRequest):
+    """
+    Instant draft diagram from local keyword detection
+
+    Answers in milliseconds without calling the LLM; metadata.draft is
+    true and validation_status is "draft". Clients show it while
+    /generate runs and replace it with that result.
+    """
+    try:
+        return JSONResponse(_draft_response(request))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Draft generation failed: {str(e)}")
+
+
+def _sse_event(event: str, data: dict) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
-        if request.format in ["mermaid", "both"]:
-            mermaid_code = mermaid_service.generate_code(metamodel)
 
-        if request.format in ["plantuml", "both"]:
-            # Generate PlantUML diagram - Phase 2 implementation
+@router.post("/generate-stream")
+async def generate_diagram_stream(request: DiagramGenerationRequest):
+    """
+    Stream diagram generation as Server-Sent Events
+
+    Starts with a "draft" event (same payload as /draft) before the LLM
+    is called. Then emits an "entity" or "relationship" event as soon as each object is
+    complete in the LLM output, carrying the normalized item, its Mermaid
+    fragment and the partial metamodel so far. A final "complete" event
+    carries the same payload as /generate; both replace the draft. If the
+    extraction fails mid-stream, the final event is "error" instead, with
+    the message and the partial metamodel received so far.
+    """
+    async def event_stream():
+        entities = []  # typed items
+        relationships = []
+        partial = {"entities": [], "relationships": []}  # the same items, serialized once each
+
+        try:
+            yield _sse_event("draft", _draft_response(request))
+        except Exception as e:
+            yield _sse_event("warning", {"message": f"Draft unavailable: {str(e)}"})
+
+        async for event in entity_extractor.extract_structure_stream(request.prompt):
+            if event["type"] == "complete":
+                break
+            if event["type"] == "error":
+                yield _sse_event("error", {"message": event["data"]["message"], "metamodel": partial})
+                return
+
             try:
-                from models.metamodel import Metamodel
-                metamodel_obj = Metamodel(**metamodel)
-                plantuml_code = plantuml_generator.generate(metamodel_obj)
-                print(f"[PLANTUML] SUCCESS: Generated {len(plantuml_code)} characters")
-            except Exception as puml_err:
-                print(f"[PLANTUML] ERROR: {str(puml_err)}")
-                print(f"[PLANTUML] Metamodel type: {type(metamodel)}")
-                print(f"[PLANTUML] Metamodel keys: {metamodel.keys() if isinstance(metamodel, dict) else 'not a dict'}")
-                plantuml_code = None
-
-        return DiagramGenerationResponse(
-            metamodel=metamodel,
-            mermaid_code=mermaid_code,
-            plantuml_code=plantuml_code,
-            diagram_image_base64=None,  # Image rendering in Phase 2
-            validation_status=validation_status
+                if event["type"] == "entity":
+                    item = uml_generator.build_metamodel([event["data"]], []).entities[0]
+                    entities.append(item)
+                else:
+                    item = uml_generator.build_metamodel([], [event["data"]]).relationships[0]
+                    relationships.append(item)
+            except Exception as e:
+                yield _sse_event("warning", {"message": f"Skipped invalid {event['type']}: {str(e)}"})
+                continue
+
+            item_dict = item.model_dump(mode="json")
+            partial["entities" if event["type"] == "entity" else "relationships"].append(item_dict)
+            yield _sse_event(event["type"], {
+                "item": item_dict,
+                "mermaid_fragment": mermaid_service.generate_fragment(item, event["type"]),
+                "metamodel": partial
+            })
+
+        try:
+            metamodel = uml_generator.build_metamodel(
+                event["data"].get("entities", []),
+                event["data"].get("relationships", [])
+            )
+        except Exception:
+            # Fall back to the items that validated individually
+            metamodel = Metamodel.model_construct(
+                entities=tuple(entities),
+                relationships=tuple(relationships),
+                metadata={"version": "1.0"}
+            )
+
+        validation = uml_generator.validate_metamodel(metamodel)
+        validation_status = "valid" if validation.get("is_valid") else "invalid"
+        yield _sse_event("complete", _render_diagrams(metamodel, request.format, validation_status))
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/generate-batch")
+async def generate_batch(request: BatchGenerationRequest):
+    """
+    Extract metamodels for many prompts, streamed as NDJSON
+
+    Prompts run with bounded concurrency; one {"type": "result", ...} line
+    is written per prompt as soon as it finishes (in completion order, with
+    its input index, per-item error and timings), followed by a final
+    {"type": "summary", ...} line.
+    """
+    if not request.prompts:
+        raise HTTPException(status_code=400, detail="prompts must not be empty")
+    if len(request.prompts) > settings.BATCH_MAX_PROMPTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many prompts: {len(request.prompts)} (max {settings.BATCH_MAX_PROMPTS})"
         )
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Diagram generation failed: {str(e)}")
+    concurrency = request.concurrency or settings.BATCH_DEFAULT_CONCURRENCY
+    concurrency = max(1, min(concurrency, settings.BATCH_MAX_CONCURRENCY))
+
+    async def ndjson_stream():
+        start = time.perf_counter()
+        succeeded = 0
+        async for result in batch_service.run(request.prompts, concurrency):
+            succeeded += result["status"] == "ok"
+            yield json.dumps({"type": "result", **result}) + "\n"
+
+        yield json.dumps({
+            "type": "summary",
+            "total": len(request.prompts),
+            "succeeded": succeeded,
+            "failed": len(request.prompts) - succeeded,
+            "concurrency": concurrency,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 1)
+        }) + "\n"
+
+    return StreamingResponse(ndjson_stream(), media_type="application/x-ndjson")
 
 
 @router.post("/modify")
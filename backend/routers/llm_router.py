@@ -0,0 +1,36 @@
+"""
+LLM Router
+Exposes runtime statistics for the LLM layer
+"""
+
+from fastapi import APIRouter
+from services.llm_cache import get_llm_cache
+from services.ollama_client import get_pool_stats
+from services.request_coalescer import get_request_coalescer
+from services.llm_scheduler import get_scheduler_stats
+from services.llm_provider_router import get_router_stats
+from services.model_warmup import get_warmup_stats
+from services.prompt_prefix import get_conversation_store
+from services.model_tier_router import get_tier_stats
+from services.realtime_channel import get_channel_stats
+from services.fingerprint_memo import get_memo_stats
+
+router = APIRouter()
+
+
+@router.get("/stats")
+async def get_llm_stats():
+    """Cache hit/miss counters and other LLM layer metrics"""
+    cache = get_llm_cache()
+    return {
+        "cache": cache.get_stats() if cache else {"enabled": False},
+        "ollama_pool": get_pool_stats(),
+        "coalescing": get_request_coalescer().get_stats(),
+        "schedulers": get_scheduler_stats(),
+        "providers": get_router_stats(),
+        "warmup": get_warmup_stats(),
+        "prompt_prefix": get_conversation_store().get_stats(),
+        "model_tiers": get_tier_stats(),
+        "realtime_channels": get_channel_stats(),
+        "fingerprint_memos": get_memo_stats()
+    }
@@ -6,6 +6,7 @@ Provides AI-powered optimization suggestions
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Dict, Any
+from models.metamodel import Metamodel
 from services.optimization_service import OptimizationService
 
 router = APIRouter()
@@ -14,7 +15,7 @@ optimization_service = OptimizationService()
 
 class OptimizationRequest(BaseModel):
     """Request model for schema optimization"""
-    metamodel: dict
+    metamodel: Metamodel
 
 
 class OptimizationResponse(BaseModel):
@@ -3,15 +3,19 @@ Prompt Validation Router
 Handles prompt validation and completion with LLM
 """
 
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
 from services.prompt_validator import PromptValidator
 from services.realtime_validator import RealtimeValidator
+from services.realtime_session import RealtimeSessionStore
+from services.realtime_channel import RealtimeChannel
+from config import settings
 
 router = APIRouter()
 prompt_validator = PromptValidator()
 realtime_validator = RealtimeValidator()
+realtime_sessions = RealtimeSessionStore(realtime_validator, settings.REALTIME_MAX_SESSIONS)
 
 
 class PromptValidationRequest(BaseModel):
@@ -93,6 +97,171 @@ async def analyze_prompt_realtime(request: RealtimeValidationRequest):
         )
 
 
+class RealtimeSessionRequest(BaseModel):
+    """Request model for opening a realtime analysis session"""
+    prompt: str = ""
+
+
+class RealtimeSessionResponse(RealtimeValidationResponse):
+    """Full analysis of a session's current text"""
+    session_id: str
+    version: int
+
+
+class TextEdit(BaseModel):
+    """Replace `deleted` characters at `offset` with `inserted`"""
+    offset: int = Field(..., ge=0)
+    deleted: int = Field(0, ge=0)
+    inserted: str = ""
+
+
+class RealtimeEditRequest(BaseModel):
+    """Request model for editing a session's text"""
+    edits: List[TextEdit]
+    base_version: Optional[int] = None  # rejected with 409 if the session has moved on
+
+
+class HighlightWindow(BaseModel):
+    """Range of the new text whose highlights were recomputed"""
+    start: int
+    end: int
+
+
+class HighlightChange(BaseModel):
+    """
+    Highlight update for one edit
+
+    Client highlights starting in [window.start, window.end - delta) are
+    replaced by `highlights`; those starting at or after window.end - delta
+    move by delta.
+    """
+    window: HighlightWindow
+    delta: int
+    highlights: List[HighlightItem]
+
+
+class RealtimeEditResponse(BaseModel):
+    """Response model for a session edit: changed highlights plus fresh totals"""
+    session_id: str
+    version: int
+    length: int
+    changes: List[HighlightChange]
+    missing_highlight: Optional[HighlightItem] = None
+    score: float
+    detected: Dict[str, Any]
+    missing: Dict[str, bool]
+    suggestions: List[str]
+
+
+def _get_realtime_session(session_id: str):
+    session = realtime_sessions.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Unknown realtime session: {session_id}")
+    return session
+
+
+@router.post("/sessions", response_model=RealtimeSessionResponse)
+async def open_realtime_session(request: RealtimeSessionRequest):
+    """
+    Start edit-based realtime analysis of a prompt
+
+    Returns the same analysis as /analyze-realtime plus a session_id to
+    send edits to instead of re-posting the whole prompt per keystroke.
+    """
+    session = realtime_sessions.create(request.prompt)
+    return RealtimeSessionResponse(session_id=session.session_id, version=session.version, **session.snapshot())
+
+
+@router.get("/sessions/{session_id}", response_model=RealtimeSessionResponse)
+async def get_realtime_session(session_id: str):
+    """Full analysis of a session's current text (to resynchronize a client)"""
+    session = _get_realtime_session(session_id)
+    return RealtimeSessionResponse(session_id=session.session_id, version=session.version, **session.snapshot())
+
+
+@router.post("/sessions/{session_id}/edits", response_model=RealtimeEditResponse)
+async def edit_realtime_session(session_id: str, request: RealtimeEditRequest):
+    """
+    Apply text edits and return only the highlights that changed
+
+    Edits apply in order, each against the text left by the previous one.
+    Only a window around each edit is re-scanned and the detections are
+    updated from per-keyword counts of the phrases in that window, so the
+    payload and the keyword work do not grow with the prompt length
+    (while fewer than two entities are detected, the missing-entities
+    marker is still found by one regex search of the text).
+    """
+    session = _get_realtime_session(session_id)
+    if request.base_version is not None and request.base_version != session.version:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Session is at version {session.version}, not {request.base_version}"
+        )
+
+    # Check every edit before applying any, so a bad batch changes nothing
+    length = len(session.text)
+    for edit in request.edits:
+        if edit.offset + edit.deleted > length:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Edit out of range: offset {edit.offset}, deleted {edit.deleted}, text length {length}"
+            )
+        length += len(edit.inserted) - edit.deleted
+
+    changes = [session.apply_edit(edit.offset, edit.deleted, edit.inserted) for edit in request.edits]
+    summary = session.summary()
+    return RealtimeEditResponse(
+        session_id=session.session_id,
+        version=session.version,
+        length=len(session.text),
+        changes=changes,
+        missing_highlight=summary.pop("missing_indicator"),
+        **summary
+    )
+
+
+@router.delete("/sessions/{session_id}")
+async def close_realtime_session(session_id: str):
+    """Drop a realtime session"""
+    if not realtime_sessions.close(session_id):
+        raise HTTPException(status_code=404, detail=f"Unknown realtime session: {session_id}")
+    return {"session_id": session_id, "closed": True}
+
+
+@router.websocket("/ws")
+async def realtime_analysis_channel(websocket: WebSocket):
+    """
+    Realtime analysis over one WebSocket instead of a POST per keystroke
+
+    Client messages:
+      {"type": "text", "prompt": "..."}           replace the text
+      {"type": "edits", "edits": [TextEdit...]}   patch the text
+      {"type": "deep"}                            LLM analysis of the current text
+    Server messages:
+      {"type": "analysis", "version", ...}        same fields as /analyze-realtime,
+                                                  sent once a burst of changes settles
+      {"type": "deep", "version", "result"}
+      {"type": "deep_cancelled", "version"}       newer text arrived first
+      {"type": "error", "version", "detail"}
+    """
+    await websocket.accept()
+    channel = RealtimeChannel(realtime_validator, websocket.send_json, settings.REALTIME_DEBOUNCE_SECONDS)
+    try:
+        while True:
+            try:
+                message = await websocket.receive_json()
+            except ValueError:
+                message = None
+            if not isinstance(message, dict):
+                await websocket.send_json({"type": "error", "version": channel.version, "detail": "Expected a JSON object"})
+                continue
+            await channel.handle(message)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await channel.close()
+
+
 @router.post("/analyze-deep")
 async def analyze_prompt_deep(request: RealtimeValidationRequest):
     """
@@ -6,6 +6,7 @@ Handles SQL script generation for multiple database systems
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Literal
+from models.metamodel import Metamodel
 from services.sql_generator import SQLGenerator
 from services.sql_validator import SQLValidator
 
@@ -16,7 +17,7 @@ sql_validator = SQLValidator()
 
 class SQLGenerationRequest(BaseModel):
     """Request model for SQL generation"""
-    metamodel: dict
+    metamodel: Metamodel
     dbms: Literal["postgresql", "mysql", "sqlite", "oracle", "sqlserver"] = "postgresql"
     options: dict = {
         "add_indexes": True,
@@ -41,13 +42,10 @@ async def generate_sql(request: SQLGenerationRequest):
             options=request.options
         )
 
-        entities = request.metamodel.get("entities", [])
-        relationships = request.metamodel.get("relationships", [])
-
         metadata = {
             "target_dbms": request.dbms,
-            "tables_count": len(entities),
-            "relationships_count": len(relationships),
+            "tables_count": len(request.metamodel.entities),
+            "relationships_count": len(request.metamodel.relationships),
             "lines_of_code": len(sql_script.split("\n")),
             "generated_at": "2025-10-22"
         }
@@ -0,0 +1,103 @@
+"""
+Batch Extraction Service
+Turns many natural-language specs into metamodels with bounded concurrency
+"""
+
+from typing import Any, AsyncIterator, Dict, List
+import asyncio
+import time
+from .entity_extractor import EntityExtractor
+from .uml_generator import UMLGenerator
+from .llm_scheduler import Priority
+from config import settings
+
+
+class BatchExtractionService:
+    """
+    Runs extract_structure + generate_metamodel over a list of prompts
+
+    At most `concurrency` prompts are in flight; results are yielded in
+    completion order, each tagged with its index in the input list. LLM
+    calls are scheduled as BATCH so interactive traffic keeps priority.
+    """
+
+    def __init__(self, extractor: EntityExtractor, uml_generator: UMLGenerator):
+        self.extractor = extractor
+        self.uml_generator = uml_generator
+
+    async def run(self, prompts: List[str], concurrency: int) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Process prompts and yield one result per prompt as it finishes
+
+        Result fields: index, prompt, status ("ok" | "error"), metamodel,
+        entity_count, relationship_count, validation_status, error and
+        timings_ms (extract, metamodel, total).
+        """
+        pending: "asyncio.Queue[int]" = asyncio.Queue()
+        for index in range(len(prompts)):
+            pending.put_nowait(index)
+        results: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+
+        async def worker():
+            while True:
+                try:
+                    index = pending.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                await results.put(await self.process(index, prompts[index]))
+
+        workers = [asyncio.create_task(worker()) for _ in range(max(1, min(concurrency, len(prompts))))]
+        try:
+            for _ in range(len(prompts)):
+                yield await results.get()
+        finally:
+            # Client went away (or we are done): stop outstanding work
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def process(self, index: int, prompt: str) -> Dict[str, Any]:
+        """Extract and build the metamodel of one prompt, never raising"""
+        result: Dict[str, Any] = {
+            "index": index,
+            "prompt": prompt,
+            "status": "error",
+            "metamodel": None,
+            "entity_count": 0,
+            "relationship_count": 0,
+            "validation_status": None,
+            "error": None,
+            "timings_ms": {},
+        }
+
+        start = time.perf_counter()
+        try:
+            structure = await self.extractor.extract_structure(prompt, priority=Priority.BATCH)
+            extracted = time.perf_counter()
+            result["timings_ms"]["extract"] = round((extracted - start) * 1000, 1)
+
+            entities = structure.get("entities", [])
+            if not entities:
+                # extract_structure reports LLM failures as an empty structure
+                raise ValueError(structure.get("error") or "No entities extracted")
+
+            metamodel = self.uml_generator.build_metamodel(
+                entities,
+                structure.get("relationships", []),
+                trusted=settings.LLM_STRUCTURED_OUTPUT
+            )
+            validation = self.uml_generator.validate_metamodel(metamodel)
+            result["timings_ms"]["metamodel"] = round((time.perf_counter() - extracted) * 1000, 1)
+
+            result.update(
+                status="ok",
+                metamodel=metamodel.to_dict(),
+                entity_count=len(metamodel.entities),
+                relationship_count=len(metamodel.relationships),
+                validation_status="valid" if validation.get("is_valid") else "invalid",
+            )
+        except Exception as e:
+            result["error"] = str(e)
+
+        result["timings_ms"]["total"] = round((time.perf_counter() - start) * 1000, 1)
+        return result
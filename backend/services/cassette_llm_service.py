@@ -0,0 +1,182 @@
+"""
+Cassette LLM Service
+Records LLM exchanges to disk and replays them offline with synthetic latency
+"""
+
+from typing import Any, AsyncIterator, Dict, Optional
+import asyncio
+import json
+import os
+import threading
+import time
+from .llm_cache import LLMResponseCache
+
+# Replayed streams are cut into chunks of this many characters
+REPLAY_CHUNK_CHARS = 16
+
+
+class CassetteMiss(Exception):
+    """Raised in replay mode when no recorded exchange matches a call"""
+
+
+class CassetteLLMService:
+    """
+    Drop-in LLM service backed by a JSON-lines cassette file
+
+    record: forwards every call to the wrapped service and appends the
+        exchange (method, prompt, response, latency) to the cassette
+    replay: answers from the cassette without any network access, after
+        latency_ms (or the recorded latency when latency_ms is negative);
+        unknown calls raise CassetteMiss so runs stay reproducible
+
+    Exchanges are matched on method, model, tier, prompt, prefix, system
+    prompt, temperature and output schema; sampling details such as max_tokens or priority do
+    not change the recorded answer. Streamed and non-streamed JSON calls
+    share recordings, so a JSON stream is only recorded if its text parses.
+    """
+
+    def __init__(
+        self,
+        mode: str,
+        path: str,
+        inner: Optional[Any] = None,
+        latency_ms: float = -1
+    ):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        if mode == "record" and inner is None:
+            raise ValueError("Cassette record mode needs a service to record")
+
+        self.mode = mode
+        self.path = path
+        self.inner = inner
+        self.latency_ms = latency_ms
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.stats = {"recorded": 0, "replayed": 0, "misses": 0}
+        self._load()
+
+    def _load(self):
+        """Read existing exchanges (later lines win)"""
+        if not os.path.exists(self.path):
+            if self.mode == "replay":
+                print(f"[CASSETTE] WARN: {self.path} does not exist - every call will miss")
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries[entry["key"]] = entry
+        print(f"[CASSETTE] Loaded {len(self._entries)} exchanges from {self.path} ({self.mode} mode)")
+
+    @staticmethod
+    def _key(method: str, prompt: str, kwargs: Dict[str, Any], default_temperature: float) -> str:
+        # Streaming and non-streaming calls of the same kind share recordings
+        kind = "json" if "json" in method else "text"
+        return LLMResponseCache.make_key(
+            (kwargs.get("prefix") or "") + prompt,
+            kwargs.get("model"),
+            kwargs.get("temperature", default_temperature),
+            kwargs.get("system_prompt"),
+            kind=kind,
+            session=kwargs.get("session_id"),
+            tier=kwargs.get("tier"),
+            schema=kwargs["schema"].__name__ if kwargs.get("schema") else None
+        )
+
+    def _record(self, key: str, method: str, prompt: str, response: Any, latency_ms: float):
+        entry = {
+            "key": key,
+            "method": method,
+            "prompt": prompt,
+            "response": response,
+            "latency_ms": round(latency_ms, 1),
+        }
+        with self._lock:
+            self._entries[key] = entry
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+            self.stats["recorded"] += 1
+
+    def _lookup(self, key: str, method: str, prompt: str) -> Dict[str, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            raise CassetteMiss(f"No recorded {method} exchange for prompt: {prompt[:100]}")
+        self.stats["replayed"] += 1
+        return entry
+
+    def _replay_delay(self, entry: Dict[str, Any]) -> float:
+        latency = entry.get("latency_ms", 0) if self.latency_ms < 0 else self.latency_ms
+        return latency / 1000
+
+    async def _call(self, method: str, prompt: str, default_temperature: float, **kwargs) -> Any:
+        key = self._key(method, prompt, kwargs, default_temperature)
+        if self.mode == "replay":
+            entry = self._lookup(key, method, prompt)
+            await asyncio.sleep(self._replay_delay(entry))
+            return entry["response"]
+
+        start = time.perf_counter()
+        response = await getattr(self.inner, method)(prompt=prompt, **kwargs)
+        self._record(key, method, prompt, response, (time.perf_counter() - start) * 1000)
+        return response
+
+    async def _stream(self, method: str, prompt: str, default_temperature: float, **kwargs) -> AsyncIterator[str]:
+        key = self._key(method, prompt, kwargs, default_temperature)
+        if self.mode == "replay":
+            entry = self._lookup(key, method, prompt)
+            text = entry["response"] if isinstance(entry["response"], str) else json.dumps(entry["response"])
+            chunks = [text[i:i + REPLAY_CHUNK_CHARS] for i in range(0, len(text), REPLAY_CHUNK_CHARS)] or [""]
+            # Spread the latency evenly over the chunks
+            delay = self._replay_delay(entry) / len(chunks)
+            for chunk in chunks:
+                await asyncio.sleep(delay)
+                yield chunk
+            return
+
+        start = time.perf_counter()
+        parts = []
+        async for chunk in getattr(self.inner, method)(prompt=prompt, **kwargs):
+            parts.append(chunk)
+            yield chunk
+        text = "".join(parts)
+        response: Any = text
+        if "json" in method:
+            try:
+                response = json.loads(text)
+            except json.JSONDecodeError:
+                # generate_json shares this recording and must replay a dict, not raw text
+                print(f"[CASSETTE] Streamed {method} response is not valid JSON, not recorded")
+                return
+        self._record(key, method, prompt, response, (time.perf_counter() - start) * 1000)
+
+    async def generate(self, prompt: str, **kwargs) -> str:
+        return await self._call("generate", prompt, 0.7, **kwargs)
+
+    async def generate_json(self, prompt: str, **kwargs) -> Dict[str, Any]:
+        return await self._call("generate_json", prompt, 0.0, **kwargs)
+
+    async def generate_stream(self, prompt: str, **kwargs) -> AsyncIterator[str]:
+        async for chunk in self._stream("generate_stream", prompt, 0.7, **kwargs):
+            yield chunk
+
+    async def generate_json_stream(self, prompt: str, **kwargs) -> AsyncIterator[str]:
+        async for chunk in self._stream("generate_json_stream", prompt, 0.0, **kwargs):
+            yield chunk
+
+    async def check_health(self) -> bool:
+        if self.mode == "replay":
+            return True
+        return await self.inner.check_health()
+
+    async def list_models(self) -> list:
+        if self.mode == "replay":
+            return ["cassette"]
+        return await self.inner.list_models()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "mode": self.mode, "path": self.path, "exchanges": len(self._entries)}
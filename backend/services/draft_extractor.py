@@ -0,0 +1,160 @@
+"""
+Draft Schema Extractor
+Rule-based speculative schema built from the real-time validator's detections
+"""
+
+from typing import Any, Dict, List, Optional
+from .realtime_validator import RealtimeValidator
+
+
+# Entity keywords that name the concept, not a table
+GENERIC_ENTITY_WORDS = {"table", "tables", "entity", "entities"}
+
+# Attribute keyword -> column it implies (unlisted keywords such as "with" add none)
+ATTRIBUTE_COLUMNS: Dict[str, Dict[str, Any]] = {
+    "name": {"name": "name", "data_type": "VARCHAR", "length": 255, "is_nullable": False},
+    "title": {"name": "title", "data_type": "VARCHAR", "length": 255, "is_nullable": False},
+    "description": {"name": "description", "data_type": "TEXT"},
+    "email": {"name": "email", "data_type": "VARCHAR", "length": 255, "is_unique": True},
+    "phone": {"name": "phone", "data_type": "VARCHAR", "length": 20},
+    "address": {"name": "address", "data_type": "VARCHAR", "length": 255},
+    "date": {"name": "date", "data_type": "DATE"},
+    "time": {"name": "time", "data_type": "TIME"},
+    "timestamp": {"name": "created_at", "data_type": "TIMESTAMP"},
+    "created": {"name": "created_at", "data_type": "TIMESTAMP"},
+    "updated": {"name": "updated_at", "data_type": "TIMESTAMP"},
+    "price": {"name": "price", "data_type": "DECIMAL"},
+    "cost": {"name": "cost", "data_type": "DECIMAL"},
+    "amount": {"name": "amount", "data_type": "DECIMAL"},
+    "total": {"name": "total", "data_type": "DECIMAL"},
+    "quantity": {"name": "quantity", "data_type": "INTEGER"},
+    "status": {"name": "status", "data_type": "VARCHAR", "length": 50},
+    "state": {"name": "state", "data_type": "VARCHAR", "length": 50},
+    "active": {"name": "is_active", "data_type": "BOOLEAN"},
+    "inactive": {"name": "is_active", "data_type": "BOOLEAN"},
+    "enabled": {"name": "is_enabled", "data_type": "BOOLEAN"},
+    "disabled": {"name": "is_enabled", "data_type": "BOOLEAN"},
+}
+
+# Relationship cue -> cardinality from the entity before it to the one after it
+EXPLICIT_CARDINALITIES = {
+    "one-to-many": "one_to_many",
+    "many-to-one": "many_to_one",
+    "one-to-one": "one_to_one",
+    "many-to-many": "many_to_many",
+}
+
+
+def entity_name(word: str) -> Optional[str]:
+    """'categories' -> 'Category', 'books' -> 'Book' (None for generic words)"""
+    word = word.lower()
+    if word in GENERIC_ENTITY_WORDS:
+        return None
+    if word.endswith("ies"):
+        word = word[:-3] + "y"
+    elif word.endswith("s") and not word.endswith("ss"):
+        word = word[:-1]
+    return word.capitalize()
+
+
+def _cue_cardinality(cue: str) -> str:
+    cue = " ".join(cue.lower().split())
+    if cue in EXPLICIT_CARDINALITIES:
+        return EXPLICIT_CARDINALITIES[cue]
+    if cue.startswith("belong"):
+        return "many_to_one"
+    return "one_to_many"
+
+
+class DraftSchemaExtractor:
+    """
+    Turns keyword detections into a draft extraction structure, without an LLM
+
+    Walks the validator's highlights in text order: entity keywords become
+    entities with an `id` primary key, attribute keywords become columns of
+    the entity mentioned last, and a relationship cue between two entity
+    mentions in the same sentence links them, adding an `<entity>_id`
+    foreign key on the "many" side. The result has the same shape as
+    EntityExtractor.extract_structure() and is meant to be shown until the
+    LLM's structure replaces it.
+    """
+
+    def __init__(self, validator: Optional[RealtimeValidator] = None):
+        self.validator = validator or RealtimeValidator()
+
+    def extract(self, prompt: str) -> Dict[str, Any]:
+        highlights = self.validator.analyze_prompt_realtime(prompt)["highlights"]
+
+        entities: Dict[str, Dict[str, Any]] = {}
+        relationships: List[Dict[str, Any]] = []
+        linked = set()  # (source, target) pairs already in relationships
+        current: Optional[str] = None
+        pending: Optional[Dict[str, Any]] = None
+
+        for highlight in highlights:
+            kind, text = highlight["type"], highlight["text"]
+
+            if pending and "." in prompt[pending["end"]:highlight["start"]]:
+                # Cues do not reach across sentences
+                pending = None
+
+            if kind == "entity":
+                name = entity_name(text)
+                if name is None:
+                    continue
+                if name not in entities:
+                    entities[name] = self._new_entity(name)
+                if pending and pending["source"] != name and (pending["source"], name) not in linked:
+                    relationships.append(self._link(entities, pending["source"], name, pending["cardinality"]))
+                    linked.add((pending["source"], name))
+                pending = None
+                current = name
+
+            elif kind == "relationship":
+                cardinality = _cue_cardinality(text)
+                if pending:
+                    # "has ... one-to-many ..." refines the open cue
+                    if " ".join(text.lower().split()) in EXPLICIT_CARDINALITIES:
+                        pending["cardinality"] = cardinality
+                    pending["end"] = highlight["end"]
+                elif current:
+                    pending = {"source": current, "cardinality": cardinality, "end": highlight["end"]}
+
+            elif kind == "attribute":
+                column = ATTRIBUTE_COLUMNS.get(text.lower())
+                target = current or next(iter(entities), None)
+                if column and target:
+                    self._add_attribute(entities[target], column)
+
+        return {"entities": list(entities.values()), "relationships": relationships}
+
+    @staticmethod
+    def _new_entity(name: str) -> Dict[str, Any]:
+        return {
+            "name": name,
+            "description": "Draft (detected locally)",
+            "attributes": [{"name": "id", "data_type": "INTEGER", "is_primary_key": True, "is_nullable": False}],
+        }
+
+    @staticmethod
+    def _add_attribute(entity: Dict[str, Any], column: Dict[str, Any]):
+        if all(attr["name"] != column["name"] for attr in entity["attributes"]):
+            entity["attributes"].append(dict(column))
+
+    def _link(self, entities: Dict[str, Dict[str, Any]], source: str, target: str, cardinality: str) -> Dict[str, Any]:
+        relationship = {
+            "name": f"{source.lower()}_{target.lower()}",
+            "source_entity": source,
+            "target_entity": target,
+            "cardinality": cardinality,
+        }
+        # The foreign key lives on the "many" side (the target of a 1:1)
+        if cardinality == "many_to_one":
+            key = f"{target.lower()}_id"
+            self._add_attribute(entities[source], {"name": key, "data_type": "INTEGER", "is_foreign_key": True})
+            relationship["source_foreign_key"] = key
+        elif cardinality in ("one_to_many", "one_to_one"):
+            key = f"{source.lower()}_id"
+            self._add_attribute(entities[target], {"name": key, "data_type": "INTEGER", "is_foreign_key": True})
+            relationship["target_foreign_key"] = key
+        return relationship
@@ -3,48 +3,142 @@ Entity Extraction Service
 Extracts entities, attributes, and relationships from prompts
 """
 
-from typing import Dict, Any, List
-from .llm_service import LLMService
-from .fast_llm_service import FastLLMService
+from typing import Dict, Any, List, AsyncIterator, Optional
+from collections import OrderedDict
+from .llm_provider_router import create_llm_service
+from .json_stream_parser import IncrementalJSONParser
+from .token_budget import estimate_extraction_budget
+from .llm_scheduler import Priority
+from .prompt_prefix import split_template
+from .model_tier_router import get_model_tier_router
+from models.llm_schemas import ExtractionOutput
 from config import settings
+import asyncio
 import os
+import time
+
+
+class StructureSession:
+    """
+    Memoized extraction result for a single prompt
+
+    All accessors read from one extract_structure() call, so asking for
+    entities, relationships and attributes of the same prompt costs one
+    LLM generation. Empty results (failed extractions) are not memoized.
+    """
+
+    def __init__(self, extractor: "EntityExtractor", prompt: str):
+        self.extractor = extractor
+        self.prompt = prompt
+        self._structure: Optional[Dict[str, Any]] = None
+        self._lock = asyncio.Lock()
+
+    def seed(self, structure: Dict[str, Any]):
+        """Record a structure obtained elsewhere (e.g. from a stream)"""
+        if structure.get("entities"):
+            self._structure = structure
+
+    async def structure(self) -> Dict[str, Any]:
+        """Extract once and return the memoized structure"""
+        if self._structure is not None:
+            return self._structure
+
+        async with self._lock:
+            if self._structure is None:
+                # extract_structure seeds this session on success
+                result = await self.extractor.extract_structure(self.prompt)
+                if self._structure is None:
+                    return result
+            return self._structure
+
+    async def entities(self) -> List[Dict[str, Any]]:
+        return (await self.structure()).get("entities", [])
+
+    async def relationships(self) -> List[Dict[str, Any]]:
+        return (await self.structure()).get("relationships", [])
+
+    async def attributes(self, entity_name: str) -> List[Dict[str, Any]]:
+        """Attributes of the named entity (case-insensitive), or []"""
+        for entity in await self.entities():
+            if entity.get("name", "").lower() == entity_name.lower():
+                return entity.get("attributes", [])
+        return []
 
 
 class EntityExtractor:
     """Service for extracting database structure from natural language"""
 
     def __init__(self):
-        # Use fast Groq LLM if configured, otherwise fallback to slow Ollama
+        # Groq when configured, else Ollama; fallback providers are opt-in (see LLM_PROVIDERS)
+        self.llm_service = create_llm_service()
         if settings.USE_GROQ and settings.GROQ_API_KEY:
-            self.llm_service = FastLLMService()
             print("[INFO] Using FAST Groq LLM for entity extraction!")
         else:
-            self.llm_service = LLMService()
             print("[WARN] Using slow Ollama LLM - consider setting GROQ_API_KEY for speed")
 
         # Load extraction prompt template
         prompts_dir = os.path.join(os.path.dirname(__file__), "..", "prompts")
         with open(os.path.join(prompts_dir, "extraction_prompt.txt"), "r") as f:
             self.extraction_template = f.read()
+        # Static preamble (reused by the LLM layer) and the per-request part
+        self.extraction_prefix, self.extraction_body = split_template(self.extraction_template)
+
+        # Small model for simple prompts, large one for complex schemas (None = always large)
+        self.tier_router = get_model_tier_router()
 
-    async def extract_structure(self, prompt: str) -> Dict[str, Any]:
+        # Per-prompt memoized extraction results, most recent last
+        self._sessions: "OrderedDict[str, StructureSession]" = OrderedDict()
+        self.max_sessions = 64
+
+    def session(self, prompt: str) -> StructureSession:
+        """Get (or start) the structure session for a prompt"""
+        session = self._sessions.get(prompt)
+        if session is None:
+            session = StructureSession(self, prompt)
+            self._sessions[prompt] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        else:
+            self._sessions.move_to_end(prompt)
+        return session
+
+    async def extract_structure(
+        self,
+        prompt: str,
+        priority: Priority = Priority.NORMAL,
+        session_id: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
         Extract complete database structure from prompt
 
-        Returns both entities and relationships in one call
+        Returns both entities and relationships in one call. priority is
+        the scheduling class of the LLM call (BATCH for bulk jobs). With a
+        session_id, the prompt is treated as a follow-up (e.g. a schema
+        change) in that session's ongoing LLM conversation. The model tier
+        is chosen from the prompt's complexity (see ModelTierRouter).
         """
-        # Format the extraction prompt
-        formatted_prompt = self.extraction_template.format(prompt=prompt)
+        # Only the per-request body is formatted; the static prefix is sent as is
+        body = self.extraction_body.format(prompt=prompt)
 
         print(f"\n[EXTRACTION] Processing prompt: {prompt[:100]}...")
-        print(f"[EXTRACTION] Formatted prompt length: {len(formatted_prompt)} chars")
+        print(f"[EXTRACTION] Formatted prompt length: {len(self.extraction_prefix) + len(body)} chars")
+        decision = self._route(prompt, session_id)
+        start = time.perf_counter()
 
         # Get JSON response from LLM
         try:
             result = await self.llm_service.generate_json(
-                prompt=formatted_prompt,
-                model=None  # Use primary model
+                prompt=body,
+                prefix=self.extraction_prefix,
+                model=None,  # Chosen by tier
+                max_tokens=estimate_extraction_budget(prompt),
+                priority=priority,
+                session_id=session_id,
+                schema=ExtractionOutput if settings.LLM_STRUCTURED_OUTPUT else None,
+                tier=decision["tier"] if decision else None,
+                cache_requires="entities"  # An empty extraction is a failure, not an answer
             )
+            self._record_tier(decision, start, isinstance(result, dict) and bool(result.get("entities")))
 
             print(f"[EXTRACTION] LLM returned result type: {type(result)}")
             print(f"[EXTRACTION] Result keys: {result.keys() if isinstance(result, dict) else 'NOT A DICT'}")
@@ -56,11 +150,15 @@ class EntityExtractor:
 
                 if entity_count > 0:
                     print(f"[EXTRACTION] First entity: {result['entities'][0].get('name', 'UNNAMED')}")
+                    # A session follow-up depends on earlier turns, not just on prompt
+                    if session_id is None:
+                        self.session(prompt).seed(result)
             else:
                 print(f"[EXTRACTION] ERROR: Result is not a dict: {result}")
 
             return result
         except Exception as e:
+            self._record_tier(decision, start, False)
             # Return empty structure if extraction fails
             print(f"[EXTRACTION] FATAL ERROR: {str(e)}")
             print(f"[EXTRACTION] Error type: {type(e).__name__}")
@@ -69,9 +167,73 @@ class EntityExtractor:
 
             return {
                 "entities": [],
-                "relationships": []
+                "relationships": [],
+                "error": str(e)
             }
 
+    def _route(self, prompt: str, session_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Tier decision for an extraction prompt (None when tiering is off)"""
+        if self.tier_router is None:
+            return None
+        decision = self.tier_router.route(prompt, session_id)
+        print(f"[EXTRACTION] Model tier: {decision['tier'].value} (complexity {decision['complexity']}, "
+              f"decided in {decision['decision_ms']} ms)")
+        return decision
+
+    def _record_tier(self, decision: Optional[Dict[str, Any]], start: float, ok: bool):
+        if decision is not None:
+            self.tier_router.record_call(decision, (time.perf_counter() - start) * 1000, ok)
+
+    async def extract_structure_stream(self, prompt: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Extract database structure while the LLM is still generating
+
+        Yields events as soon as each object closes in the token stream:
+            {"type": "entity", "data": {...}}
+            {"type": "relationship", "data": {...}}
+            {"type": "complete", "data": {"entities": [...], "relationships": [...]}}
+
+        If the stream fails, the last event is instead
+            {"type": "error", "data": {"message": "...", "partial": {"entities": [...], "relationships": [...]}}}
+        and the partial structure is not memoized for the prompt.
+        """
+        parser = IncrementalJSONParser(collections=("entities", "relationships"))
+
+        print(f"\n[EXTRACTION] Streaming prompt: {prompt[:100]}...")
+        decision = self._route(prompt)
+        start = time.perf_counter()
+
+        error: Optional[Exception] = None
+        try:
+            async for chunk in self.llm_service.generate_json_stream(
+                prompt=self.extraction_body.format(prompt=prompt),
+                prefix=self.extraction_prefix,
+                max_tokens=estimate_extraction_budget(prompt),
+                tier=decision["tier"] if decision else None
+            ):
+                for collection, item in parser.feed(chunk):
+                    event_type = "entity" if collection == "entities" else "relationship"
+                    yield {"type": event_type, "data": item}
+        except Exception as e:
+            # Keep whatever closed before the failure
+            print(f"[EXTRACTION] STREAM ERROR: {str(e)}")
+            error = e
+
+        result = parser.result()
+        self._record_tier(decision, start, error is None and bool(result.get("entities")))
+        structure = {
+            "entities": result.get("entities", []),
+            "relationships": result.get("relationships", [])
+        }
+        if error is not None:
+            yield {"type": "error", "data": {"message": str(error), "partial": structure}}
+            return
+
+        print(f"[EXTRACTION] Stream finished: {len(structure['entities'])} entities, "
+              f"{len(structure['relationships'])} relationships")
+        self.session(prompt).seed(structure)
+        yield {"type": "complete", "data": structure}
+
     async def extract_entities(self, prompt: str) -> List[Dict[str, Any]]:
         """
         Extract entities from prompt
@@ -87,8 +249,7 @@ class EntityExtractor:
                 }
             ]
         """
-        structure = await self.extract_structure(prompt)
-        return structure.get("entities", [])
+        return await self.session(prompt).entities()
 
     async def extract_relationships(
         self,
@@ -110,8 +271,7 @@ class EntityExtractor:
                 }
             ]
         """
-        structure = await self.extract_structure(prompt)
-        return structure.get("relationships", [])
+        return await self.session(prompt).relationships()
 
     async def infer_attributes(
         self,
@@ -122,7 +282,7 @@ class EntityExtractor:
         Infer typical attributes for an entity
 
         Phase 1 Implementation
+        Reads the attributes the extraction template already inferred for
+        entity_name, reusing the structure session of the context prompt.
         """
-        # This is handled by the extraction template
-        # which already includes intelligent attribute inference
-        return []
+        return await self.session(context).attributes(entity_name)
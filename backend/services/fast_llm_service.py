@@ -3,10 +3,19 @@ Fast LLM Service using Groq API
 Super fast responses (1-2 seconds instead of 5+ minutes!)
 """
 
-from groq import Groq
-from typing import Optional, Dict, Any
+from groq import AsyncGroq
+from typing import Optional, Dict, Any, AsyncIterator, List, Tuple, Type
+from pydantic import BaseModel
 import json
-import re
+from config import settings
+from .llm_cache import LLMResponseCache, get_llm_cache, is_cacheable
+from .request_coalescer import get_request_coalescer
+from .json_repair import parse_llm_json, content_repaired, JSONRepairError
+from .token_budget import estimate_tokens, estimate_output_budget, generate_with_continuation
+from .llm_scheduler import Priority, get_llm_scheduler
+from .prompt_prefix import get_conversation_store, history_messages
+from .structured_output import parse_structured, validate_structured
+from .model_tier_router import ModelTier
 
 
 class FastLLMService:
@@ -14,15 +23,24 @@ class FastLLMService:
 
     def __init__(self):
         # Get API key from settings (not os.environ!)
-        from config import settings
         self.api_key = settings.GROQ_API_KEY
         if not self.api_key:
             raise ValueError("GROQ_API_KEY not found in settings. Please set it in .env file")
 
-        self.client = Groq(api_key=self.api_key)
-        # Using smaller/faster Groq models to avoid rate limits
-        self.primary_model = "llama-3.1-8b-instant"  # Faster, uses less tokens
-        self.secondary_model = "llama-3.1-8b-instant"  # Use same for consistency
+        # Async client so Groq calls never block the event loop; the
+        # scheduler owns 429 retries, so the SDK's own retries are off
+        self.client = AsyncGroq(api_key=self.api_key, max_retries=0)
+        # Concurrency cap, RPM/TPM buckets and priority queue for Groq calls
+        self.scheduler = get_llm_scheduler("groq")
+        # Large model for complex schemas, small one for simple prompts (see ModelTierRouter)
+        self.primary_model = settings.GROQ_MODEL_PRIMARY
+        self.secondary_model = settings.GROQ_MODEL_SECONDARY
+        self.cache = get_llm_cache()
+        self.coalescer = get_request_coalescer()
+
+    def model_for_tier(self, tier: Optional[ModelTier]) -> str:
+        """Model serving a tier (primary_model when no tier is given)"""
+        return self.secondary_model if tier == ModelTier.SMALL else self.primary_model
 
     async def generate(
         self,
@@ -30,7 +48,9 @@ class FastLLMService:
         model: Optional[str] = None,
         system_prompt: Optional[str] = None,
         temperature: float = 0.7,
-        max_tokens: Optional[int] = None
+        max_tokens: Optional[int] = None,
+        priority: Priority = Priority.NORMAL,
+        tier: Optional[ModelTier] = None
     ) -> str:
         """
         Generate text using Groq (SUPER FAST - 1-2 seconds!)
@@ -41,36 +61,205 @@ class FastLLMService:
             system_prompt: Optional system prompt
             temperature: Sampling temperature (0.0-2.0)
             max_tokens: Maximum tokens to generate
+            priority: Scheduling class of the call
+            tier: Model tier used when model is not given
 
         Returns:
             Generated text
         """
+        text, _ = await self._complete(
+            prompt, model or self.model_for_tier(tier), system_prompt, temperature, max_tokens, priority
+        )
+        return text
+
+    async def _complete(
+        self,
+        prompt: str,
+        model: Optional[str],
+        system_prompt: Optional[str],
+        temperature: float,
+        max_tokens: Optional[int],
+        priority: Priority = Priority.NORMAL,
+        history: Optional[List[Dict[str, str]]] = None,
+        response_format: Optional[Dict[str, str]] = None
+    ) -> Tuple[str, bool]:
+        """Run one completion after optional prior turns; returns (text, truncated)"""
         if model is None:
             model = self.primary_model
 
         messages = []
         if system_prompt:
             messages.append({"role": "system", "content": system_prompt})
+        messages.extend(history_messages(history))
         messages.append({"role": "user", "content": prompt})
 
+        max_tokens = max_tokens or settings.LLM_DEFAULT_JSON_TOKENS
+        extra = {"response_format": response_format} if response_format else {}
         try:
-            response = self.client.chat.completions.create(
-                model=model,
-                messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens or 1024,
-                top_p=1,
-                stream=False
+            response = await self.scheduler.run(
+                lambda: self.client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    top_p=1,
+                    stream=False,
+                    **extra
+                ),
+                estimate_tokens(prompt + (system_prompt or "") + "".join(m["content"] for m in history or [])) + max_tokens,
+                priority,
+                usage=lambda response: getattr(getattr(response, "usage", None), "total_tokens", None)
             )
-            return response.choices[0].message.content
+            choice = response.choices[0]
+            return choice.message.content or "", choice.finish_reason == "length"
+        except Exception as e:
+            raise Exception(f"Groq API error: {str(e)}")
+
+    async def generate_stream(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        priority: Priority = Priority.NORMAL,
+        tier: Optional[ModelTier] = None,
+        capture: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream generated text from Groq token by token
+
+        Same arguments as generate(); yields text deltas as they arrive.
+        capture["truncated"] is set once Groq reports why the stream
+        finished, so it stays unset if the stream was cut off.
+        """
+        if model is None:
+            model = self.model_for_tier(tier)
+
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+
+        max_tokens = max_tokens or settings.LLM_DEFAULT_JSON_TOKENS
+        prompt_tokens = estimate_tokens(prompt + (system_prompt or ""))
+        try:
+            # The slot is held until the stream is fully consumed
+            async with self.scheduler.slot(prompt_tokens + max_tokens, priority) as reservation:
+                generated = []
+                try:
+                    stream = await self.client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        top_p=1,
+                        stream=True
+                    )
+                    async for chunk in stream:
+                        delta = chunk.choices[0].delta.content if chunk.choices else None
+                        if delta:
+                            generated.append(delta)
+                            yield delta
+                        finish_reason = chunk.choices[0].finish_reason if chunk.choices else None
+                        if finish_reason and capture is not None:
+                            capture["truncated"] = finish_reason == "length"
+                        # Groq reports usage on the last chunk
+                        usage = getattr(getattr(chunk, "x_groq", None), "usage", None)
+                        if usage is not None:
+                            reservation.actual_tokens = usage.total_tokens
+                finally:
+                    if reservation.actual_tokens is None:
+                        # No usage report (e.g. the stream was cut off): charge what was received
+                        reservation.actual_tokens = prompt_tokens + estimate_tokens("".join(generated))
         except Exception as e:
             raise Exception(f"Groq API error: {str(e)}")
 
+    @staticmethod
+    def _system_with_prefix(system_prompt: Optional[str], prefix: Optional[str]) -> Optional[str]:
+        """
+        Put a static prompt prefix at the start of the conversation
+
+        Groq caches prompt prefixes it has already processed; keeping the
+        unchanging template text in the system message makes every request
+        share an identical prefix.
+        """
+        if not prefix:
+            return system_prompt
+        return f"{system_prompt}\n\n{prefix}" if system_prompt else prefix
+
+    async def generate_json_stream(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        system_prompt: Optional[str] = None,
+        use_cache: bool = True,
+        max_tokens: Optional[int] = None,
+        priority: Priority = Priority.NORMAL,
+        prefix: Optional[str] = None,
+        tier: Optional[ModelTier] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream the raw text of a JSON response
+
+        Mirrors generate_json(): a cached response is replayed as a single
+        chunk. A fresh one is cached only if the stream finished on its own
+        (not cut off or truncated) and the raw text is valid JSON.
+        """
+        json_instruction = "\n\nIMPORTANT: Return ONLY valid JSON with proper syntax. Ensure all commas, brackets, and quotes are correct."
+        full_prompt = prompt + json_instruction
+
+        if model is None:
+            model = self.model_for_tier(tier)
+
+        temperature = 0.1
+        cache_key = None
+        if use_cache and self.cache is not None:
+            cache_key = self.cache.make_key((prefix or "") + prompt, model, temperature, system_prompt, provider="groq")
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                yield json.dumps(cached)
+                return
+
+        chunks = []
+        finish: Dict[str, Any] = {}
+        async for delta in self.generate_stream(
+            prompt=full_prompt,
+            model=model,
+            system_prompt=self._system_with_prefix(system_prompt, prefix),
+            temperature=temperature,
+            max_tokens=max_tokens or estimate_output_budget(full_prompt),
+            priority=priority,
+            capture=finish
+        ):
+            chunks.append(delta)
+            yield delta
+
+        if cache_key is not None:
+            if finish.get("truncated") is not False:
+                print(f"[FAST_LLM] Streamed response not cached: stream did not finish normally")
+                return
+            try:
+                parsed = json.loads("".join(chunks))
+            except json.JSONDecodeError as e:
+                print(f"[FAST_LLM] Streamed response not cached: {str(e)}")
+                return
+            if is_cacheable(parsed, True):
+                self.cache.set(cache_key, parsed)
+
     async def generate_json(
         self,
         prompt: str,
         model: Optional[str] = None,
-        system_prompt: Optional[str] = None
+        system_prompt: Optional[str] = None,
+        use_cache: bool = True,
+        max_tokens: Optional[int] = None,
+        priority: Priority = Priority.NORMAL,
+        prefix: Optional[str] = None,
+        session_id: Optional[str] = None,
+        schema: Optional[Type[BaseModel]] = None,
+        tier: Optional[ModelTier] = None,
+        cache_requires: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Generate structured JSON output (FAST!)
@@ -79,6 +268,21 @@ class FastLLMService:
             prompt: The prompt requesting JSON output
             model: Model to use
             system_prompt: Optional system prompt
+            use_cache: Serve repeated prompts from the response cache
+            max_tokens: Output budget per call (estimated from the prompt if
+                omitted); truncated responses are continued, not dropped
+            priority: Scheduling class (INTERACTIVE calls jump the queue)
+            prefix: Static text that precedes prompt (e.g. a template
+                preamble); sent first so the provider can reuse it
+            session_id: Continue this session's conversation; the exchange
+                is recorded for the session's next call
+            schema: Pydantic model the answer must match; switches Groq to
+                JSON mode and validates the response in one pass (no
+                salvage, no continuation)
+            tier: Model tier used when model is not given
+            cache_requires: Only cache answers where this key is non-empty
+                (e.g. "entities"); repaired or still truncated answers are
+                never cached
 
         Returns:
             Parsed JSON dictionary
@@ -87,83 +291,161 @@ class FastLLMService:
         json_instruction = "\n\nIMPORTANT: Return ONLY valid JSON with proper syntax. Ensure all commas, brackets, and quotes are correct."
         full_prompt = prompt + json_instruction
 
-        # Use PRIMARY model (70B) for complex JSON - more reliable
+        # Large model unless the caller routed the request to the small tier
         if model is None:
-            model = self.primary_model  # Use 70B for better accuracy
+            model = self.model_for_tier(tier)
 
-        # Generate response with higher token limit
-        response = await self.generate(
-            prompt=full_prompt,
-            model=model,
-            system_prompt=system_prompt,
-            temperature=0.1,  # Very low temperature for consistent JSON
-            max_tokens=8000  # Increased from 2000 to handle complex schemas
+        temperature = 0.1  # Very low temperature for consistent JSON
+
+        # A session's follow-up continues its conversation (which already holds the prefix)
+        store = get_conversation_store()
+        session_key = store.session_key("groq", session_id) if session_id else None
+        conversation = store.get(session_key) if session_key else None
+        if conversation:
+            system, history = conversation["system"], conversation["turns"]
+        else:
+            system, history = self._system_with_prefix(system_prompt, prefix), []
+
+        def remember(parsed: Dict[str, Any]):
+            if session_key:
+                store.set(session_key, {"system": system, "turns": history + [
+                    {"role": "user", "content": full_prompt},
+                    {"role": "assistant", "content": json.dumps(parsed)},
+                ]})
+
+        request_key = LLMResponseCache.make_key(
+            (prefix or "") + prompt, model, temperature, system_prompt, provider="groq",
+            **({"schema": schema.__name__} if schema else {})
+        )
+        # Answers that depend on earlier turns are not reusable across sessions
+        use_cache = use_cache and self.cache is not None and not history
+        if use_cache:
+            cached = self.cache.get(request_key)
+            if cached is not None:
+                print(f"[FAST_LLM] Cache hit")
+                remember(cached)
+                return cached
+
+        async def produce() -> Dict[str, Any]:
+            if schema is not None:
+                parsed, clean = await self._generate_structured_json(
+                    full_prompt, model, system, temperature, max_tokens, priority, history, schema
+                )
+            else:
+                parsed, clean = await self._generate_and_parse_json(
+                    full_prompt, model, system, temperature, max_tokens, priority, history
+                )
+            if use_cache and is_cacheable(parsed, clean, cache_requires):
+                self.cache.set(request_key, parsed)
+            remember(parsed)
+            return parsed
+
+        # Identical concurrent requests share one Groq call
+        coalesce_key = f"{request_key}:{session_id}" if session_id else request_key
+        return await self.coalescer.run(coalesce_key, produce)
+
+    async def _generate_and_parse_json(
+        self,
+        full_prompt: str,
+        model: str,
+        system_prompt: Optional[str],
+        temperature: float,
+        max_tokens: Optional[int] = None,
+        priority: Priority = Priority.NORMAL,
+        history: Optional[List[Dict[str, str]]] = None
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        Run the generation and salvage JSON from the raw response
+
+        Returns (parsed, clean): clean is False if the JSON had to be
+        repaired or the response was still truncated.
+        """
+        budget = max_tokens or estimate_output_budget(full_prompt)
+        print(f"[FAST_LLM] Output budget: {budget} tokens")
+
+        response, truncated = await generate_with_continuation(
+            lambda prompt, tokens: self._complete(prompt, model, system_prompt, temperature, tokens, priority, history),
+            full_prompt,
+            budget
         )
+        parsed, clean = self._parse_json_response(response)
+        return parsed, clean and not truncated
 
+    async def _generate_structured_json(
+        self,
+        full_prompt: str,
+        model: str,
+        system_prompt: Optional[str],
+        temperature: float,
+        max_tokens: Optional[int],
+        priority: Priority,
+        history: Optional[List[Dict[str, str]]],
+        schema: Type[BaseModel]
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        Run one JSON-mode generation and validate it against schema
+
+        Groq's JSON mode guarantees syntactically valid JSON, so the
+        response is validated directly. JSON mode cannot continue a
+        truncated response, so one is finished through the free-form
+        continuation and repair path, then validated against schema.
+        Returns (parsed, clean) like _generate_and_parse_json().
+        """
+        budget = max_tokens or estimate_output_budget(full_prompt)
+        response, truncated = await self._complete(
+            full_prompt, model, system_prompt, temperature, budget, priority, history,
+            response_format={"type": "json_object"}
+        )
+        if truncated:
+            print(f"[FAST_LLM] Structured response truncated at {budget} tokens, continuing without JSON mode")
+            response, truncated = await generate_with_continuation(
+                lambda prompt, tokens: self._complete(prompt, model, system_prompt, temperature, tokens, priority, history),
+                full_prompt,
+                budget,
+                first=(response, truncated)
+            )
+            parsed, clean = self._parse_json_response(response)
+            return validate_structured(parsed, schema), clean and not truncated
+        parsed = parse_structured(response, schema)
+        print(f"[FAST_LLM] SUCCESS: Structured {schema.__name__} response ({len(response)} chars)")
+        return parsed, True
+
+    def _parse_json_response(self, response: str) -> Tuple[Dict[str, Any], bool]:
+        """
+        Parse JSON from a raw LLM response, salvaging it if needed
+
+        Returns (parsed, clean): clean is False if the JSON itself had to be
+        repaired (text around a valid object may be stripped).
+        """
         print(f"[FAST_LLM] Raw LLM response length: {len(response)} chars")
         print(f"[FAST_LLM] First 500 chars: {response[:500]}")
         print(f"[FAST_LLM] Last 200 chars: {response[-200:]}")
 
         # Extract JSON from response (in case LLM adds extra text)
         try:
-            # Try to parse directly first
-            parsed = json.loads(response)
-            print(f"[FAST_LLM] SUCCESS: Parsed JSON directly")
-            return parsed
-        except json.JSONDecodeError as e:
-            print(f"[FAST_LLM] ERROR: Direct JSON parse failed: {str(e)}")
-            print(f"[FAST_LLM] Error at position: {e.pos}")
-
-            # Try to find JSON in the response using regex
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
-            if json_match:
-                json_str = json_match.group()
-                try:
-                    parsed = json.loads(json_str)
-                    print(f"[FAST_LLM] SUCCESS: Extracted JSON with regex")
-                    return parsed
-                except json.JSONDecodeError as e2:
-                    print(f"[FAST_LLM] ERROR: Regex-extracted JSON also invalid: {str(e2)}")
-
-                    # Try to fix common JSON errors
-                    print(f"[FAST_LLM] Attempting to fix JSON...")
-                    fixed_json = self._try_fix_json(json_str)
-                    if fixed_json:
-                        print(f"[FAST_LLM] SUCCESS: Fixed and parsed JSON")
-                        return fixed_json
-                    else:
-                        print(f"[FAST_LLM] ERROR: Could not fix JSON")
-                        raise Exception(f"Failed to parse JSON. Error: {str(e)}")
-            else:
-                print(f"[FAST_LLM] ERROR: No JSON found in response")
-                raise Exception(f"Failed to parse JSON from LLM response: {response[:200]}")
-
-    def _try_fix_json(self, json_str: str) -> Optional[Dict[str, Any]]:
-        """
-        Attempt to fix common JSON syntax errors
-        """
-        try:
-            # Remove trailing commas before closing brackets/braces
-            fixed = re.sub(r',(\s*[}\]])', r'\1', json_str)
+            parsed, repairs = parse_llm_json(response)
+        except JSONRepairError as e:
+            print(f"[FAST_LLM] ERROR: {str(e)}")
+            raise Exception(f"Failed to parse JSON from LLM response: {response[:200]}")
 
-            # Try to parse the fixed version
-            return json.loads(fixed)
-        except:
-            return None
+        if repairs:
+            print(f"[FAST_LLM] SUCCESS: Parsed JSON after repairs: {', '.join(repairs)}")
+        else:
+            print(f"[FAST_LLM] SUCCESS: Parsed JSON directly")
+        return parsed, not content_repaired(repairs)
 
     async def check_health(self) -> bool:
         """
         Check if Groq API is accessible
 
+        Lists models instead of running a completion, so probing costs no
+        tokens and does not count against the completion rate limits.
+
         Returns:
             True if API is working
         """
         try:
-            response = self.client.chat.completions.create(
-                model=self.secondary_model,
-                messages=[{"role": "user", "content": "Hi"}],
-                max_tokens=5
-            )
+            await self.client.models.list()
             return True
         except Exception:
             return False
@@ -176,7 +458,7 @@ class FastLLMService:
             List of model names
         """
         return [
-            "llama-3.1-70b-versatile",
+            "llama-3.3-70b-versatile",
             "llama-3.1-8b-instant",
             "mixtral-8x7b-32768",
             "gemma2-9b-it"
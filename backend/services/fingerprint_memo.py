@@ -0,0 +1,83 @@
+"""
+Fingerprint Memo
+Bounded LRU caches of derived artifacts (SQL, diagram code, reports, sample data) keyed by metamodel fingerprint
+"""
+
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Hashable
+import threading
+
+
+class FingerprintMemo:
+    """
+    LRU cache for one kind of artifact
+
+    Keys start with a metamodel fingerprint (Metamodel.fingerprint()) and
+    add whatever else the output depends on (dialect, options, ...).
+    Values are returned as stored, so callers memoize immutable results
+    or copy mutable ones.
+    """
+
+    def __init__(self, name: str, max_entries: int = 256):
+        self.name = name
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+        }
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Cached value for key, or None"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return self._entries[key]
+            self.stats["misses"] += 1
+            return None
+
+    def set(self, key: Hashable, value: Any):
+        """Store value, evicting the least recently used entries beyond max_entries"""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def clear(self):
+        """Drop all entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and size"""
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+            }
+
+
+_memos: Dict[str, FingerprintMemo] = {}
+
+
+def get_fingerprint_memo(name: str) -> FingerprintMemo:
+    """Get the process-wide memo for one artifact kind (shared by all service instances)"""
+    from config import settings
+
+    if name not in _memos:
+        _memos[name] = FingerprintMemo(name, max_entries=settings.FINGERPRINT_MEMO_MAX_ENTRIES)
+    return _memos[name]
+
+
+def get_memo_stats() -> Dict[str, Any]:
+    """Stats of every memo created so far, by name"""
+    return {name: memo.get_stats() for name, memo in _memos.items()}
@@ -0,0 +1,162 @@
+"""
+Health Monitor
+Background probing of LLM providers and databases with a cached status
+"""
+
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from datetime import datetime, timezone
+import asyncio
+import time
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from config import settings
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class HealthMonitor:
+    """
+    Probes registered components on an interval and caches the outcome
+
+    Each probe is an async callable returning True when the component is
+    healthy; it is bounded by timeout and any exception counts as down.
+    Readers call snapshot(), which never touches the network.
+    """
+
+    def __init__(self, interval: float = 15.0, timeout: float = 5.0):
+        self.interval = interval
+        self.timeout = timeout
+        self._probes: Dict[str, tuple] = {}
+        self._status: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def register(self, name: str, kind: str, probe: Callable[[], Awaitable[bool]]):
+        """Add a component to probe ("llm" or "database" kind)"""
+        self._probes[name] = (kind, probe)
+        self._status[name] = {
+            "kind": kind,
+            "status": "unknown",
+            "latency_ms": None,
+            "last_checked": None,
+            "last_success": None,
+            "last_error": None,
+            "consecutive_failures": 0,
+        }
+
+    async def start(self):
+        """Start the background probe loop (first round runs immediately)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await self.probe_all()
+            await asyncio.sleep(self.interval)
+
+    async def probe_all(self):
+        """Probe every component concurrently and update the cache"""
+        await asyncio.gather(*(self._probe(name) for name in list(self._probes)))
+
+    async def _probe(self, name: str):
+        _, probe = self._probes[name]
+        status = self._status[name]
+
+        start = time.perf_counter()
+        try:
+            healthy = await asyncio.wait_for(probe(), timeout=self.timeout)
+            error = None if healthy else "probe reported unhealthy"
+        except asyncio.TimeoutError:
+            healthy, error = False, f"timed out after {self.timeout}s"
+        except Exception as e:
+            healthy, error = False, str(e)
+
+        status["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        status["last_checked"] = _now_iso()
+        if healthy:
+            status.update(status="online", last_success=status["last_checked"], last_error=None, consecutive_failures=0)
+        else:
+            status["status"] = "offline"
+            status["last_error"] = error
+            status["consecutive_failures"] += 1
+            if status["consecutive_failures"] == 1:
+                print(f"[HEALTH] {name} offline: {error}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Cached status of every component, grouped by kind"""
+        components = {name: dict(status) for name, status in self._status.items()}
+
+        def rollup(kind: str) -> str:
+            states = [s["status"] for s in components.values() if s["kind"] == kind]
+            if not states:
+                return "not_configured"
+            if "online" in states:
+                return "online"
+            return "unknown" if all(s == "unknown" for s in states) else "offline"
+
+        return {
+            "llm": rollup("llm"),
+            "database": rollup("database"),
+            "components": components,
+            "probe_interval_s": self.interval,
+        }
+
+
+def _redacted(url: str) -> str:
+    """Database URL without its password, used as component name"""
+    try:
+        return make_url(url).render_as_string(hide_password=True)
+    except Exception:
+        return url.split("@")[-1]
+
+
+def _database_probe(url: str) -> Callable[[], Awaitable[bool]]:
+    """SELECT 1 on a pooled engine, run in a worker thread"""
+    engine = create_engine(url, pool_pre_ping=True)
+
+    def check() -> bool:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1")).fetchone()
+        return True
+
+    async def probe() -> bool:
+        return await asyncio.to_thread(check)
+
+    return probe
+
+
+_monitor: Optional[HealthMonitor] = None
+
+
+def get_health_monitor() -> HealthMonitor:
+    """
+    Get the process-wide monitor
+
+    Registers every LLM provider of the shared router and each URL in
+    HEALTH_DATABASE_URLS on first use.
+    """
+    global _monitor
+    if _monitor is None:
+        from .llm_provider_router import create_llm_service
+
+        _monitor = HealthMonitor(settings.HEALTH_CHECK_INTERVAL, settings.HEALTH_CHECK_TIMEOUT)
+        for name, service in create_llm_service().services.items():
+            _monitor.register(name, "llm", service.check_health)
+
+        urls: List[str] = [u.strip() for u in settings.HEALTH_DATABASE_URLS.split(",") if u.strip()]
+        for url in urls:
+            try:
+                _monitor.register(_redacted(url), "database", _database_probe(url))
+            except Exception as e:
+                print(f"[HEALTH] WARN: Cannot probe database {_redacted(url)}: {str(e)}")
+    return _monitor
@@ -0,0 +1,220 @@
+"""
+Tolerant JSON Parser
+Single-pass extraction and repair of the JSON object in an LLM response
+"""
+
+from typing import Any, List, Tuple
+import json
+import re
+
+
+class JSONRepairError(ValueError):
+    """Raised when no JSON object can be recovered from a response"""
+
+
+_CLOSERS = {"{": "}", "[": "]"}
+_CONTROL_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}
+
+# Repairs that only drop text around an intact object
+_WRAPPER_REPAIRS = {
+    "stripped text around JSON object",
+    "stripped markdown fence",
+    "stripped leading text",
+    "ignored trailing text",
+}
+
+_STRING_RUN = re.compile(r'[^"\\\x00-\x1f]+')
+_PLAIN_RUN = re.compile(r'[^"{}\[\],:]+')
+
+
+def repair_json(text: str) -> Tuple[Any, List[str]]:
+    """
+    Recover the outermost JSON object from raw LLM output in O(n)
+
+    One left-to-right scan locates the first '{', copies the object while
+    tracking string and bracket state, and fixes common defects on the way:
+    leading/trailing chatter and markdown fences, trailing commas,
+    mismatched closing brackets, raw newlines inside strings, and
+    truncation (unterminated strings, partial literals, dangling keys,
+    unclosed brackets).
+
+    Returns:
+        (parsed_object, repairs) where repairs describes each fix applied
+
+    Raises:
+        JSONRepairError: if the text contains no recoverable object
+    """
+    start = text.find("{")
+    if start == -1:
+        raise JSONRepairError(f"No JSON object found in response: {text[:200]}")
+
+    repairs: List[str] = []
+    if text[:start].strip():
+        repairs.append("stripped markdown fence" if "```" in text[:start] else "stripped leading text")
+
+    # Output is built from text slices; runs of ordinary characters are
+    # copied with one regex match instead of char by char
+    out: List[str] = []
+    # Each frame: [opener, expecting_key]
+    stack: List[list] = []
+    in_string = False
+    scalar_start = -1  # index in out where the current bare literal began
+    end = len(text)
+
+    i = start
+    while i < end:
+        if in_string:
+            run = _STRING_RUN.match(text, i)
+            if run:
+                out.append(run.group())
+                i = run.end()
+                continue
+
+            char = text[i]
+            if char == '"':
+                in_string = False
+                out.append(char)
+            elif char == "\\":
+                out.append(text[i:i + 2])
+                i += 1
+            else:
+                out.append(_CONTROL_ESCAPES.get(char) or f"\\u{ord(char):04x}")
+                if "escaped control character in string" not in repairs:
+                    repairs.append("escaped control character in string")
+            i += 1
+            continue
+
+        char = text[i]
+        if char == '"':
+            in_string = True
+            scalar_start = -1
+            out.append(char)
+        elif char in "{[":
+            scalar_start = -1
+            stack.append([char, char == "{"])
+            out.append(char)
+        elif char in "}]":
+            scalar_start = -1
+            _drop_trailing_comma(out, repairs)
+            opener = stack.pop()[0]
+            expected = _CLOSERS[opener]
+            if char != expected:
+                repairs.append(f"replaced mismatched '{char}' with '{expected}'")
+            out.append(expected)
+            if not stack:
+                i += 1
+                break
+        elif char == ",":
+            scalar_start = -1
+            if stack[-1][0] == "{":
+                stack[-1][1] = True
+            out.append(char)
+        elif char == ":":
+            scalar_start = -1
+            stack[-1][1] = False
+            out.append(char)
+        else:
+            # Whitespace and bare literals (numbers, true/false/null)
+            run = _PLAIN_RUN.match(text, i).group()
+            if scalar_start == -1 and not run.isspace():
+                scalar_start = len(out)
+            out.append(run)
+            i += len(run)
+            continue
+        i += 1
+
+    if stack:
+        _close_truncated(out, stack, in_string, scalar_start, repairs)
+    elif text[i:].strip().strip("`").strip():
+        repairs.append("ignored trailing text")
+
+    candidate = "".join(out)
+    try:
+        return json.loads(candidate), repairs
+    except json.JSONDecodeError as e:
+        raise JSONRepairError(f"Could not repair JSON ({str(e)}); repairs tried: {repairs}")
+
+
+def _drop_trailing_comma(out: List[str], repairs: List[str]):
+    """Remove a ',' that is followed only by whitespace"""
+    j = len(out) - 1
+    while j >= 0 and out[j].isspace():
+        j -= 1
+    if j >= 0 and out[j] == ",":
+        del out[j]
+        repairs.append("removed trailing comma")
+
+
+def _close_truncated(
+    out: List[str],
+    stack: List[list],
+    in_string: bool,
+    scalar_start: int,
+    repairs: List[str]
+):
+    """Finish a document that was cut off mid-stream"""
+    if in_string:
+        if out[-1] == "\\":
+            out.pop()  # Lone backslash would escape the closing quote
+        out.append('"')
+        repairs.append("closed unterminated string")
+    elif scalar_start != -1:
+        literal = "".join(out[scalar_start:]).strip()
+        try:
+            json.loads(literal)
+        except json.JSONDecodeError:
+            del out[scalar_start:]
+            repairs.append(f"dropped partial literal '{literal}'")
+
+    while out and out[-1].isspace():
+        out.pop()
+
+    if out and out[-1] == ",":
+        out.pop()
+        repairs.append("removed trailing comma")
+    elif out and out[-1] == ":":
+        out.append("null")
+        repairs.append("completed dangling key with null")
+    elif stack[-1][0] == "{" and stack[-1][1] and out and out[-1] == '"':
+        # A key with no value yet
+        out.append(": null")
+        repairs.append("completed dangling key with null")
+
+    repairs.append(f"closed {len(stack)} unclosed bracket(s)")
+    while stack:
+        out.append(_CLOSERS[stack.pop()[0]])
+
+
+def parse_llm_json(text: str) -> Tuple[Any, List[str]]:
+    """
+    Parse JSON from an LLM response
+
+    Well-formed responses (bare or wrapped in prose/fences) take the
+    C-speed json.loads path; anything else goes through one repair_json()
+    pass.
+    """
+    stripped = text.strip()
+    if stripped.startswith("{"):
+        try:
+            return json.loads(stripped), []
+        except json.JSONDecodeError:
+            pass
+    else:
+        # Valid JSON wrapped in prose or fences: one C-speed attempt on the outer braces
+        start, end = stripped.find("{"), stripped.rfind("}")
+        if start != -1 and end > start:
+            try:
+                return json.loads(stripped[start:end + 1]), ["stripped text around JSON object"]
+            except json.JSONDecodeError:
+                pass
+    return repair_json(text)
+
+
+def content_repaired(repairs: List[str]) -> bool:
+    """
+    True if parse_llm_json() had to change the JSON itself
+
+    Stripping prose or fences around a well-formed object does not count;
+    closing truncated brackets, dropping commas or literals and the like do.
+    """
+    return any(repair not in _WRAPPER_REPAIRS for repair in repairs)
@@ -0,0 +1,131 @@
+"""
+Incremental JSON Parser
+Emits items of top-level JSON arrays as soon as each object closes
+"""
+
+from typing import Any, Dict, List, Optional, Tuple, Iterable
+import json
+
+
+class IncrementalJSONParser:
+    """
+    Streaming scanner for LLM JSON output
+
+    Feed it text chunks as they arrive. Whenever an object that is a direct
+    element of one of the watched top-level arrays (e.g. "entities") closes,
+    it is decoded and returned from feed() as (collection, object).
+
+    Text before the first '{' (chatter, markdown fences) is ignored.
+    """
+
+    def __init__(self, collections: Iterable[str] = ("entities", "relationships")):
+        self.collections = set(collections)
+        self._text = ""
+        self._pos = 0
+        self._root_start: Optional[int] = None
+        self._root_end: Optional[int] = None
+
+        # Each frame: [container_char, key_in_parent, expecting_key, pending_key, item_start]
+        self._stack: List[list] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+
+        self.items: Dict[str, List[Any]] = {name: [] for name in self.collections}
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Consume a chunk of text and return newly completed items"""
+        self._text += chunk
+        completed = []
+        text = self._text
+
+        for i in range(self._pos, len(text)):
+            if self._root_end is not None:
+                break
+
+            char = text[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    frame = self._stack[-1] if self._stack else None
+                    if frame is not None and frame[0] == "{" and frame[2]:
+                        frame[3] = text[self._string_start + 1:i]
+                continue
+
+            if self._root_start is None:
+                if char == "{":
+                    self._root_start = i
+                    self._stack.append(["{", None, True, None, None])
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = i
+            elif char in "{[":
+                parent = self._stack[-1]
+                key = parent[3] if parent[0] == "{" else None
+                item_start = i if char == "{" and self._is_watched_array(parent) else None
+                self._stack.append([char, key, char == "{", None, item_start])
+            elif char in "}]":
+                frame = self._stack.pop()
+                if frame[4] is not None:
+                    item = self._decode(text[frame[4]:i + 1])
+                    if item is not None:
+                        collection = self._stack[-1][1]
+                        self.items[collection].append(item)
+                        completed.append((collection, item))
+                if not self._stack:
+                    self._root_end = i + 1
+            elif char == ":":
+                self._stack[-1][2] = False
+            elif char == ",":
+                frame = self._stack[-1]
+                if frame[0] == "{":
+                    frame[2] = True
+                    frame[3] = None
+
+        self._pos = len(text)
+        return completed
+
+    def _is_watched_array(self, frame: list) -> bool:
+        """True if frame is a watched array directly under the root object"""
+        return (
+            frame[0] == "["
+            and frame[1] in self.collections
+            and len(self._stack) == 2
+        )
+
+    @staticmethod
+    def _decode(fragment: str) -> Optional[Any]:
+        try:
+            return json.loads(fragment)
+        except json.JSONDecodeError:
+            return None
+
+    @property
+    def text(self) -> str:
+        """All text fed so far"""
+        return self._text
+
+    @property
+    def is_complete(self) -> bool:
+        """True once the root object has closed"""
+        return self._root_end is not None
+
+    def result(self) -> Dict[str, Any]:
+        """
+        Final parsed document
+
+        Falls back to the items collected so far when the root object is
+        missing or does not decode (e.g. a truncated response).
+        """
+        if self._root_end is not None:
+            parsed = self._decode(self._text[self._root_start:self._root_end])
+            if isinstance(parsed, dict):
+                return parsed
+        return {name: list(items) for name, items in self.items.items()}
@@ -0,0 +1,201 @@
+"""
+LLM Response Cache
+Two-tier cache (in-memory LRU + on-disk SQLite) for LLM JSON responses
+"""
+
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class LLMResponseCache:
+    """
+    Cache for LLM responses keyed on prompt, model and sampling parameters
+
+    The memory tier is a bounded LRU with TTL; the disk tier is a SQLite
+    table that survives restarts. A disk hit is promoted back to memory.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        max_entries: int = 512,
+        ttl_seconds: int = 3600
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path
+
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "evictions": 0,
+        }
+
+        if db_path:
+            self._open_disk_tier(db_path)
+
+    def _open_disk_tier(self, db_path: str):
+        """Open (or create) the SQLite tier"""
+        try:
+            directory = os.path.dirname(db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, "
+                "value TEXT NOT NULL, "
+                "created_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+        except sqlite3.Error as e:
+            print(f"[LLM_CACHE] WARN: Disk tier disabled: {str(e)}")
+            self._conn = None
+
+    @staticmethod
+    def make_key(
+        prompt: str,
+        model: Optional[str],
+        temperature: float,
+        system_prompt: Optional[str] = None,
+        **params: Any
+    ) -> str:
+        """
+        Build a cache key from the normalized prompt and request parameters
+
+        Whitespace runs are collapsed so that re-submitting the same prompt
+        with different line breaks or trailing spaces still hits the cache.
+        """
+        normalized_prompt = " ".join(prompt.split())
+        normalized_system = " ".join(system_prompt.split()) if system_prompt else None
+        raw = json.dumps(
+            [normalized_prompt, model, round(temperature, 4), normalized_system, params],
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None on miss/expiry"""
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created_at = entry
+                if now - created_at <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return json.loads(value)
+                del self._memory[key]
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT value, created_at FROM llm_cache WHERE key = ?",
+                    (key,)
+                ).fetchone()
+                if row is not None:
+                    value, created_at = row
+                    if now - created_at <= self.ttl_seconds:
+                        self._remember(key, value, created_at)
+                        self.stats["disk_hits"] += 1
+                        return json.loads(value)
+                    self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._conn.commit()
+
+            self.stats["misses"] += 1
+            return None
+
+    def set(self, key: str, value: Any):
+        """Store a JSON-serializable value in both tiers"""
+        serialized = json.dumps(value)
+        created_at = time.time()
+
+        with self._lock:
+            self._remember(key, serialized, created_at)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, created_at) VALUES (?, ?, ?)",
+                    (key, serialized, created_at)
+                )
+                self._conn.commit()
+            self.stats["writes"] += 1
+
+    def _remember(self, key: str, serialized: str, created_at: float):
+        """Insert into the memory tier, evicting the least recently used entry"""
+        self._memory[key] = (serialized, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def clear(self):
+        """Drop all entries from both tiers"""
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM llm_cache")
+                self._conn.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and tier sizes"""
+        with self._lock:
+            hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+            lookups = hits + self.stats["misses"]
+            return {
+                **self.stats,
+                "hits": hits,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_enabled": self._conn is not None,
+            }
+
+
+def is_cacheable(parsed: Any, clean: bool, required_key: Optional[str] = None) -> bool:
+    """
+    Whether a generated JSON answer may be stored
+
+    Only answers that parsed without repair and were not cut off are kept,
+    since a stored answer is replayed for every repeat of the prompt. With
+    required_key, that key must also hold a non-empty value (an extraction
+    without entities is a failed generation, not an answer).
+    """
+    if not clean or not isinstance(parsed, dict) or not parsed:
+        return False
+    return required_key is None or bool(parsed.get(required_key))
+
+
+_llm_cache: Optional[LLMResponseCache] = None
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """
+    Get the process-wide LLM response cache
+
+    Returns None when caching is disabled in settings.
+    """
+    global _llm_cache
+    from config import settings
+
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+
+    if _llm_cache is None:
+        _llm_cache = LLMResponseCache(
+            db_path=settings.LLM_CACHE_DB_PATH or None,
+            max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.LLM_CACHE_TTL
+        )
+    return _llm_cache
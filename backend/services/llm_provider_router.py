@@ -0,0 +1,408 @@
+"""
+LLM Provider Router
+Hedged requests, circuit breaking and latency-based preference across LLM providers
+"""
+
+from typing import Any, AsyncIterator, Dict, List, Optional
+import asyncio
+import time
+import httpx
+from config import settings
+from .cassette_llm_service import CassetteMiss
+from .llm_scheduler import RateLimitExceeded
+
+# Weight of the newest sample in the latency moving average
+LATENCY_EWMA_ALPHA = 0.3
+# Hedge once the primary is this many times slower than its average
+HEDGE_LATENCY_MULTIPLIER = 2.0
+
+
+def is_provider_failure(error: BaseException) -> bool:
+    """
+    True if error says the provider itself is unhealthy
+
+    Only transport errors, timeouts and HTTP 5xx/429 answers count. A reply
+    that arrived but could not be parsed or did not match its schema (or a
+    4xx for a bad request) says nothing about the provider. Services wrap
+    provider errors in a plain Exception, so the whole cause chain is checked.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, (httpx.TransportError, asyncio.TimeoutError, TimeoutError, ConnectionError, RateLimitExceeded)):
+            return True
+        # groq.APIStatusError (status_code) and httpx.HTTPStatusError (response.status_code)
+        response = getattr(error, "response", None)
+        status = getattr(error, "status_code", None) or getattr(response, "status_code", None)
+        if isinstance(status, int) and (status >= 500 or status == 429):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+class CircuitBreaker:
+    """
+    Per-provider circuit breaker
+
+    closed -> open after failure_threshold consecutive failures; open ->
+    half_open once reset_timeout has passed, letting a single trial call
+    through; the trial's outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+
+    def available(self) -> bool:
+        """True if a call may be attempted now (does not reserve the trial)"""
+        if self.state == "closed":
+            return True
+        if self.state == "open":
+            return time.monotonic() - self.opened_at >= self.reset_timeout
+        return not self._trial_in_flight
+
+    def acquire(self) -> bool:
+        """Reserve permission for one call"""
+        if not self.available():
+            return False
+        if self.state == "open":
+            self.state = "half_open"
+        if self.state == "half_open":
+            self._trial_in_flight = True
+        return True
+
+    def release(self):
+        """The call was abandoned (e.g. lost a hedge) without an outcome"""
+        self._trial_in_flight = False
+
+    def record_success(self):
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        self._trial_in_flight = False
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+
+class ProviderState:
+    """A provider's service plus its breaker and latency statistics"""
+
+    def __init__(self, name: str, service: Any):
+        self.name = name
+        self.service = service
+        self.breaker = CircuitBreaker(
+            settings.LLM_CIRCUIT_FAILURE_THRESHOLD,
+            settings.LLM_CIRCUIT_RESET_SECONDS
+        )
+        self.latency_ewma: Optional[float] = None
+        self.stats = {
+            "calls": 0,
+            "successes": 0,
+            "failures": 0,
+            "invalid_responses": 0,
+            "hedges_started": 0,
+            "hedges_won": 0,
+            "cancelled": 0,
+        }
+
+    def record_latency(self, seconds: float):
+        if self.latency_ewma is None:
+            self.latency_ewma = seconds
+        else:
+            self.latency_ewma = LATENCY_EWMA_ALPHA * seconds + (1 - LATENCY_EWMA_ALPHA) * self.latency_ewma
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "circuit": self.breaker.state,
+            "consecutive_failures": self.breaker.consecutive_failures,
+            "latency_ewma_ms": round(self.latency_ewma * 1000, 1) if self.latency_ewma is not None else None,
+        }
+
+
+class LLMProviderRouter:
+    """
+    LLM service facade over several providers
+
+    Exposes the same methods as FastLLMService/LLMService. Each call goes
+    to the preferred provider (closed circuit first, then lowest latency
+    average, then configured order). If it has not answered within the
+    hedge delay a duplicate is sent to the next provider and the first
+    success wins; a failure fails over immediately. Streams are not
+    hedged but fail over if the provider errors before the first chunk.
+
+    Only transport, timeout and 5xx/429 errors count against a breaker
+    (see is_provider_failure). With a single provider the breaker is
+    never enforced: there is nothing to fail over to, so calls keep going
+    to it.
+    """
+
+    def __init__(self, providers: Dict[str, Any], hedging: bool = True, hedge_delay: float = 4.0):
+        if not providers:
+            raise ValueError("LLMProviderRouter needs at least one provider")
+        self.providers: List[ProviderState] = [ProviderState(name, service) for name, service in providers.items()]
+        self.hedging = hedging
+        self.hedge_delay = hedge_delay
+        self.enforce_breakers = len(self.providers) > 1
+
+    @property
+    def services(self) -> Dict[str, Any]:
+        """Underlying service of each provider by name"""
+        return {state.name: state.service for state in self.providers}
+
+    def _ranked(self) -> List[ProviderState]:
+        """Providers in order of preference"""
+        order = {state.name: i for i, state in enumerate(self.providers)}
+        return sorted(
+            self.providers,
+            key=lambda s: (
+                not s.breaker.available(),
+                s.latency_ewma if s.latency_ewma is not None else float("inf"),
+                order[s.name]
+            )
+        )
+
+    def _usable(self, state: ProviderState) -> bool:
+        return not self.enforce_breakers or state.breaker.available()
+
+    def _reserve(self, state: ProviderState) -> bool:
+        """Acquire state's breaker, or just mark the trial when breakers are not enforced"""
+        return state.breaker.acquire() or not self.enforce_breakers
+
+    def _record_error(self, state: ProviderState, error: Exception):
+        if is_provider_failure(error):
+            state.stats["failures"] += 1
+            state.breaker.record_failure()
+        else:
+            state.stats["invalid_responses"] += 1
+            state.breaker.release()
+
+    def _hedge_after(self, state: ProviderState) -> float:
+        """How long to wait on state before sending a duplicate"""
+        if state.latency_ewma is None:
+            return self.hedge_delay
+        return max(self.hedge_delay, HEDGE_LATENCY_MULTIPLIER * state.latency_ewma)
+
+    async def _attempt(self, state: ProviderState, method: str, kwargs: Dict[str, Any]) -> Any:
+        """One call to one provider, recorded in its breaker and stats"""
+        state.stats["calls"] += 1
+        start = time.monotonic()
+        try:
+            result = await getattr(state.service, method)(**kwargs)
+        except asyncio.CancelledError:
+            state.stats["cancelled"] += 1
+            state.breaker.release()
+            raise
+        except CassetteMiss:
+            # An unrecorded prompt says nothing about the provider's health
+            state.breaker.release()
+            raise
+        except Exception as e:
+            self._record_error(state, e)
+            raise
+        state.stats["successes"] += 1
+        state.breaker.record_success()
+        state.record_latency(time.monotonic() - start)
+        return result
+
+    async def _call(self, method: str, **kwargs) -> Any:
+        """Run method on the best provider, hedging and failing over as needed"""
+        candidates = [state for state in self._ranked() if self._usable(state)]
+        if not candidates:
+            raise Exception("LLM router error: no provider available (all circuits open)")
+
+        running: Dict[asyncio.Task, ProviderState] = {}
+        hedges = set()
+        last_error: Optional[Exception] = None
+
+        def start_next(hedge: bool) -> bool:
+            while candidates:
+                state = candidates.pop(0)
+                if self._reserve(state):
+                    if hedge:
+                        state.stats["hedges_started"] += 1
+                        print(f"[LLM_ROUTER] Hedging {method} to {state.name}")
+                    task = asyncio.ensure_future(self._attempt(state, method, kwargs))
+                    running[task] = state
+                    if hedge:
+                        hedges.add(task)
+                    return True
+            return False
+
+        start_next(hedge=False)
+        try:
+            while running:
+                timeout = None
+                if self.hedging and candidates:
+                    leader = next(iter(running.values()))
+                    timeout = self._hedge_after(leader)
+
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    start_next(hedge=True)
+                    continue
+
+                for task in done:
+                    state = running.pop(task)
+                    if task.exception() is None:
+                        if task in hedges:
+                            state.stats["hedges_won"] += 1
+                        return task.result()
+                    last_error = task.exception()
+                    print(f"[LLM_ROUTER] {state.name} failed: {str(last_error)}")
+
+                if not running:
+                    start_next(hedge=False)
+        finally:
+            for task in running:
+                if task.done():
+                    task.exception() if not task.cancelled() else None  # Mark as retrieved
+                else:
+                    task.cancel()
+
+        raise last_error or Exception("LLM router error: no provider available")
+
+    async def generate(self, prompt: str, **kwargs) -> str:
+        return await self._call("generate", prompt=prompt, **kwargs)
+
+    async def generate_json(self, prompt: str, **kwargs) -> Dict[str, Any]:
+        return await self._call("generate_json", prompt=prompt, **kwargs)
+
+    async def generate_stream(self, prompt: str, **kwargs) -> AsyncIterator[str]:
+        async for chunk in self._stream("generate_stream", prompt=prompt, **kwargs):
+            yield chunk
+
+    async def generate_json_stream(self, prompt: str, **kwargs) -> AsyncIterator[str]:
+        async for chunk in self._stream("generate_json_stream", prompt=prompt, **kwargs):
+            yield chunk
+
+    async def _stream(self, method: str, **kwargs) -> AsyncIterator[str]:
+        """Stream from the best provider, failing over until a chunk arrives"""
+        last_error: Optional[Exception] = None
+        for state in self._ranked():
+            if not self._reserve(state):
+                continue
+
+            state.stats["calls"] += 1
+            started = False
+            try:
+                async for chunk in getattr(state.service, method)(**kwargs):
+                    started = True
+                    yield chunk
+            except asyncio.CancelledError:
+                state.stats["cancelled"] += 1
+                state.breaker.release()
+                raise
+            except CassetteMiss:
+                # An unrecorded prompt says nothing about the provider's health
+                state.breaker.release()
+                raise
+            except Exception as e:
+                self._record_error(state, e)
+                if started:
+                    raise
+                last_error = e
+                print(f"[LLM_ROUTER] {state.name} stream failed before first chunk: {str(e)}")
+                continue
+
+            state.stats["successes"] += 1
+            state.breaker.record_success()
+            return
+
+        raise last_error or Exception("LLM router error: no provider available (all circuits open)")
+
+    async def check_health(self) -> bool:
+        """True if any provider is healthy"""
+        for state in self._ranked():
+            if await state.service.check_health():
+                return True
+        return False
+
+    async def list_models(self) -> list:
+        """Models of every provider, preferred provider first"""
+        models = []
+        for state in self._ranked():
+            models.extend(m for m in await state.service.list_models() if m not in models)
+        return models
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Breaker state, latency average and hedge counters per provider"""
+        stats = {
+            "hedging": self.hedging,
+            "hedge_delay_s": self.hedge_delay,
+            "preferred": [state.name for state in self._ranked()],
+            "providers": {state.name: state.get_stats() for state in self.providers},
+        }
+        # Cassette-backed providers also report record/replay counters
+        for state in self.providers:
+            if hasattr(state.service, "mode"):
+                stats["providers"][state.name]["cassette"] = state.service.get_stats()
+        return stats
+
+
+_router: Optional[LLMProviderRouter] = None
+
+
+def create_llm_service() -> LLMProviderRouter:
+    """
+    Get the process-wide LLM service
+
+    Builds a router over the providers listed in LLM_PROVIDERS, in that
+    order of preference. Groq is skipped unless USE_GROQ is set and an API
+    key is present. Without LLM_PROVIDERS the router has the single
+    provider that setting selects (Groq, else Ollama); an Ollama fallback
+    or hedge is opt-in. All services share the router so breaker state and
+    latency statistics are process-wide.
+
+    LLM_CASSETTE_MODE=record wraps each provider in a recording cassette;
+    replay replaces them with a single offline "cassette" provider.
+    """
+    global _router
+    if _router is None:
+        from .fast_llm_service import FastLLMService
+        from .llm_service import LLMService
+        from .cassette_llm_service import CassetteLLMService
+
+        providers = {}
+        mode = settings.LLM_CASSETTE_MODE.lower()
+        if mode == "replay":
+            providers["cassette"] = CassetteLLMService(
+                "replay", settings.LLM_CASSETTE_PATH, latency_ms=settings.LLM_CASSETTE_LATENCY_MS
+            )
+        else:
+            names = [p.strip().lower() for p in settings.LLM_PROVIDERS.split(",") if p.strip()]
+            if not names:
+                names = ["groq"] if settings.USE_GROQ and settings.GROQ_API_KEY else ["ollama"]
+            for name in names:
+                if name == "groq" and settings.USE_GROQ and settings.GROQ_API_KEY:
+                    providers["groq"] = FastLLMService()
+                elif name == "ollama":
+                    providers["ollama"] = LLMService()
+            if not providers:
+                providers["ollama"] = LLMService()
+            if mode == "record":
+                providers = {
+                    name: CassetteLLMService("record", settings.LLM_CASSETTE_PATH, inner=service)
+                    for name, service in providers.items()
+                }
+
+        print(f"[LLM_ROUTER] Providers: {', '.join(providers)} (hedging {'on' if settings.LLM_HEDGING_ENABLED else 'off'})")
+        _router = LLMProviderRouter(
+            providers,
+            hedging=settings.LLM_HEDGING_ENABLED,
+            hedge_delay=settings.LLM_HEDGE_DELAY
+        )
+    return _router
+
+
+def get_router_stats() -> Dict[str, Any]:
+    """Router stats, or {"enabled": False} before any service was created"""
+    return _router.get_stats() if _router is not None else {"enabled": False}
@@ -0,0 +1,365 @@
+"""
+LLM Scheduler
+Rate-limit-aware, priority-ordered admission of outbound LLM calls
+"""
+
+from collections import deque
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import heapq
+import itertools
+import random
+import time
+
+
+class Priority(IntEnum):
+    """Scheduling class of an LLM call (lower runs first)"""
+    INTERACTIVE = 0  # A user is waiting on this answer (deep analysis)
+    NORMAL = 1  # Regular API requests (diagram generation, validation)
+    BATCH = 2  # Bulk/background work
+
+
+class TokenBucket:
+    """
+    Classic token bucket refilled continuously at capacity per minute
+
+    A capacity of 0 means unlimited.
+    """
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.capacity <= 0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until amount can be taken (0 if available now)"""
+        if self.unlimited:
+            return 0.0
+        self._refill(now)
+        # A single request larger than the bucket only waits for a full bucket
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float, now: float) -> float:
+        """Take amount (at most a full bucket); returns what was taken"""
+        if self.unlimited:
+            return 0.0
+        self._refill(now)
+        taken = min(amount, self.capacity)
+        self.tokens -= taken
+        return taken
+
+    def reconcile(self, taken: float, actual: float, now: float):
+        """Settle an earlier consume() against the amount actually used"""
+        if self.unlimited:
+            return
+        self._refill(now)
+        self.tokens = min(self.capacity, self.tokens + taken - actual)
+
+    def drain(self, now: float):
+        """Empty the bucket (the provider says we are over the limit)"""
+        if not self.unlimited:
+            self._refill(now)
+            self.tokens = min(self.tokens, 0.0)
+
+
+def rate_limit_retry_after(error: Exception) -> Optional[float]:
+    """
+    Return the suggested delay if error is an HTTP 429, else None
+
+    Works for groq.RateLimitError / APIStatusError (status_code attribute)
+    and httpx.HTTPStatusError (response.status_code). A missing or
+    unparsable Retry-After header yields 0.0 (use backoff).
+    """
+    response = getattr(error, "response", None)
+    status = getattr(error, "status_code", None) or getattr(response, "status_code", None)
+    if status != 429:
+        return None
+
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return max(0.0, float(headers.get("retry-after", 0)))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class Reservation:
+    """
+    TPM charge of one admitted call
+
+    Admission charges the caller's estimate (prompt plus the whole output
+    budget). Setting actual_tokens from the provider's usage report before
+    the slot is released refunds the unused part, or charges the overrun.
+    """
+
+    def __init__(self, charged: float):
+        self.charged = charged
+        self.actual_tokens: Optional[int] = None
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a call is still rate limited after all retries"""
+
+
+class LLMScheduler:
+    """
+    Admission control for one LLM provider
+
+    Every call waits in a priority queue until (a) it is the
+    highest-priority waiter, (b) a concurrency slot is free and (c) the
+    requests-per-minute and tokens-per-minute buckets can cover it.
+    Within a priority class calls are served FIFO. 429 responses are
+    retried with jittered exponential backoff and pause the whole provider
+    until the Retry-After delay has passed. Token charges are estimates
+    settled against reported usage when each call finishes.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        requests_per_minute: int = 0,
+        tokens_per_minute: int = 0,
+        max_retries: int = 4,
+        backoff_base: float = 1.0,
+        backoff_max: float = 30.0
+    ):
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._queue: List[tuple] = []  # heap of (priority, seq, estimated_tokens)
+        self._seq = itertools.count()
+        self._active = 0
+        self._paused_until = 0.0
+        self._changed = asyncio.Condition()
+
+        self.stats = {
+            "admitted": 0,
+            "completed": 0,
+            "rate_limited": 0,
+            "retries": 0,
+            "failed_rate_limited": 0,
+            "tokens_refunded": 0,
+        }
+        self._waits: Dict[Priority, deque] = {p: deque(maxlen=500) for p in Priority}
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        estimated_tokens: int,
+        priority: Priority = Priority.NORMAL
+    ) -> AsyncIterator[Reservation]:
+        """
+        Hold an admitted slot for the duration of one call
+
+        Yields the call's Reservation; set its actual_tokens once the
+        provider reports usage.
+        """
+        reservation = await self._acquire(estimated_tokens, priority)
+        try:
+            yield reservation
+        finally:
+            await self._release(reservation)
+
+    async def run(
+        self,
+        factory: Callable[[], Awaitable[Any]],
+        estimated_tokens: int,
+        priority: Priority = Priority.NORMAL,
+        usage: Optional[Callable[[Any], Optional[int]]] = None
+    ) -> Any:
+        """
+        Run factory() inside a slot, retrying it on rate-limit errors
+
+        Args:
+            factory: Zero-argument coroutine function making one provider call
+            estimated_tokens: Prompt plus output tokens charged to the TPM bucket
+            priority: Scheduling class
+            usage: Tokens the call actually used, read from factory()'s
+                result (None if unknown); the charge is settled against it
+
+        Raises:
+            RateLimitExceeded: if the provider still answers 429 after
+                max_retries attempts. Other errors propagate unchanged.
+        """
+        attempt = 0
+        while True:
+            async with self.slot(estimated_tokens, priority) as reservation:
+                try:
+                    result = await factory()
+                except Exception as e:
+                    retry_after = rate_limit_retry_after(e)
+                    if retry_after is None:
+                        raise
+                    error = e
+                else:
+                    if usage is not None:
+                        reservation.actual_tokens = usage(result)
+                    return result
+
+            self.stats["rate_limited"] += 1
+            if attempt >= self.max_retries:
+                self.stats["failed_rate_limited"] += 1
+                raise RateLimitExceeded(f"{self.name} rate limit persisted after {attempt} retries: {str(error)}")
+
+            delay = self._backoff(attempt, retry_after)
+            attempt += 1
+            self.stats["retries"] += 1
+            print(f"[SCHEDULER] {self.name} rate limited, retry {attempt}/{self.max_retries} in {delay:.2f}s")
+            await self._pause(delay)
+
+    def _backoff(self, attempt: int, retry_after: float) -> float:
+        """Full-jitter exponential backoff, never shorter than Retry-After"""
+        ceiling = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return max(retry_after, random.uniform(0, ceiling))
+
+    async def _pause(self, delay: float):
+        """Hold back every waiter for delay seconds, then wait it out"""
+        now = time.monotonic()
+        self._paused_until = max(self._paused_until, now + delay)
+        self.request_bucket.drain(now)
+        self.token_bucket.drain(now)
+        await asyncio.sleep(delay)
+
+    async def _acquire(self, estimated_tokens: int, priority: Priority) -> Reservation:
+        ticket = (int(priority), next(self._seq), estimated_tokens)
+        heapq.heappush(self._queue, ticket)
+        enqueued = time.monotonic()
+
+        async with self._changed:
+            try:
+                while True:
+                    delay = self._admission_delay(ticket)
+                    if delay == 0.0:
+                        break
+                    try:
+                        # Re-check when the buckets have refilled, or on any release
+                        await asyncio.wait_for(self._changed.wait(), timeout=delay)
+                    except asyncio.TimeoutError:
+                        pass
+            except BaseException:
+                self._remove(ticket)
+                self._changed.notify_all()
+                raise
+
+            heapq.heappop(self._queue)
+            now = time.monotonic()
+            self.request_bucket.consume(1, now)
+            reservation = Reservation(self.token_bucket.consume(estimated_tokens, now))
+            self._active += 1
+            self.stats["admitted"] += 1
+            self._waits[priority].append(now - enqueued)
+            # The next waiter may be admissible too
+            self._changed.notify_all()
+            return reservation
+
+    def _admission_delay(self, ticket: tuple) -> Optional[float]:
+        """0.0 if ticket can go now, else seconds to wait (None: until a release)"""
+        if self._queue[0] is not ticket or self._active >= self.max_concurrency:
+            return None
+        now = time.monotonic()
+        delay = max(
+            self._paused_until - now,
+            self.request_bucket.wait_time(1, now),
+            self.token_bucket.wait_time(ticket[2], now)
+        )
+        return max(0.0, delay)
+
+    def _remove(self, ticket: tuple):
+        """Drop a cancelled waiter from the queue"""
+        if ticket in self._queue:
+            self._queue.remove(ticket)
+            heapq.heapify(self._queue)
+
+    async def _release(self, reservation: Reservation):
+        async with self._changed:
+            if reservation.actual_tokens is not None and not self.token_bucket.unlimited:
+                self.token_bucket.reconcile(reservation.charged, reservation.actual_tokens, time.monotonic())
+                self.stats["tokens_refunded"] += max(0, round(reservation.charged - reservation.actual_tokens))
+            self._active -= 1
+            self.stats["completed"] += 1
+            self._changed.notify_all()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth, active calls, bucket levels and wait times per priority"""
+        depth = {p.name.lower(): 0 for p in Priority}
+        for priority, _, _ in self._queue:
+            depth[Priority(priority).name.lower()] += 1
+
+        waits = {}
+        for priority, samples in self._waits.items():
+            ordered = sorted(samples) or [0.0]
+            waits[priority.name.lower()] = {
+                "samples": len(samples),
+                "avg_ms": round(sum(ordered) / len(ordered) * 1000, 2),
+                "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 2),
+                "max_ms": round(ordered[-1] * 1000, 2),
+            }
+
+        now = time.monotonic()
+        return {
+            **self.stats,
+            "active": self._active,
+            "max_concurrency": self.max_concurrency,
+            "queue_depth": sum(depth.values()),
+            "queue_depth_by_priority": depth,
+            "paused_for_s": round(max(0.0, self._paused_until - now), 2),
+            "requests_available": None if self.request_bucket.unlimited else round(self.request_bucket.tokens, 1),
+            "tokens_available": None if self.token_bucket.unlimited else round(self.token_bucket.tokens),
+            "wait_times": waits,
+        }
+
+
+_schedulers: Dict[str, LLMScheduler] = {}
+
+
+def get_llm_scheduler(provider: str) -> LLMScheduler:
+    """Get the process-wide scheduler for a provider ("groq" or "ollama")"""
+    from config import settings
+
+    scheduler = _schedulers.get(provider)
+    if scheduler is None:
+        if provider == "groq":
+            scheduler = LLMScheduler(
+                "groq",
+                max_concurrency=settings.GROQ_MAX_CONCURRENCY,
+                requests_per_minute=settings.GROQ_RPM_LIMIT,
+                tokens_per_minute=settings.GROQ_TPM_LIMIT,
+                max_retries=settings.LLM_RATE_LIMIT_MAX_RETRIES,
+                backoff_base=settings.LLM_RATE_LIMIT_BACKOFF_BASE,
+                backoff_max=settings.LLM_RATE_LIMIT_BACKOFF_MAX
+            )
+        else:
+            # Local Ollama has no quotas; the scheduler only orders and bounds calls
+            scheduler = LLMScheduler(
+                provider,
+                max_concurrency=settings.OLLAMA_MAX_CONCURRENCY,
+                max_retries=settings.LLM_RATE_LIMIT_MAX_RETRIES,
+                backoff_base=settings.LLM_RATE_LIMIT_BACKOFF_BASE,
+                backoff_max=settings.LLM_RATE_LIMIT_BACKOFF_MAX
+            )
+        _schedulers[provider] = scheduler
+    return scheduler
+
+
+def get_scheduler_stats() -> Dict[str, Any]:
+    """Stats of every scheduler created so far"""
+    return {name: scheduler.get_stats() for name, scheduler in _schedulers.items()}
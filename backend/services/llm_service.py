@@ -4,8 +4,28 @@ Handles communication with Ollama/Llama models
 """
 
 import httpx
-from typing import Optional, Dict, Any
+import json
+from typing import Optional, Dict, Any, AsyncIterator, List, Tuple, Type
+from pydantic import BaseModel
+import time
 from config import settings
+from .llm_cache import LLMResponseCache, get_llm_cache, is_cacheable
+from .request_coalescer import get_request_coalescer
+from .json_repair import parse_llm_json, content_repaired, JSONRepairError
+from .token_budget import estimate_tokens, estimate_output_budget, generate_with_continuation
+from .llm_scheduler import Priority, get_llm_scheduler
+from .ollama_client import ollama_request, ollama_stream
+from .model_warmup import model_runtime_options
+from .prompt_prefix import get_conversation_store
+from .structured_output import json_schema, parse_structured, validate_structured
+from .model_tier_router import ModelTier
+
+
+def _ollama_tokens(result: Dict[str, Any]) -> Optional[int]:
+    """Prompt plus output tokens Ollama reports for a generation (None if absent)"""
+    if "eval_count" not in result:
+        return None
+    return result.get("prompt_eval_count", 0) + result["eval_count"]
 
 
 class LLMService:
@@ -16,6 +36,13 @@ class LLMService:
         self.primary_model = settings.OLLAMA_MODEL_PRIMARY
         self.secondary_model = settings.OLLAMA_MODEL_SECONDARY
         self.timeout = settings.OLLAMA_TIMEOUT
+        self.cache = get_llm_cache()
+        self.coalescer = get_request_coalescer()
+        self.scheduler = get_llm_scheduler("ollama")
+
+    def model_for_tier(self, tier: Optional[ModelTier]) -> str:
+        """Model serving a tier (primary_model when no tier is given)"""
+        return self.secondary_model if tier == ModelTier.SMALL else self.primary_model
 
     async def generate(
         self,
@@ -23,81 +50,393 @@ class LLMService:
         model: Optional[str] = None,
         system_prompt: Optional[str] = None,
         temperature: float = 0.7,
-        max_tokens: Optional[int] = None
+        max_tokens: Optional[int] = None,
+        priority: Priority = Priority.NORMAL,
+        tier: Optional[ModelTier] = None
     ) -> str:
         """
         Generate text using Ollama
 
         Phase 1 Implementation
+        Without an explicit model, tier picks primary_model or secondary_model.
+        """
+        text, _ = await self._complete(
+            prompt, model or self.model_for_tier(tier), system_prompt, temperature, max_tokens, priority
+        )
+        return text
+
+    async def _complete(
+        self,
+        prompt: str,
+        model: Optional[str],
+        system_prompt: Optional[str],
+        temperature: float,
+        max_tokens: Optional[int],
+        priority: Priority = Priority.NORMAL,
+        context: Optional[List[int]] = None,
+        capture: Optional[Dict[str, Any]] = None,
+        output_format: Optional[Dict[str, Any]] = None,
+        raw: bool = False
+    ) -> Tuple[str, bool]:
+        """
+        Run one completion; returns (text, truncated)
+
+        context continues an earlier exchange (Ollama's returned context
+        tokens), so that text is not re-sent or re-processed. The context
+        of this exchange and its generated token count are stored in
+        capture["context"] and capture["eval_count"] if given.
+        output_format is a JSON schema Ollama constrains decoding to. raw
+        sends prompt without the model's chat template (system_prompt is
+        then ignored), so it extends the context text as is.
         """
         if model is None:
             model = self.primary_model
 
-        async with httpx.AsyncClient(timeout=300.0) as client:  # 5 minutes timeout
-            payload = {
-                "model": model,
-                "prompt": prompt,
-                "stream": False,
-                "options": {
-                    "temperature": temperature,
-                    "num_predict": 500,  # Limit response length for faster generation
-                }
+        num_predict = max_tokens or settings.LLM_DEFAULT_JSON_TOKENS
+        runtime = model_runtime_options(model)
+        payload = {
+            "model": model,
+            "prompt": prompt,
+            "stream": False,
+            "keep_alive": runtime["keep_alive"],
+            "options": {
+                "temperature": temperature,
+                "num_predict": num_predict,
+                **runtime["options"],
             }
+        }
 
-            if system_prompt:
-                payload["system"] = system_prompt
+        if context:
+            # The system prompt is already part of the earlier exchange.
+            # Sent as a copy: the list may be a shared prefix context
+            payload["context"] = list(context)
+        elif system_prompt and not raw:
+            payload["system"] = system_prompt
+        if raw:
+            payload["raw"] = True
+        if output_format:
+            payload["format"] = output_format
 
-            if max_tokens:
-                payload["options"]["num_predict"] = max_tokens
+        async def call():
+            response = await ollama_request(
+                "POST",
+                "/api/generate",
+                json=payload,
+                timeout=300.0  # 5 minutes timeout
+            )
+            response.raise_for_status()
+            return response.json()
 
-            try:
-                response = await client.post(
-                    f"{self.base_url}/api/generate",
-                    json=payload
-                )
-                response.raise_for_status()
-                result = response.json()
-                return result.get("response", "")
-            except httpx.HTTPError as e:
-                raise Exception(f"Ollama API error: {str(e)}")
+        try:
+            result = await self.scheduler.run(
+                call,
+                estimate_tokens(prompt + (system_prompt or "")) + num_predict,
+                priority,
+                usage=_ollama_tokens
+            )
+            # Older Ollama versions omit done_reason; fall back to the token count
+            truncated = (
+                result.get("done_reason") == "length"
+                or result.get("eval_count", 0) >= num_predict
+            )
+            if capture is not None:
+                capture["context"] = result.get("context")
+                capture["eval_count"] = result.get("eval_count", 0)
+            return result.get("response", ""), truncated
+        except httpx.HTTPError as e:
+            raise Exception(f"Ollama API error: {str(e)}")
 
     async def generate_json(
         self,
         prompt: str,
         model: Optional[str] = None,
-        system_prompt: Optional[str] = None
+        system_prompt: Optional[str] = None,
+        use_cache: bool = True,
+        max_tokens: Optional[int] = None,
+        priority: Priority = Priority.NORMAL,
+        prefix: Optional[str] = None,
+        session_id: Optional[str] = None,
+        schema: Optional[Type[BaseModel]] = None,
+        tier: Optional[ModelTier] = None,
+        cache_requires: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Generate structured JSON output
 
         Phase 1 Implementation
-        """
-        import json
-        import re
+        Repeated prompts are served from the response cache unless use_cache is False.
+        Only answers that parsed without repair, were not left truncated and
+        (with cache_requires, e.g. "entities") have that key non-empty are cached.
+        max_tokens is estimated from the prompt when omitted; truncated
+        responses are continued instead of failing. priority orders the call
+        in the Ollama scheduler queue.
 
+        prefix is static text preceding prompt (e.g. a template preamble):
+        it is processed once per model and reused through Ollama's context.
+        The prompt is then sent raw, continuing the primed prefix, so the
+        model reads prefix and prompt as one text rather than two turns.
+        With session_id, the call continues that session's conversation and
+        records its context for the next call.
+
+        With a pydantic schema, decoding is constrained to its JSON schema
+        (Ollama's `format`) and the response is validated in one pass. A
+        truncated constrained response is finished through the free-form
+        continuation and repair path, then validated against the schema.
+        """
         # Add instruction to return only JSON
         json_instruction = "\n\nIMPORTANT: Return ONLY valid JSON, no additional text or explanation."
         full_prompt = prompt + json_instruction
 
-        # Generate response
-        response = await self.generate(
+        if model is None:
+            model = self.model_for_tier(tier)
+        temperature = 0.3  # Lower temperature for more consistent JSON
+
+        store = get_conversation_store()
+        session_key = store.session_key("ollama", session_id) if session_id else None
+        session_context = store.get(session_key) if session_key else None
+
+        request_key = LLMResponseCache.make_key(
+            (prefix or "") + prompt, model, temperature, system_prompt, provider="ollama",
+            **({"schema": schema.__name__} if schema else {})
+        )
+        # Answers that depend on earlier turns are not reusable across sessions
+        use_cache = use_cache and self.cache is not None and session_context is None
+        if use_cache:
+            cached = self.cache.get(request_key)
+            if cached is not None:
+                return cached
+
+        async def produce() -> Dict[str, Any]:
+            context, send_prompt, raw = session_context, full_prompt, False
+            if context is None and prefix:
+                context = await self._prefix_context(prefix, model, system_prompt, priority)
+                if context is None:
+                    send_prompt = prefix + full_prompt
+                else:
+                    raw = True  # Continue the primed prefix text in the same turn
+
+            # Per-request capture: only ever stored as the session context, never as the prefix's
+            capture: Dict[str, Any] = {}
+            budget = max_tokens or estimate_output_budget((prefix or "") + full_prompt)
+            complete = lambda prompt, tokens: self._complete(
+                prompt, model, system_prompt, temperature, tokens, priority, context, capture, raw=raw
+            )
+            if schema is not None:
+                response, truncated = await self._complete(
+                    send_prompt, model, system_prompt, temperature, budget, priority, context, capture,
+                    output_format=json_schema(schema), raw=raw
+                )
+                if truncated:
+                    # A grammar-constrained call cannot resume a cut-off object
+                    print(f"[LLM] Structured response truncated at {budget} tokens, continuing without schema")
+                    response, truncated = await generate_with_continuation(
+                        complete, send_prompt, budget, first=(response, truncated)
+                    )
+                    parsed, clean = self._parse_json_response(response)
+                    parsed = validate_structured(parsed, schema)
+                else:
+                    parsed, clean = parse_structured(response, schema), True
+            else:
+                # Generate response, continuing it if it hits the budget
+                response, truncated = await generate_with_continuation(complete, send_prompt, budget)
+                parsed, clean = self._parse_json_response(response)
+
+            if use_cache and is_cacheable(parsed, clean and not truncated, cache_requires):
+                self.cache.set(request_key, parsed)
+            if session_key and capture.get("context"):
+                store.set(session_key, capture["context"])
+            return parsed
+
+        # Identical concurrent requests share one Ollama call
+        coalesce_key = f"{request_key}:{session_id}" if session_id else request_key
+        return await self.coalescer.run(coalesce_key, produce)
+
+    async def _prefix_context(
+        self,
+        prefix: str,
+        model: str,
+        system_prompt: Optional[str],
+        priority: Priority = Priority.NORMAL
+    ) -> Optional[List[int]]:
+        """
+        Context tokens of a processed prompt prefix, computed once per model
+
+        The prefix (after the system prompt, if any) is evaluated raw,
+        without the chat template, in a one-token generation; the generated
+        token is cut off the returned context, which is kept in the
+        conversation store. Later prompts sent raw with that context
+        continue the prefix text without re-processing it. Returns None if
+        Ollama did not return a context (the caller then sends the prefix
+        inline).
+        """
+        store = get_conversation_store()
+        runtime = model_runtime_options(model)
+        key = store.prefix_key(model, prefix, system_prompt, **runtime["options"])
+        context = store.get(key)
+        if context is not None:
+            return context
+
+        start = time.perf_counter()
+        capture: Dict[str, Any] = {}
+        text = f"{system_prompt}\n\n{prefix}" if system_prompt else prefix
+        try:
+            await self._complete(text, model, None, 0.0, 1, priority, None, capture, raw=True)
+        except Exception as e:
+            print(f"[LLM] Prefix priming failed, sending it inline: {str(e)}")
+            return None
+
+        context = capture.get("context")
+        if context:
+            # Keep only the prefix: drop the token generated while priming
+            context = context[:len(context) - capture.get("eval_count", 0)]
+            store.set(key, context)
+            print(f"[LLM] Primed prompt prefix for {model}: {len(context)} tokens in "
+                  f"{(time.perf_counter() - start) * 1000:.0f} ms")
+        return context or None
+
+    def _parse_json_response(self, response: str) -> Tuple[Dict[str, Any], bool]:
+        """
+        Extract JSON from response (in case LLM adds extra text)
+
+        Returns (parsed, clean): clean is False if the JSON itself had to be repaired.
+        """
+        try:
+            parsed, repairs = parse_llm_json(response)
+        except JSONRepairError:
+            raise Exception(f"Failed to parse JSON from LLM response: {response[:200]}")
+
+        if repairs:
+            print(f"[LLM] Repaired JSON response: {', '.join(repairs)}")
+        return parsed, not content_repaired(repairs)
+
+    async def generate_stream(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        priority: Priority = Priority.NORMAL,
+        context: Optional[List[int]] = None,
+        tier: Optional[ModelTier] = None,
+        capture: Optional[Dict[str, Any]] = None,
+        raw: bool = False
+    ) -> AsyncIterator[str]:
+        """
+        Stream generated text from Ollama token by token
+
+        Same arguments as generate() plus an optional Ollama context to
+        continue (raw as in _complete); yields text deltas as they arrive. capture["truncated"]
+        is set from Ollama's final message, so it stays unset if the
+        stream was cut off.
+        """
+        if model is None:
+            model = self.model_for_tier(tier)
+
+        num_predict = max_tokens or settings.LLM_DEFAULT_JSON_TOKENS
+        runtime = model_runtime_options(model)
+        payload = {
+            "model": model,
+            "prompt": prompt,
+            "stream": True,
+            "keep_alive": runtime["keep_alive"],
+            "options": {
+                "temperature": temperature,
+                "num_predict": num_predict,
+                **runtime["options"],
+            }
+        }
+
+        if context:
+            payload["context"] = list(context)
+        elif system_prompt and not raw:
+            payload["system"] = system_prompt
+        if raw:
+            payload["raw"] = True
+
+        try:
+            # The slot is held until the stream is fully consumed
+            async with self.scheduler.slot(estimate_tokens(prompt + (system_prompt or "")) + num_predict, priority) as reservation:
+                async for message in ollama_stream("POST", "/api/generate", json=payload, timeout=300.0):
+                    delta = message.get("response", "")
+                    if delta:
+                        yield delta
+                    if message.get("done"):
+                        reservation.actual_tokens = _ollama_tokens(message)
+                        if capture is not None:
+                            capture["truncated"] = (
+                                message.get("done_reason") == "length"
+                                or message.get("eval_count", 0) >= num_predict
+                            )
+                        break
+        except httpx.HTTPError as e:
+            raise Exception(f"Ollama API error: {str(e)}")
+
+    async def generate_json_stream(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        system_prompt: Optional[str] = None,
+        use_cache: bool = True,
+        max_tokens: Optional[int] = None,
+        priority: Priority = Priority.NORMAL,
+        prefix: Optional[str] = None,
+        tier: Optional[ModelTier] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream the raw text of a JSON response
+
+        Mirrors generate_json(): a cached response is replayed as a single
+        chunk. A fresh one is cached only if the stream finished on its own
+        (not cut off or truncated) and the raw text is valid JSON.
+        """
+        json_instruction = "\n\nIMPORTANT: Return ONLY valid JSON, no additional text or explanation."
+        full_prompt = prompt + json_instruction
+
+        if model is None:
+            model = self.model_for_tier(tier)
+        temperature = 0.3
+
+        cache_key = None
+        if use_cache and self.cache is not None:
+            cache_key = self.cache.make_key((prefix or "") + prompt, model, temperature, system_prompt, provider="ollama")
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                yield json.dumps(cached)
+                return
+
+        budget = max_tokens or estimate_output_budget((prefix or "") + full_prompt)
+        context = await self._prefix_context(prefix, model, system_prompt, priority) if prefix else None
+        if prefix and context is None:
+            full_prompt = prefix + full_prompt
+
+        chunks = []
+        finish: Dict[str, Any] = {}
+        async for delta in self.generate_stream(
             prompt=full_prompt,
             model=model,
             system_prompt=system_prompt,
-            temperature=0.3  # Lower temperature for more consistent JSON
-        )
+            temperature=temperature,
+            max_tokens=budget,
+            priority=priority,
+            context=context,
+            capture=finish,
+            raw=context is not None  # Continue the primed prefix text in the same turn
+        ):
+            chunks.append(delta)
+            yield delta
 
-        # Extract JSON from response (in case LLM adds extra text)
-        try:
-            # Try to parse directly first
-            return json.loads(response)
-        except json.JSONDecodeError:
-            # Try to find JSON in the response
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
-            else:
-                raise Exception(f"Failed to parse JSON from LLM response: {response[:200]}")
+        if cache_key is not None:
+            if finish.get("truncated") is not False:
+                print(f"[LLM] Streamed response not cached: stream did not finish normally")
+                return
+            try:
+                parsed = json.loads("".join(chunks))
+            except json.JSONDecodeError as e:
+                print(f"[LLM] Streamed response not cached: {str(e)}")
+                return
+            if is_cacheable(parsed, True):
+                self.cache.set(cache_key, parsed)
 
     async def check_health(self) -> bool:
         """
@@ -106,9 +445,8 @@ class LLMService:
         Phase 1 Implementation
         """
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                response = await client.get(f"{self.base_url}/api/tags")
-                return response.status_code == 200
+            response = await ollama_request("GET", "/api/tags", timeout=5.0)
+            return response.status_code == 200
         except Exception:
             return False
 
@@ -119,10 +457,9 @@ class LLMService:
         Phase 1 Implementation
         """
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                response = await client.get(f"{self.base_url}/api/tags")
-                response.raise_for_status()
-                data = response.json()
-                return [model.get("name", "") for model in data.get("models", [])]
+            response = await ollama_request("GET", "/api/tags", timeout=5.0)
+            response.raise_for_status()
+            data = response.json()
+            return [model.get("name", "") for model in data.get("models", [])]
         except Exception:
             return []
@@ -3,13 +3,18 @@ Mermaid Service
 Generates Mermaid diagram code
 """
 
-from typing import Dict, Any
+from typing import Union
+from models.metamodel import Metamodel, Entity, Relationship
+from services.fingerprint_memo import get_fingerprint_memo
 
 
 class MermaidService:
     """Service for Mermaid diagram code generation"""
 
-    def generate_code(self, metamodel: Dict[str, Any]) -> str:
+    def __init__(self):
+        self.memo = get_fingerprint_memo("mermaid")
+
+    def generate_code(self, metamodel: Metamodel) -> str:
         """
         Generate Mermaid code from metamodel
 
@@ -22,56 +27,68 @@ class MermaidService:
                 +VARCHAR name
             }
             Student "1" --> "*" Application
+
+        Memoized by ordered metamodel fingerprint.
         """
-        lines = ["classDiagram"]
+        key = metamodel.ordered_fingerprint()
+        code = self.memo.get(key)
+        if code is not None:
+            return code
 
-        entities = metamodel.get("entities", [])
-        relationships = metamodel.get("relationships", [])
+        lines = ["classDiagram"]
 
         # Generate entity classes
-        for entity in entities:
-            lines.append(f"    class {entity['name']} {{")
-
-            for attr in entity.get("attributes", []):
-                # Format: +TYPE name
-                type_str = attr.get("data_type", "VARCHAR")
-                if attr.get("length"):
-                    type_str += f"({attr['length']})"
-
-                markers = []
-                if attr.get("is_primary_key"):
-                    markers.append("PK")
-                if attr.get("is_foreign_key"):
-                    markers.append("FK")
-                if attr.get("is_unique"):
-                    markers.append("UNIQUE")
-
-                marker_str = f" <<{','.join(markers)}>>" if markers else ""
-                lines.append(f"        +{type_str} {attr['name']}{marker_str}")
-
-            lines.append("    }")
+        for entity in metamodel.entities:
+            lines.append(self._format_entity(entity))
             lines.append("")
 
         # Generate relationships
-        for rel in relationships:
-            cardinality_map = self._map_cardinality(rel.get("cardinality", "one_to_many"))
-            source = rel.get("source_entity", "")
-            target = rel.get("target_entity", "")
-            name = rel.get("name", "")
+        for rel in metamodel.relationships:
+            lines.append(self._format_relationship(rel))
 
-            lines.append(f"    {source} {cardinality_map} {target} : {name}")
+        code = "\n".join(lines)
+        self.memo.set(key, code)
+        return code
 
-        return "\n".join(lines)
+    def generate_fragment(self, item: Union[Entity, Relationship], kind: str) -> str:
+        """
+        Generate the Mermaid lines for a single entity or relationship
+
+        Used when streaming a diagram piece by piece, before the full
+        metamodel is known.
+        """
+        if kind == "entity":
+            return self._format_entity(item)
+        return self._format_relationship(item)
 
-    def _format_entity(self, entity: Dict) -> str:
+    def _format_entity(self, entity: Entity) -> str:
         """Format single entity in Mermaid syntax"""
-        # Implemented in generate_code
-        return ""
+        lines = [f"    class {entity.name} {{"]
+
+        for attr in entity.attributes:
+            # Format: +TYPE name
+            type_str = attr.data_type.value
+            if attr.length:
+                type_str += f"({attr.length})"
+
+            markers = []
+            if attr.is_primary_key:
+                markers.append("PK")
+            if attr.is_foreign_key:
+                markers.append("FK")
+            if attr.is_unique:
+                markers.append("UNIQUE")
+
+            marker_str = f" <<{','.join(markers)}>>" if markers else ""
+            lines.append(f"        +{type_str} {attr.name}{marker_str}")
+
+        lines.append("    }")
+        return "\n".join(lines)
 
-    def _format_relationship(self, relationship: Dict) -> str:
+    def _format_relationship(self, relationship: Relationship) -> str:
         """Format relationship in Mermaid syntax"""
-        # Implemented in generate_code
-        return ""
+        cardinality_map = self._map_cardinality(relationship.cardinality.value)
+        return f"    {relationship.source_entity} {cardinality_map} {relationship.target_entity} : {relationship.name}"
 
     def _map_cardinality(self, cardinality: str) -> str:
         """Map internal cardinality to Mermaid notation"""
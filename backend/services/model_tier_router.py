@@ -0,0 +1,154 @@
+"""
+Model Tier Router
+Sends simple prompts to the small model and complex schemas to the large one
+"""
+
+from collections import OrderedDict, deque
+from enum import Enum
+from typing import Any, Dict, Optional
+import time
+from config import settings
+
+
+class ModelTier(str, Enum):
+    """Model size class of an LLM call"""
+    SMALL = "small"  # Fast model (secondary_model of each service)
+    LARGE = "large"  # Accurate model (primary_model of each service)
+
+
+class ModelTierRouter:
+    """
+    Chooses a model tier per prompt from the real-time validator's signals
+
+    Complexity is a weighted score in [0, 1] of the detected entity
+    count, relationship count and prompt length, each saturating at its
+    scale; prompts scoring at least `threshold` go to the large model.
+    Follow-ups in a session keep the session's first tier, since provider
+    conversation state is model-specific.
+    """
+
+    # Weights of the entity, relationship and length signals
+    WEIGHTS = (0.5, 0.3, 0.2)
+
+    def __init__(
+        self,
+        validator: Any,
+        threshold: float,
+        entity_scale: int,
+        relationship_scale: int,
+        length_scale: int,
+        max_sessions: int = 256
+    ):
+        self.validator = validator
+        self.threshold = threshold
+        self.entity_scale = max(1, entity_scale)
+        self.relationship_scale = max(1, relationship_scale)
+        self.length_scale = max(1, length_scale)
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, ModelTier]" = OrderedDict()
+        self._recent: deque = deque(maxlen=50)
+        self.stats = {
+            tier.value: {"decisions": 0, "calls": 0, "call_ms_total": 0.0}
+            for tier in ModelTier
+        }
+        self.decision_ms_total = 0.0
+
+    def score(self, prompt: str) -> Dict[str, Any]:
+        """Complexity score and the signals it was computed from"""
+        detected = self.validator.analyze_prompt_realtime(prompt)["detected"]
+        signals = {
+            "entities": len(detected["entities"]),
+            "relationships": len(detected["relationships"]),
+            "length": len(prompt),
+        }
+        entity_weight, relationship_weight, length_weight = self.WEIGHTS
+        complexity = (
+            entity_weight * min(1.0, signals["entities"] / self.entity_scale)
+            + relationship_weight * min(1.0, signals["relationships"] / self.relationship_scale)
+            + length_weight * min(1.0, signals["length"] / self.length_scale)
+        )
+        return {"complexity": round(complexity, 3), "signals": signals}
+
+    def route(self, prompt: str, session_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Decide the tier of a prompt
+
+        Returns {"tier", "complexity", "signals", "decision_ms", "sticky"};
+        pass it to record_call() once the LLM call finishes.
+        """
+        start = time.perf_counter()
+        scored = self.score(prompt)
+        tier = ModelTier.LARGE if scored["complexity"] >= self.threshold else ModelTier.SMALL
+
+        sticky = False
+        if session_id:
+            if session_id in self._sessions:
+                tier, sticky = self._sessions[session_id], True
+                self._sessions.move_to_end(session_id)
+            else:
+                self._sessions[session_id] = tier
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+
+        decision_ms = (time.perf_counter() - start) * 1000
+        self.stats[tier.value]["decisions"] += 1
+        self.decision_ms_total += decision_ms
+        return {**scored, "tier": tier, "decision_ms": round(decision_ms, 3), "sticky": sticky}
+
+    def record_call(self, decision: Dict[str, Any], call_ms: float, ok: bool = True):
+        """Record the latency of the LLM call made for a decision"""
+        tier = decision["tier"]
+        self.stats[tier.value]["calls"] += 1
+        self.stats[tier.value]["call_ms_total"] += call_ms
+        self._recent.append({
+            "tier": tier.value,
+            "complexity": decision["complexity"],
+            "signals": decision["signals"],
+            "decision_ms": decision["decision_ms"],
+            "call_ms": round(call_ms, 1),
+            "ok": ok,
+        })
+
+    def get_stats(self) -> Dict[str, Any]:
+        decisions = sum(stats["decisions"] for stats in self.stats.values())
+        tiers = {}
+        for tier, stats in self.stats.items():
+            tiers[tier] = {
+                "decisions": stats["decisions"],
+                "calls": stats["calls"],
+                "avg_call_ms": round(stats["call_ms_total"] / stats["calls"], 1) if stats["calls"] else 0.0,
+            }
+        return {
+            "enabled": True,
+            "threshold": self.threshold,
+            "tiers": tiers,
+            "avg_decision_ms": round(self.decision_ms_total / decisions, 3) if decisions else 0.0,
+            "recent": list(self._recent)[-10:],
+        }
+
+
+_router: Optional[ModelTierRouter] = None
+
+
+def get_model_tier_router() -> Optional[ModelTierRouter]:
+    """Get the tier router, or None when MODEL_TIERING_ENABLED is off"""
+    global _router
+    if not settings.MODEL_TIERING_ENABLED:
+        return None
+    if _router is None:
+        # Imported here: the validator module imports the LLM services, which import ModelTier
+        from .realtime_validator import RealtimeValidator
+        _router = ModelTierRouter(
+            RealtimeValidator(),
+            threshold=settings.MODEL_TIER_THRESHOLD,
+            entity_scale=settings.MODEL_TIER_ENTITY_SCALE,
+            relationship_scale=settings.MODEL_TIER_RELATIONSHIP_SCALE,
+            length_scale=settings.MODEL_TIER_LENGTH_SCALE
+        )
+    return _router
+
+
+def get_tier_stats() -> Dict[str, Any]:
+    """Routing stats (for /llm/stats)"""
+    router = get_model_tier_router()
+    return router.get_stats() if router else {"enabled": False}
@@ -0,0 +1,154 @@
+"""
+Model Warm-up Manager
+Preloads Ollama models and keeps them resident between requests
+"""
+
+from typing import Any, Dict, List, Optional, Set
+from datetime import datetime, timezone
+import asyncio
+import time
+import httpx
+from config import settings
+from .ollama_client import ollama_request
+
+
+def model_runtime_options(model: str) -> Dict[str, Any]:
+    """
+    keep_alive and options every request for model must carry
+
+    Ollama reloads a model whose num_ctx changes, so warm-up and regular
+    generations have to send identical values.
+    """
+    num_ctx = {
+        settings.OLLAMA_MODEL_PRIMARY: settings.OLLAMA_NUM_CTX_PRIMARY,
+        settings.OLLAMA_MODEL_SECONDARY: settings.OLLAMA_NUM_CTX_SECONDARY,
+    }.get(model)
+
+    runtime: Dict[str, Any] = {"keep_alive": settings.OLLAMA_KEEP_ALIVE, "options": {}}
+    if num_ctx:
+        runtime["options"]["num_ctx"] = num_ctx
+    return runtime
+
+
+class ModelWarmupManager:
+    """
+    Loads the configured Ollama models at startup and re-warms them
+
+    A warm-up is an empty generate request, which makes Ollama load the
+    model and (re)start its keep_alive timer without producing tokens.
+    Models already listed by /api/ps count as warm; the load time of the
+    others is recorded as cold-start latency.
+    """
+
+    def __init__(self, models: List[str], rewarm_interval: float):
+        # Keep order, drop duplicates (primary and secondary may be the same)
+        self.models = list(dict.fromkeys(models))
+        self.rewarm_interval = rewarm_interval
+        self._task: Optional[asyncio.Task] = None
+        self.status: Dict[str, Dict[str, Any]] = {
+            model: {
+                "state": "cold",
+                "warmups": 0,
+                "cold_start_ms": None,
+                "warm_start_ms": None,
+                "load_ms": None,
+                "last_warmed": None,
+                "last_error": None,
+            }
+            for model in self.models
+        }
+
+    async def start(self):
+        """Warm every model in the background, then re-warm on a schedule"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await self.warm_all()
+            await asyncio.sleep(self.rewarm_interval)
+
+    async def warm_all(self):
+        """Warm models one at a time (loading two large models at once thrashes memory)"""
+        loaded = await self._loaded_models()
+        for model in self.models:
+            await self.warm(model, already_loaded=model in loaded if loaded is not None else None)
+
+    async def _loaded_models(self) -> Optional[Set[str]]:
+        """Names of models currently in memory, or None if /api/ps is unavailable"""
+        try:
+            response = await ollama_request("GET", "/api/ps", timeout=5.0)
+            response.raise_for_status()
+            return {m.get("name", "") for m in response.json().get("models", [])}
+        except (httpx.HTTPError, ValueError):
+            return None
+
+    async def warm(self, model: str, already_loaded: Optional[bool] = None):
+        """Load model (or refresh its keep_alive) and record the latency"""
+        status = self.status[model]
+        previous_state = status["state"]
+        status["state"] = "warming"
+
+        payload = {"model": model, "prompt": "", "stream": False, **model_runtime_options(model)}
+        start = time.perf_counter()
+        try:
+            # Loading a 70B model on CPU can take minutes
+            response = await ollama_request("POST", "/api/generate", json=payload, timeout=600.0)
+            response.raise_for_status()
+            result = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            status["state"] = "failed"
+            status["last_error"] = str(e)
+            print(f"[WARMUP] {model} warm-up failed: {str(e)}")
+            return
+
+        elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+        load_ms = round(result.get("load_duration", 0) / 1e6, 1)
+        # Without /api/ps, a noticeable load_duration means the model was not resident
+        cold = (not already_loaded) if already_loaded is not None else load_ms > 500
+
+        status.update(
+            state="warm",
+            warmups=status["warmups"] + 1,
+            load_ms=load_ms,
+            last_warmed=datetime.now(timezone.utc).isoformat(),
+            last_error=None,
+        )
+        status["cold_start_ms" if cold else "warm_start_ms"] = elapsed_ms
+        if cold or previous_state != "warm":
+            print(f"[WARMUP] {model} {'cold' if cold else 'warm'} start in {elapsed_ms} ms (load {load_ms} ms)")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "keep_alive": settings.OLLAMA_KEEP_ALIVE,
+            "rewarm_interval_s": self.rewarm_interval,
+            "models": {model: dict(status) for model, status in self.status.items()},
+        }
+
+
+_manager: Optional[ModelWarmupManager] = None
+
+
+def get_warmup_manager() -> ModelWarmupManager:
+    """Get the process-wide warm-up manager for the configured Ollama models"""
+    global _manager
+    if _manager is None:
+        _manager = ModelWarmupManager(
+            [settings.OLLAMA_MODEL_PRIMARY, settings.OLLAMA_MODEL_SECONDARY],
+            settings.OLLAMA_REWARM_INTERVAL
+        )
+    return _manager
+
+
+def get_warmup_stats() -> Dict[str, Any]:
+    """Warm-up stats, or {"enabled": False} if the manager never started"""
+    return _manager.get_stats() if _manager is not None else {"enabled": False}
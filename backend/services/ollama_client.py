@@ -0,0 +1,116 @@
+"""
+Ollama HTTP Client
+Process-wide pooled httpx client shared by every LLMService instance
+"""
+
+from typing import Optional, Dict, Any, AsyncIterator
+import importlib.util
+import json
+import httpx
+from config import settings
+
+
+_client: Optional[httpx.AsyncClient] = None
+_stats = {
+    "requests": 0,
+    "in_flight": 0,
+    "errors": 0,
+    "clients_created": 0,
+}
+
+
+def _http2_available() -> bool:
+    """HTTP/2 needs the optional 'h2' package"""
+    return importlib.util.find_spec("h2") is not None
+
+
+def get_ollama_client() -> httpx.AsyncClient:
+    """
+    Get the shared Ollama client, creating it on first use
+
+    Normally created at app startup; lazy creation covers scripts and
+    tests that use LLMService without running the FastAPI lifecycle.
+    """
+    global _client
+
+    if _client is None or _client.is_closed:
+        http2 = settings.OLLAMA_HTTP2
+        if http2 and not _http2_available():
+            print("[OLLAMA] WARN: OLLAMA_HTTP2 is set but 'h2' is not installed - using HTTP/1.1")
+            http2 = False
+
+        _client = httpx.AsyncClient(
+            base_url=settings.OLLAMA_BASE_URL,
+            http2=http2,
+            timeout=httpx.Timeout(settings.OLLAMA_TIMEOUT, connect=5.0),
+            limits=httpx.Limits(
+                max_connections=settings.OLLAMA_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.OLLAMA_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.OLLAMA_KEEPALIVE_EXPIRY
+            )
+        )
+        _stats["clients_created"] += 1
+        print(f"[OLLAMA] Shared HTTP client created (http2={http2})")
+
+    return _client
+
+
+async def close_ollama_client():
+    """Close the shared client (called at app shutdown)"""
+    global _client
+
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+
+
+async def ollama_request(method: str, path: str, **kwargs) -> httpx.Response:
+    """Send a request through the shared client, tracking pool usage"""
+    client = get_ollama_client()
+    _stats["requests"] += 1
+    _stats["in_flight"] += 1
+    try:
+        return await client.request(method, path, **kwargs)
+    except httpx.HTTPError:
+        _stats["errors"] += 1
+        raise
+    finally:
+        _stats["in_flight"] -= 1
+
+
+async def ollama_stream(method: str, path: str, **kwargs) -> AsyncIterator[Dict[str, Any]]:
+    """Send a streaming request and yield each NDJSON message Ollama returns"""
+    client = get_ollama_client()
+    _stats["requests"] += 1
+    _stats["in_flight"] += 1
+    try:
+        async with client.stream(method, path, **kwargs) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line.strip():
+                    yield json.loads(line)
+    except httpx.HTTPError:
+        _stats["errors"] += 1
+        raise
+    finally:
+        _stats["in_flight"] -= 1
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Request counters and connection pool occupancy"""
+    stats: Dict[str, Any] = {
+        **_stats,
+        "open": _client is not None and not _client.is_closed,
+        "http2": settings.OLLAMA_HTTP2 and _http2_available(),
+        "max_connections": settings.OLLAMA_MAX_CONNECTIONS,
+        "max_keepalive_connections": settings.OLLAMA_MAX_KEEPALIVE_CONNECTIONS,
+    }
+
+    # httpx does not expose pool state publicly; read it from httpcore if present
+    pool = getattr(getattr(_client, "_transport", None), "_pool", None)
+    connections = getattr(pool, "connections", None)
+    if connections is not None:
+        stats["connections"] = len(connections)
+        stats["idle_connections"] = sum(1 for conn in connections if conn.is_idle())
+
+    return stats
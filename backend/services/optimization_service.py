@@ -4,9 +4,10 @@ Analyzes database schemas and provides optimization suggestions
 """
 
 from typing import Dict, Any, List
-from models.metamodel import Metamodel
+from models.metamodel import Metamodel, CardinalityType
 import os
 from services.llm_service import LLMService
+from services.fingerprint_memo import get_fingerprint_memo
 
 
 class OptimizationService:
@@ -14,8 +15,9 @@ class OptimizationService:
 
     def __init__(self):
         self.llm = LLMService()
+        self.memo = get_fingerprint_memo("optimization")
 
-    def analyze_schema(self, metamodel: Dict[str, Any]) -> Dict[str, Any]:
+    def analyze_schema(self, metamodel: Metamodel) -> Dict[str, Any]:
         """
         Analyze schema and provide optimization suggestions
 
@@ -25,7 +27,22 @@ class OptimizationService:
         - Data types
         - Security
         - Performance
+
+        Reports are memoized by ordered metamodel fingerprint; each call gets its own copy.
         """
+        key = metamodel.ordered_fingerprint()
+        suggestions = self.memo.get(key)
+        if suggestions is None:
+            suggestions = self._build_report(metamodel)
+            self.memo.set(key, suggestions)
+        # Suggestions are flat dicts of strings, so copying one level deep is enough
+        return {
+            name: [dict(item) for item in value] if isinstance(value, list) else value
+            for name, value in suggestions.items()
+        }
+
+    def _build_report(self, metamodel: Metamodel) -> Dict[str, Any]:
+        """Run every analysis and score the schema"""
         suggestions = {
             "index_suggestions": self._analyze_indexes(metamodel),
             "normalization_suggestions": self._analyze_normalization(metamodel),
@@ -52,75 +69,71 @@ class OptimizationService:
 
         return suggestions
 
-    def _analyze_indexes(self, metamodel: Dict[str, Any]) -> List[Dict[str, str]]:
+    def _analyze_indexes(self, metamodel: Metamodel) -> List[Dict[str, str]]:
         """Suggest indexes for foreign keys and frequently queried columns"""
         suggestions = []
-        entities = metamodel.get("entities", [])
 
-        for entity in entities:
-            for attr in entity.get("attributes", []):
+        for entity in metamodel.entities:
+            for attr in entity.attributes:
                 # Suggest index for foreign keys
-                if attr.get("is_foreign_key") and not attr.get("is_primary_key"):
+                if attr.is_foreign_key and not attr.is_primary_key:
                     suggestions.append({
                         "type": "index",
                         "severity": "medium",
-                        "entity": entity["name"],
-                        "column": attr["name"],
-                        "suggestion": f"Add index on {entity['name']}.{attr['name']} for better JOIN performance",
-                        "code": f"CREATE INDEX idx_{entity['name']}_{attr['name']} ON {entity['name']}({attr['name']});"
+                        "entity": entity.name,
+                        "column": attr.name,
+                        "suggestion": f"Add index on {entity.name}.{attr.name} for better JOIN performance",
+                        "code": f"CREATE INDEX idx_{entity.name}_{attr.name} ON {entity.name}({attr.name});"
                     })
 
                 # Suggest index for unique columns
-                if attr.get("is_unique") and not attr.get("is_primary_key"):
+                if attr.is_unique and not attr.is_primary_key:
                     suggestions.append({
                         "type": "index",
                         "severity": "low",
-                        "entity": entity["name"],
-                        "column": attr["name"],
-                        "suggestion": f"Consider unique index on {entity['name']}.{attr['name']}",
-                        "code": f"CREATE UNIQUE INDEX idx_{entity['name']}_{attr['name']} ON {entity['name']}({attr['name']});"
+                        "entity": entity.name,
+                        "column": attr.name,
+                        "suggestion": f"Consider unique index on {entity.name}.{attr.name}",
+                        "code": f"CREATE UNIQUE INDEX idx_{entity.name}_{attr.name} ON {entity.name}({attr.name});"
                     })
 
         return suggestions
 
-    def _analyze_normalization(self, metamodel: Dict[str, Any]) -> List[Dict[str, str]]:
+    def _analyze_normalization(self, metamodel: Metamodel) -> List[Dict[str, str]]:
         """Check for normalization issues"""
         suggestions = []
-        entities = metamodel.get("entities", [])
 
-        for entity in entities:
-            attrs = entity.get("attributes", [])
+        for entity in metamodel.entities:
+            attrs = entity.attributes
 
             # Check if entity has too many columns (denormalized)
             if len(attrs) > 15:
                 suggestions.append({
                     "type": "normalization",
                     "severity": "medium",
-                    "entity": entity["name"],
-                    "suggestion": f"{entity['name']} has {len(attrs)} columns. Consider splitting into multiple related tables.",
+                    "entity": entity.name,
+                    "suggestion": f"{entity.name} has {len(attrs)} columns. Consider splitting into multiple related tables.",
                 })
 
             # Check for missing primary key
-            has_pk = any(attr.get("is_primary_key") for attr in attrs)
-            if not has_pk:
+            if entity.get_primary_key() is None:
                 suggestions.append({
                     "type": "normalization",
                     "severity": "high",
-                    "entity": entity["name"],
-                    "suggestion": f"{entity['name']} is missing a primary key. Add an 'id' column.",
+                    "entity": entity.name,
+                    "suggestion": f"{entity.name} is missing a primary key. Add an 'id' column.",
                 })
 
         return suggestions
 
-    def _analyze_datatypes(self, metamodel: Dict[str, Any]) -> List[Dict[str, str]]:
+    def _analyze_datatypes(self, metamodel: Metamodel) -> List[Dict[str, str]]:
         """Suggest better data types"""
         suggestions = []
-        entities = metamodel.get("entities", [])
 
-        for entity in entities:
-            for attr in entity.get("attributes", []):
-                attr_name = attr["name"].lower()
-                data_type = attr.get("data_type", "")
+        for entity in metamodel.entities:
+            for attr in entity.attributes:
+                attr_name = attr.name.lower()
+                data_type = attr.data_type.value
 
                 # Suggest TIMESTAMP for created_at/updated_at
                 if "created" in attr_name or "updated" in attr_name or "deleted" in attr_name:
@@ -128,19 +141,19 @@ class OptimizationService:
                         suggestions.append({
                             "type": "datatype",
                             "severity": "low",
-                            "entity": entity["name"],
-                            "column": attr["name"],
-                            "suggestion": f"Use TIMESTAMP for {attr['name']} instead of {data_type}",
+                            "entity": entity.name,
+                            "column": attr.name,
+                            "suggestion": f"Use TIMESTAMP for {attr.name} instead of {data_type}",
                         })
 
                 # Suggest VARCHAR with length for text columns
-                if data_type == "VARCHAR" and not attr.get("length"):
+                if data_type == "VARCHAR" and not attr.length:
                     suggestions.append({
                         "type": "datatype",
                         "severity": "medium",
-                        "entity": entity["name"],
-                        "column": attr["name"],
-                        "suggestion": f"Specify length for VARCHAR column {attr['name']} (e.g., VARCHAR(255))",
+                        "entity": entity.name,
+                        "column": attr.name,
+                        "suggestion": f"Specify length for VARCHAR column {attr.name} (e.g., VARCHAR(255))",
                     })
 
                 # Suggest TEXT for long content
@@ -149,29 +162,28 @@ class OptimizationService:
                         suggestions.append({
                             "type": "datatype",
                             "severity": "low",
-                            "entity": entity["name"],
-                            "column": attr["name"],
-                            "suggestion": f"Consider TEXT type for {attr['name']} to store longer content",
+                            "entity": entity.name,
+                            "column": attr.name,
+                            "suggestion": f"Consider TEXT type for {attr.name} to store longer content",
                         })
 
         return suggestions
 
-    def _analyze_security(self, metamodel: Dict[str, Any]) -> List[Dict[str, str]]:
+    def _analyze_security(self, metamodel: Metamodel) -> List[Dict[str, str]]:
         """Check for security issues"""
         suggestions = []
-        entities = metamodel.get("entities", [])
 
-        for entity in entities:
-            for attr in entity.get("attributes", []):
-                attr_name = attr["name"].lower()
+        for entity in metamodel.entities:
+            for attr in entity.attributes:
+                attr_name = attr.name.lower()
 
                 # Check for password field without hashing note
                 if "password" in attr_name or "passwd" in attr_name:
                     suggestions.append({
                         "type": "security",
                         "severity": "high",
-                        "entity": entity["name"],
-                        "column": attr["name"],
+                        "entity": entity.name,
+                        "column": attr.name,
                         "suggestion": f"IMPORTANT: Hash passwords before storing. Never store plain text passwords!",
                         "recommendation": "Use bcrypt, Argon2, or similar for password hashing"
                     })
@@ -181,9 +193,9 @@ class OptimizationService:
                     suggestions.append({
                         "type": "security",
                         "severity": "high",
-                        "entity": entity["name"],
-                        "column": attr["name"],
-                        "suggestion": f"Encrypt sensitive data in {attr['name']} at rest and in transit",
+                        "entity": entity.name,
+                        "column": attr.name,
+                        "suggestion": f"Encrypt sensitive data in {attr.name} at rest and in transit",
                         "recommendation": "Consider using database encryption or application-level encryption"
                     })
 
@@ -192,47 +204,50 @@ class OptimizationService:
                     suggestions.append({
                         "type": "security",
                         "severity": "low",
-                        "entity": entity["name"],
-                        "column": attr["name"],
-                        "suggestion": f"Add email validation constraint on {attr['name']}",
+                        "entity": entity.name,
+                        "column": attr.name,
+                        "suggestion": f"Add email validation constraint on {attr.name}",
                         "recommendation": "Use CHECK constraint or application-level validation"
                     })
 
         return suggestions
 
-    def _analyze_performance(self, metamodel: Dict[str, Any]) -> List[Dict[str, str]]:
+    def _analyze_performance(self, metamodel: Metamodel) -> List[Dict[str, str]]:
         """Performance optimization suggestions"""
         suggestions = []
-        entities = metamodel.get("entities", [])
-        relationships = metamodel.get("relationships", [])
 
         # Check for many-to-many relationships without junction table
-        for rel in relationships:
-            if rel.get("cardinality") == "many_to_many":
+        # (a junction matches if its name occurs in a lowercased entity name;
+        # substrings of each needed length are indexed once, not searched per relationship)
+        entity_names_lower = [entity.name.lower() for entity in metamodel.entities]
+        substrings_by_length: Dict[int, set] = {}
+        for rel in metamodel.relationships:
+            if rel.cardinality == CardinalityType.MANY_TO_MANY:
                 # Should have a junction table
-                junction_found = False
-                for entity in entities:
-                    if f"{rel['source_entity']}_{rel['target_entity']}" in entity["name"].lower():
-                        junction_found = True
-                        break
+                junction_name = f"{rel.source_entity}_{rel.target_entity}"
+                size = len(junction_name)
+                if size not in substrings_by_length:
+                    substrings_by_length[size] = {
+                        name[i:i + size] for name in entity_names_lower for i in range(len(name) - size + 1)
+                    }
+                junction_found = junction_name in substrings_by_length[size]
 
                 if not junction_found:
                     suggestions.append({
                         "type": "performance",
                         "severity": "medium",
-                        "suggestion": f"Create junction table for many-to-many relationship between {rel['source_entity']} and {rel['target_entity']}",
-                        "recommendation": f"Create table {rel['source_entity']}_{rel['target_entity']} with foreign keys to both tables"
+                        "suggestion": f"Create junction table for many-to-many relationship between {rel.source_entity} and {rel.target_entity}",
+                        "recommendation": f"Create table {rel.source_entity}_{rel.target_entity} with foreign keys to both tables"
                     })
 
         # Check for circular dependencies
-        entity_names = [e["name"] for e in entities]
-        for rel in relationships:
-            if rel["source_entity"] == rel["target_entity"]:
+        for rel in metamodel.relationships:
+            if rel.source_entity == rel.target_entity:
                 suggestions.append({
                     "type": "performance",
                     "severity": "low",
-                    "entity": rel["source_entity"],
-                    "suggestion": f"Self-referencing relationship in {rel['source_entity']}. Ensure proper indexes to avoid slow queries.",
+                    "entity": rel.source_entity,
+                    "suggestion": f"Self-referencing relationship in {rel.source_entity}. Ensure proper indexes to avoid slow queries.",
                 })
 
         return suggestions
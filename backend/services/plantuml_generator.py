@@ -5,11 +5,15 @@ Generates PlantUML class diagrams from metamodel
 
 from typing import Dict, Any
 from models.metamodel import Metamodel, Entity, Relationship, DataType
+from services.fingerprint_memo import get_fingerprint_memo
 
 
 class PlantUMLGenerator:
     """Generates PlantUML diagrams from metamodel"""
 
+    def __init__(self):
+        self.memo = get_fingerprint_memo("plantuml")
+
     def generate(self, metamodel: Metamodel) -> str:
         """
         Generate PlantUML class diagram from metamodel
@@ -18,8 +22,13 @@ class PlantUMLGenerator:
             metamodel: The database metamodel
 
         Returns:
-            PlantUML diagram code as string
+            PlantUML diagram code as string (memoized by ordered metamodel fingerprint)
         """
+        key = (metamodel.ordered_fingerprint(), "plain")
+        code = self.memo.get(key)
+        if code is not None:
+            return code
+
         lines = ["@startuml"]
         lines.append("")
 
@@ -41,7 +50,9 @@ class PlantUMLGenerator:
         lines.append("")
         lines.append("@enduml")
 
-        return "\n".join(lines)
+        code = "\n".join(lines)
+        self.memo.set(key, code)
+        return code
 
     def _generate_entity(self, entity: Entity) -> list:
         """Generate PlantUML class definition for an entity"""
@@ -128,24 +139,22 @@ class PlantUMLGenerator:
         - Entities with many relationships: Blue
         - Entities with few relationships: Green
         - Junction tables (many-to-many): Yellow
+
+        Memoized by ordered metamodel fingerprint.
         """
+        key = (metamodel.ordered_fingerprint(), "colors")
+        code = self.memo.get(key)
+        if code is not None:
+            return code
+
         lines = ["@startuml"]
         lines.append("")
         lines.append("skinparam classAttributeIconSize 0")
         lines.append("")
 
-        # Count relationships for each entity
-        relationship_counts = {}
-        for entity in metamodel.entities:
-            count = sum(
-                1 for rel in metamodel.relationships
-                if rel.source_entity == entity.name or rel.target_entity == entity.name
-            )
-            relationship_counts[entity.name] = count
-
-        # Generate colored classes
+        # Generate colored classes (relationship counts come from the adjacency index)
         for entity in metamodel.entities:
-            count = relationship_counts.get(entity.name, 0)
+            count = metamodel.relationship_count(entity.name)
 
             # Determine color
             if count >= 5:
@@ -172,4 +181,6 @@ class PlantUMLGenerator:
         lines.append("")
         lines.append("@enduml")
 
-        return "\n".join(lines)
+        code = "\n".join(lines)
+        self.memo.set(key, code)
+        return code
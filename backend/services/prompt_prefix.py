@@ -0,0 +1,100 @@
+"""
+Prompt Prefix Reuse
+Static template prefixes and conversation contexts shared across LLM calls
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+
+
+def split_template(template: str, placeholder: str = "prompt", **values: Any) -> Tuple[str, str]:
+    """
+    Split a str.format template at its variable slot
+
+    Returns (prefix, body_template): prefix is the formatted static text
+    before {placeholder}; body_template is the rest, still to be formatted
+    with the slot value. prefix + body_template.format(...) equals
+    template.format(...).
+    """
+    marker = "{" + placeholder + "}"
+    index = template.find(marker)
+    if index == -1:
+        return "", template
+    return template[:index].format(**values), template[index:]
+
+
+def _digest(*parts: Any) -> str:
+    return hashlib.sha256(repr(parts).encode("utf-8")).hexdigest()
+
+
+class ConversationStore:
+    """
+    Bounded LRU of provider state keyed by prefix or session
+
+    Holds two kinds of entries:
+      - prefix entries: the processed form of a static prompt prefix (an
+        Ollama context), keyed by model, prefix and runtime options
+      - session entries: the conversation so far for a session id (an
+        Ollama context or a Groq message history)
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self.stats = {
+            "prefix_hits": 0,
+            "prefix_misses": 0,
+            "session_hits": 0,
+            "session_misses": 0,
+        }
+
+    @staticmethod
+    def prefix_key(model: str, prefix: str, system_prompt: Optional[str], **options: Any) -> str:
+        return "prefix:" + _digest(model, prefix, system_prompt, sorted(options.items()))
+
+    @staticmethod
+    def session_key(provider: str, session_id: str) -> str:
+        return f"session:{provider}:{session_id}"
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self._entries.get(key)
+        kind = "prefix" if key.startswith("prefix:") else "session"
+        if value is None:
+            self.stats[f"{kind}_misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats[f"{kind}_hits"] += 1
+        return value
+
+    def set(self, key: str, value: Any):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def forget(self, key: str):
+        self._entries.pop(key, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "prefixes": sum(1 for key in self._entries if key.startswith("prefix:")),
+            "sessions": sum(1 for key in self._entries if key.startswith("session:")),
+        }
+
+
+_store: Optional[ConversationStore] = None
+
+
+def get_conversation_store() -> ConversationStore:
+    """Get the process-wide prefix/session store"""
+    global _store
+    if _store is None:
+        _store = ConversationStore()
+    return _store
+
+
+def history_messages(history: Optional[List[Dict[str, str]]]) -> List[Dict[str, str]]:
+    """Copy of a stored chat history (never mutate the stored list)"""
+    return [dict(message) for message in history or []]
@@ -4,22 +4,23 @@ Validates and completes user prompts using LLM
 """
 
 from typing import Dict, Any, List, Optional
-from .llm_service import LLMService
-from .fast_llm_service import FastLLMService
+from .llm_provider_router import create_llm_service
+from .model_tier_router import get_model_tier_router
+from models.llm_schemas import PromptValidationOutput
 from config import settings
 import os
+import time
 
 
 class PromptValidator:
     """Service for validating and completing prompts"""
 
     def __init__(self):
-        # Use fast Groq LLM if configured, otherwise fallback to slow Ollama
+        # Groq when configured, else Ollama; fallback providers are opt-in (see LLM_PROVIDERS)
+        self.llm_service = create_llm_service()
         if settings.USE_GROQ and settings.GROQ_API_KEY:
-            self.llm_service = FastLLMService()
             print("[INFO] Using FAST Groq LLM for validation!")
         else:
-            self.llm_service = LLMService()
             print("[WARN] Using slow Ollama LLM - consider setting GROQ_API_KEY for speed")
 
         # Load validation prompt template
@@ -27,6 +28,9 @@ class PromptValidator:
         with open(os.path.join(prompts_dir, "validation_prompt.txt"), "r") as f:
             self.validation_template = f.read()
 
+        # Small model for simple prompts, large one for complex schemas (None = always large)
+        self.tier_router = get_model_tier_router()
+
     async def validate_prompt(
         self,
         prompt: str,
@@ -54,14 +58,21 @@ class PromptValidator:
             domain_hint=domain_hint or "None"
         )
 
+        # The model tier is chosen from the prompt's complexity (see ModelTierRouter)
+        decision = self.tier_router.route(prompt) if self.tier_router else None
+        start = time.perf_counter()
+
         # Get JSON response from LLM
         try:
             result = await self.llm_service.generate_json(
                 prompt=formatted_prompt,
-                model=None  # Use primary model
+                schema=PromptValidationOutput if settings.LLM_STRUCTURED_OUTPUT else None,
+                tier=decision["tier"] if decision else None
             )
+            self._record_tier(decision, start, True)
             return result
         except Exception as e:
+            self._record_tier(decision, start, False)
             # Return a default response if LLM fails
             return {
                 "is_complete": False,
@@ -73,6 +84,10 @@ class PromptValidator:
                 "confidence": 0.0
             }
 
+    def _record_tier(self, decision: Optional[Dict[str, Any]], start: float, ok: bool):
+        if decision is not None:
+            self.tier_router.record_call(decision, (time.perf_counter() - start) * 1000, ok)
+
     async def complete_prompt(
         self,
         prompt: str,
@@ -0,0 +1,150 @@
+"""
+Realtime Analysis Channel
+Per-connection state of the /prompt/ws realtime analysis WebSocket
+"""
+
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+from fastapi import WebSocketDisconnect
+from .realtime_session import RealtimeSession
+from .realtime_validator import RealtimeValidator
+from .sync_engine import SyncEngine
+
+
+_stats = {
+    "connections": 0,
+    "messages": 0,
+    "analyses": 0,
+    "deep_started": 0,
+    "deep_completed": 0,
+    "deep_cancelled": 0,
+    "background_errors": 0,
+}
+
+
+def _log_background_error(task: asyncio.Task):
+    """Done-callback of background tasks: log their failure instead of leaving it unretrieved"""
+    if task.cancelled():
+        return
+    error = task.exception()
+    if error is None or isinstance(error, WebSocketDisconnect):
+        return  # A client that went away is not an error
+    _stats["background_errors"] += 1
+    print(f"[REALTIME] Background task failed: {type(error).__name__}: {str(error)}")
+
+
+class RealtimeChannel:
+    """
+    Debounced local analysis and cancellable deep analysis of one prompt
+
+    Client messages update the text ("text" replaces it, "edits" patch it
+    through a RealtimeSession) and bump the channel version. Local analysis
+    is debounced by the SyncEngine, so a burst of keystrokes produces one
+    "analysis" message for the latest version. A "deep" request runs the
+    LLM analysis in the background; newer text cancels it, since its result
+    would describe a prompt the user no longer has.
+    """
+
+    def __init__(
+        self,
+        validator: RealtimeValidator,
+        send: Callable[[Dict[str, Any]], Awaitable[None]],
+        debounce_delay: float
+    ):
+        self.validator = validator
+        self.send = send
+        self.sync_engine = SyncEngine(debounce_delay)
+        self.version = 0
+        self.text = ""
+        self._session: Optional[RealtimeSession] = None
+        self._deep_task: Optional[asyncio.Task] = None
+        self._deep_version = 0
+        _stats["connections"] += 1
+
+    async def handle(self, message: Dict[str, Any]):
+        """Apply one client message"""
+        _stats["messages"] += 1
+        kind = message.get("type")
+
+        if kind == "text":
+            self.text = str(message.get("prompt", ""))
+            self._session = None  # rebuilt lazily, once per burst
+            await self._text_changed()
+        elif kind == "edits":
+            session = self._current_session()
+            try:
+                self._apply_edits(session, message.get("edits") or [])
+            except (ValueError, TypeError, KeyError) as e:
+                await self.send({"type": "error", "version": self.version, "detail": f"Invalid edits: {str(e)}"})
+                return
+            self.text = session.text
+            await self._text_changed()
+        elif kind == "deep":
+            self._start_deep()
+        else:
+            await self.send({"type": "error", "version": self.version, "detail": f"Unknown message type: {kind}"})
+
+    @staticmethod
+    def _apply_edits(session: RealtimeSession, edits: List[Dict[str, Any]]):
+        # Check the whole batch first so a bad edit leaves the text unchanged
+        length = len(session.text)
+        for edit in edits:
+            offset, deleted = int(edit["offset"]), int(edit.get("deleted", 0))
+            if offset < 0 or deleted < 0 or offset + deleted > length:
+                raise ValueError(f"offset {offset}, deleted {deleted}, text length {length}")
+            length += len(edit.get("inserted", "")) - deleted
+        for edit in edits:
+            session.apply_edit(int(edit["offset"]), int(edit.get("deleted", 0)), str(edit.get("inserted", "")))
+
+    def _current_session(self) -> RealtimeSession:
+        if self._session is None:
+            self._session = RealtimeSession("ws", self.validator, self.text)
+        return self._session
+
+    async def _text_changed(self):
+        self.version += 1
+        self.sync_engine.schedule("analysis", self._send_analysis).add_done_callback(_log_background_error)
+        if self._cancel_deep():
+            print(f"[REALTIME] Deep analysis of version {self._deep_version} cancelled by newer text")
+            await self.send({"type": "deep_cancelled", "version": self._deep_version})
+
+    async def _send_analysis(self):
+        _stats["analyses"] += 1
+        snapshot = self._current_session().snapshot()
+        await self.send({"type": "analysis", "version": self.version, **snapshot})
+
+    def _start_deep(self):
+        self._cancel_deep()
+        _stats["deep_started"] += 1
+        self._deep_version = self.version
+        self._deep_task = asyncio.ensure_future(self._run_deep(self.text, self.version))
+        self._deep_task.add_done_callback(_log_background_error)
+
+    async def _run_deep(self, prompt: str, version: int):
+        try:
+            result = await self.validator.analyze_with_llm(prompt)
+        except Exception as e:
+            print(f"[REALTIME] Deep analysis of version {version} failed: {str(e)}")
+            await self.send({"type": "error", "version": version, "detail": f"Deep analysis failed: {str(e)}"})
+            return
+        _stats["deep_completed"] += 1
+        await self.send({"type": "deep", "version": version, "result": result})
+
+    def _cancel_deep(self) -> bool:
+        """Cancel the running deep analysis; True if there was one"""
+        task, self._deep_task = self._deep_task, None
+        if task is None or task.done():
+            return False
+        task.cancel()
+        _stats["deep_cancelled"] += 1
+        return True
+
+    async def close(self):
+        """Stop pending work when the connection goes away"""
+        self.sync_engine.cancel()
+        self._cancel_deep()
+
+
+def get_channel_stats() -> Dict[str, Any]:
+    """WebSocket channel counters (for /llm/stats)"""
+    return dict(_stats)
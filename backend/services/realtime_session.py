@@ -0,0 +1,270 @@
+"""
+Realtime Analysis Sessions
+Incremental keyword analysis of a prompt that is edited in place
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import uuid
+from .realtime_validator import RealtimeValidator
+
+# (start, end, hits relative to start, hit texts) of one combined-regex match
+Phrase = Tuple[int, int, List[Tuple[int, int, int, int]], List[str]]
+# (category rank, pattern index, text) of a keyword
+Keyword = Tuple[int, int, str]
+
+
+class RealtimeSession:
+    """
+    Keyword analysis of one prompt, updated edit by edit
+
+    The matched phrases live in a gap buffer around the last edit:
+    `_before` holds phrases with absolute positions, `_after` holds
+    phrases positioned relative to the end of the text (nearest last), so
+    an edit only touches phrases near it. Each edit rescans the smallest
+    window whose scan state matches the old text's on both sides, giving
+    exactly the hits a full rescan would, at a cost independent of the
+    prompt length for local edits.
+
+    Detections (keyword lists and domain) follow the rules of
+    RealtimeValidator.detections, but come from per-keyword position
+    stacks kept in step with the gap buffer: a phrase's hits are pushed
+    when it enters `_before` or `_after` and popped when it leaves, so an
+    edit only updates the keywords of the phrases it touches, and a
+    keyword's first and last occurrence are always at the ends of its
+    stacks.
+    """
+
+    def __init__(self, session_id: str, validator: RealtimeValidator, text: str = ""):
+        self.session_id = session_id
+        self.validator = validator
+        self.matcher = validator.keyword_matcher
+        self.text = text
+        self.version = 0
+        self._before: List[Phrase] = []
+        self._after: List[Tuple[int, int, List[Tuple[int, int, int, int]], List[str]]] = []  # (distance from end, length, hits, texts)
+        # keyword -> (starts in _before ascending, distances from end in _after, nearest last)
+        self._keywords: Dict[Keyword, Tuple[List[int], List[int]]] = {}
+        for phrase in self._scan(text, 0, len(text)):
+            self._push_before(phrase)
+
+    def _scan(self, text: str, start: int, stop: int) -> List[Phrase]:
+        return [
+            (offset, end, hits, [text[offset + hit_start:offset + hit_end] for _, _, hit_start, hit_end in hits])
+            for offset, end, hits in self.matcher.phrases(text, start, stop)
+        ]
+
+    def _push_before(self, phrase: Phrase):
+        start, _, hits, texts = phrase
+        for (rank, index, hit_start, _), text in zip(hits, texts):
+            self._keywords.setdefault((rank, index, text), ([], []))[0].append(start + hit_start)
+        self._before.append(phrase)
+
+    def _pop_before(self) -> Phrase:
+        phrase = self._before.pop()
+        for (rank, index, _, _), text in zip(phrase[2], phrase[3]):
+            self._release((rank, index, text), 0)
+        return phrase
+
+    def _push_after(self, from_end: int, size: int, hits: List[Tuple[int, int, int, int]], texts: List[str]):
+        # Latest hit first, so the nearest (earliest) occurrence ends up last
+        for (rank, index, hit_start, _), text in reversed(list(zip(hits, texts))):
+            self._keywords.setdefault((rank, index, text), ([], []))[1].append(from_end - hit_start)
+        self._after.append((from_end, size, hits, texts))
+
+    def _pop_after_top(self) -> Tuple[int, int, List[Tuple[int, int, int, int]], List[str]]:
+        entry = self._after.pop()
+        for (rank, index, _, _), text in zip(entry[2], entry[3]):
+            self._release((rank, index, text), 1)
+        return entry
+
+    def _release(self, keyword: Keyword, side: int):
+        positions = self._keywords[keyword]
+        positions[side].pop()
+        if not positions[0] and not positions[1]:
+            del self._keywords[keyword]
+
+    def _move_gap(self, offset: int):
+        """Put phrases that an edit at offset cannot affect in _before, the rest in _after"""
+        reach = self.matcher.max_length
+        length = len(self.text)
+        while self._before and self._before[-1][0] + reach >= offset:
+            start, end, hits, texts = self._pop_before()
+            self._push_after(length - start, end - start, hits, texts)
+        while self._after and length - self._after[-1][0] + reach < offset:
+            from_end, size, hits, texts = self._pop_after_top()
+            start = length - from_end
+            self._push_before((start, start + size, hits, texts))
+
+    def _pop_after(self, limit: int) -> List[Phrase]:
+        """Remove the phrases starting before limit (old positions) from _after"""
+        length = len(self.text)
+        removed = []
+        while self._after and length - self._after[-1][0] < limit:
+            from_end, size, hits, texts = self._pop_after_top()
+            start = length - from_end
+            removed.append((start, start + size, hits, texts))
+        return removed
+
+    def apply_edit(self, offset: int, deleted: int, inserted: str) -> Dict[str, Any]:
+        """
+        Replace text[offset:offset + deleted] with inserted
+
+        Returns the change to apply to the client's highlight list:
+        highlights starting in [window.start, window.end - delta) of the old
+        text are replaced by `highlights`, and those starting at or after
+        window.end - delta move by delta. While the text is too short to
+        analyze there are no highlights, as in a full analysis; an edit
+        into or out of that state replaces the whole list.
+        """
+        if offset < 0 or deleted < 0 or offset + deleted > len(self.text):
+            raise ValueError(
+                f"Edit out of range: offset {offset}, deleted {deleted}, text length {len(self.text)}"
+            )
+
+        reach = self.matcher.max_length
+        self._move_gap(offset)
+        scan_from = max(self._before[-1][1] if self._before else 0, offset - reach - 1, 0)
+
+        old_text = self.text
+        new_text = old_text[:offset] + inserted + old_text[offset + deleted:]
+        delta = len(inserted) - deleted
+
+        # Grow the window until neither scan has a match crossing its end
+        stop = min(len(new_text), offset + len(inserted) + reach + 1)
+        removed = self._pop_after(stop - delta)
+        while True:
+            if removed and removed[-1][1] + delta > stop:
+                stop = removed[-1][1] + delta
+            phrases = self._scan(new_text, scan_from, stop)
+            if phrases and phrases[-1][1] > stop:
+                stop = phrases[-1][1]
+            more = self._pop_after(stop - delta)
+            if not more and not (removed and removed[-1][1] + delta > stop):
+                break
+            removed.extend(more)
+
+        self.text = new_text
+        for phrase in phrases:
+            self._push_before(phrase)
+        self.version += 1
+
+        too_short = self.validator.is_too_short(new_text)
+        if too_short or self.validator.is_too_short(old_text):
+            return {
+                "window": {"start": 0, "end": len(new_text)},
+                "delta": delta,
+                "highlights": [] if too_short else self.all_highlights()
+            }
+
+        return {
+            "window": {"start": scan_from, "end": stop},
+            "delta": delta,
+            "highlights": self._highlights(phrases)
+        }
+
+    @staticmethod
+    def _hits(phrases: List[Phrase]) -> List[Tuple[int, int, int, int]]:
+        """(rank, pattern index, start, end) of every hit, absolute positions"""
+        return [
+            (rank, index, offset + start, offset + end)
+            for offset, _, phrase_hits, _ in phrases
+            for rank, index, start, end in phrase_hits
+        ]
+
+    def _phrases(self) -> List[Phrase]:
+        """Every stored phrase in text order, absolute positions"""
+        length = len(self.text)
+        after = [
+            (length - from_end, length - from_end + size, hits, texts)
+            for from_end, size, hits, texts in reversed(self._after)
+        ]
+        return self._before + after
+
+    def _highlights(self, phrases: List[Phrase]) -> List[Dict[str, Any]]:
+        highlights = []
+        for rank, _, start, end in sorted(self._hits(phrases), key=lambda hit: (hit[2], hit[0], hit[1], hit[3])):
+            category, color = self.validator.keyword_categories[rank]
+            highlights.append({
+                "type": category,
+                "text": self.text[start:end],
+                "start": start,
+                "end": end,
+                "color": color
+            })
+        return highlights
+
+    def all_highlights(self) -> List[Dict[str, Any]]:
+        """Every keyword highlight of the current text"""
+        return self._highlights(self._phrases())
+
+    def _detections(self) -> Tuple[List[str], List[str], List[str], Optional[str]]:
+        """
+        RealtimeValidator.detections of the current text, from the keyword stacks
+
+        A keyword list is ordered by each text's first hit (pattern index,
+        then position); the domain is the domain keyword with the last hit.
+        """
+        length = len(self.text)
+        firsts: Dict[str, Dict[str, Tuple[int, int]]] = {category: {} for category, _ in self.validator.keyword_categories}
+        domain = None
+        for (rank, index, text), (before, after) in self._keywords.items():
+            category = self.validator.keyword_categories[rank][0]
+            if category == "domain":
+                last = (index, length - after[0] if after else before[-1], text)
+                if domain is None or last > domain:
+                    domain = last
+            else:
+                first = (index, before[0] if before else length - after[-1])
+                seen = firsts[category]
+                if text not in seen or first < seen[text]:
+                    seen[text] = first
+        detected = {category: sorted(seen, key=seen.get) for category, seen in firsts.items()}
+        return detected["entity"], detected["relationship"], detected["attribute"], domain[2] if domain else None
+
+    def summary(self) -> Dict[str, Any]:
+        """Score, detections, missing parts and suggestions of the current text"""
+        if self.validator.is_too_short(self.text):
+            summary = self.validator.short_prompt_analysis()
+            del summary["highlights"]
+            return {**summary, "missing_indicator": None}
+        return self.validator.summarize(self.text, *self._detections())
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Full analysis of the current text (same result as analyze_prompt_realtime)"""
+        if self.validator.is_too_short(self.text):
+            return self.validator.short_prompt_analysis()
+        summary = self.summary()
+        indicator = summary.pop("missing_indicator")
+        highlights = self.all_highlights()
+        if indicator:
+            highlights.append(indicator)
+        return {"highlights": sorted(highlights, key=lambda x: x["start"]), **summary}
+
+
+class RealtimeSessionStore:
+    """Bounded LRU of live realtime sessions"""
+
+    def __init__(self, validator: RealtimeValidator, max_sessions: int = 1000):
+        self.validator = validator
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, RealtimeSession]" = OrderedDict()
+
+    def create(self, text: str = "") -> RealtimeSession:
+        session = RealtimeSession(uuid.uuid4().hex, self.validator, text)
+        self._sessions[session.session_id] = session
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        return session
+
+    def get(self, session_id: str) -> Optional[RealtimeSession]:
+        session = self._sessions.get(session_id)
+        if session is not None:
+            self._sessions.move_to_end(session_id)
+        return session
+
+    def close(self, session_id: str) -> bool:
+        return self._sessions.pop(session_id, None) is not None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"sessions": len(self._sessions), "max_sessions": self.max_sessions}
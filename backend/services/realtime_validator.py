@@ -3,19 +3,102 @@ Real-time Prompt Validation Service
 Analyzes prompts in real-time and highlights key components
 """
 
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 import re
-from .fast_llm_service import FastLLMService
+import time
+from .llm_provider_router import create_llm_service
+from .llm_scheduler import Priority
+from .model_tier_router import get_model_tier_router
+from models.llm_schemas import PromptAnalysisOutput
 from config import settings
 
 
+class KeywordMatcher:
+    """
+    Single-scan matcher for lists of keyword patterns of the form \\b(a|b|c)\\b
+
+    All alternatives are compiled into one longest-first regex. Each phrase
+    it finds is classified once (and cached) by running the individual
+    patterns over the phrase alone, which also recovers keywords nested
+    inside it ("key" in "foreign key"). scan() therefore reports the same
+    hits as running re.finditer per pattern over the whole text.
+    """
+
+    def __init__(self, pattern_lists: List[List[str]]):
+        self.patterns = [
+            (rank, index, re.compile(pattern, re.IGNORECASE))
+            for rank, patterns in enumerate(pattern_lists)
+            for index, pattern in enumerate(patterns)
+        ]
+        alternatives = {alt for patterns in pattern_lists for pattern in patterns for alt in self._alternatives(pattern)}
+        # Longest first, so a phrase wins over a keyword it starts with ("book management" vs "book")
+        ordered = sorted(alternatives, key=lambda alt: (-len(alt), alt))
+        self.combined = re.compile(r"\b(?:" + "|".join(ordered) + r")\b", re.IGNORECASE)
+        # Upper bound on the length of any keyword match
+        self.max_length = max(len(alt) for alt in alternatives)
+        self._phrase_cache: Dict[str, List[Tuple[int, int, int, int]]] = {}
+
+    @staticmethod
+    def _alternatives(pattern: str) -> List[str]:
+        match = re.fullmatch(r"\\b\((.*)\)\\b", pattern)
+        if not match:
+            raise ValueError(f"Unsupported keyword pattern: {pattern}")
+        return match.group(1).split("|")
+
+    def _phrase_hits(self, phrase: str) -> List[Tuple[int, int, int, int]]:
+        """(list rank, pattern index, start, end) of every pattern hit within phrase"""
+        hits = self._phrase_cache.get(phrase)
+        if hits is None:
+            hits = [
+                (rank, index, match.start(), match.end())
+                for rank, index, pattern in self.patterns
+                for match in pattern.finditer(phrase)
+            ]
+            if len(self._phrase_cache) < 4096:
+                self._phrase_cache[phrase] = hits
+        return hits
+
+    def phrases(
+        self,
+        text: str,
+        start: int = 0,
+        stop: Optional[int] = None
+    ) -> Iterator[Tuple[int, int, List[Tuple[int, int, int, int]]]]:
+        """
+        Combined-regex matches that start in [start, stop)
+
+        Yields (start, end, hits) with hits relative to the phrase start.
+        start must be a position where a full scan is between matches;
+        only text up to stop + max_length is read, so the cost depends on
+        the range, not on the length of text.
+        """
+        if stop is None:
+            stop = len(text)
+        # One character of context on each side keeps \b exact at the edges
+        low = max(0, start - 1)
+        high = min(len(text), stop + self.max_length + 1)
+        window = text[low:high]
+        for match in self.combined.finditer(window, start - low):
+            if match.start() + low >= stop:
+                break
+            yield match.start() + low, match.end() + low, self._phrase_hits(match.group())
+
+    def scan(self, text: str) -> List[Tuple[int, int, int, int]]:
+        """(list rank, pattern index, start, end) of every keyword hit in text"""
+        hits = []
+        for offset, _, phrase_hits in self.phrases(text):
+            for rank, index, start, end in phrase_hits:
+                hits.append((rank, index, offset + start, offset + end))
+        return hits
+
+
 class RealtimeValidator:
     """Service for real-time prompt analysis and highlighting"""
 
     def __init__(self):
-        # Use fast Groq LLM if configured
-        if settings.USE_GROQ and settings.GROQ_API_KEY:
-            self.llm_service = FastLLMService()
+        # Use fast Groq LLM if configured (or recorded answers in cassette replay)
+        if (settings.USE_GROQ and settings.GROQ_API_KEY) or settings.LLM_CASSETTE_MODE.lower() == "replay":
+            self.llm_service = create_llm_service()
         else:
             self.llm_service = None
 
@@ -58,6 +141,20 @@ class RealtimeValidator:
             r'\b(restaurant|food|menu|order)\b',
         ]
 
+        # (highlight type, color) per keyword list, in reporting order
+        self.keyword_categories = [
+            ("domain", "blue"),
+            ("entity", "green"),
+            ("relationship", "green"),
+            ("attribute", "green"),
+        ]
+        self.keyword_matcher = KeywordMatcher([
+            self.domain_keywords,
+            self.entity_keywords,
+            self.relationship_keywords,
+            self.attribute_keywords,
+        ])
+
     def analyze_prompt_realtime(self, prompt: str) -> Dict[str, Any]:
         """
         Analyze prompt in real-time without LLM (fast, local analysis)
@@ -88,90 +185,100 @@ class RealtimeValidator:
                 "suggestions": List[str]
             }
         """
-        if not prompt or len(prompt.strip()) < 10:
-            return {
-                "highlights": [],
-                "score": 0,
-                "detected": {
-                    "entities": [],
-                    "relationships": [],
-                    "attributes": [],
-                    "domain": None
-                },
-                "missing": {
-                    "needs_entities": True,
-                    "needs_relationships": True,
-                    "needs_attributes": True
-                },
-                "suggestions": [
-                    "Le prompt est trop court",
-                    "Décrivez le domaine (bibliothèque, e-commerce, etc.)",
-                    "Mentionnez les entités principales (tables)",
-                    "Décrivez les relations entre les entités"
-                ]
-            }
+        if self.is_too_short(prompt):
+            return self.short_prompt_analysis()
 
         highlights = []
-        detected_entities = []
-        detected_relationships = []
-        detected_attributes = []
-        detected_domain = None
+        hits = sorted(self.keyword_matcher.scan(prompt))
+        for rank, _, start, end in hits:
+            category, color = self.keyword_categories[rank]
+            highlights.append({
+                "type": category,
+                "text": prompt[start:end],
+                "start": start,
+                "end": end,
+                "color": color
+            })
+
+        summary = self.summarize(prompt, *self.detections(prompt, hits))
+        indicator = summary.pop("missing_indicator")
+        if indicator:
+            highlights.append(indicator)
+
+        return {
+            "highlights": sorted(highlights, key=lambda x: x["start"]),
+            **summary
+        }
 
-        # Detect domain
-        for pattern in self.domain_keywords:
-            matches = re.finditer(pattern, prompt, re.IGNORECASE)
-            for match in matches:
-                highlights.append({
-                    "type": "domain",
-                    "text": match.group(),
-                    "start": match.start(),
-                    "end": match.end(),
-                    "color": "blue"
-                })
-                detected_domain = match.group()
-
-        # Detect entities
-        for pattern in self.entity_keywords:
-            matches = re.finditer(pattern, prompt, re.IGNORECASE)
-            for match in matches:
-                highlights.append({
-                    "type": "entity",
-                    "text": match.group(),
-                    "start": match.start(),
-                    "end": match.end(),
-                    "color": "green"
-                })
-                if match.group() not in detected_entities:
-                    detected_entities.append(match.group())
-
-        # Detect relationships
-        for pattern in self.relationship_keywords:
-            matches = re.finditer(pattern, prompt, re.IGNORECASE)
-            for match in matches:
-                highlights.append({
-                    "type": "relationship",
-                    "text": match.group(),
-                    "start": match.start(),
-                    "end": match.end(),
-                    "color": "green"
-                })
-                if match.group() not in detected_relationships:
-                    detected_relationships.append(match.group())
-
-        # Detect attributes
-        for pattern in self.attribute_keywords:
-            matches = re.finditer(pattern, prompt, re.IGNORECASE)
-            for match in matches:
-                highlights.append({
-                    "type": "attribute",
-                    "text": match.group(),
-                    "start": match.start(),
-                    "end": match.end(),
-                    "color": "green"
-                })
-                if match.group() not in detected_attributes:
-                    detected_attributes.append(match.group())
+    @staticmethod
+    def is_too_short(prompt: str) -> bool:
+        """Prompts under 10 characters (surrounding whitespace aside) get short_prompt_analysis()"""
+        # Text at both ends of a long prompt settles it without copying the whole prompt
+        if len(prompt) >= 30 and not prompt[:10].isspace() and not prompt[-10:].isspace():
+            return False
+        return not prompt or len(prompt.strip()) < 10
 
+    def short_prompt_analysis(self) -> Dict[str, Any]:
+        """Analysis of a prompt too short to analyze"""
+        return {
+            "highlights": [],
+            "score": 0,
+            "detected": {
+                "entities": [],
+                "relationships": [],
+                "attributes": [],
+                "domain": None
+            },
+            "missing": {
+                "needs_entities": True,
+                "needs_relationships": True,
+                "needs_attributes": True
+            },
+            "suggestions": [
+                "Le prompt est trop court",
+                "Décrivez le domaine (bibliothèque, e-commerce, etc.)",
+                "Mentionnez les entités principales (tables)",
+                "Décrivez les relations entre les entités"
+            ]
+        }
+
+    def detections(
+        self,
+        prompt: str,
+        hits: List[Tuple[int, int, int, int]]
+    ) -> Tuple[List[str], List[str], List[str], Optional[str]]:
+        """
+        Detected entities, relationships, attributes and domain
+
+        hits are (category rank, pattern index, start, end), sorted. Each
+        list keeps the first occurrence of every keyword in that order; the
+        domain is the last domain hit (highest pattern, then latest position).
+        """
+        detected = {category: [] for category, _ in self.keyword_categories}
+        detected_domain = None
+        for rank, _, start, end in hits:
+            category = self.keyword_categories[rank][0]
+            text = prompt[start:end]
+            if category == "domain":
+                detected_domain = text
+            elif text not in detected[category]:
+                detected[category].append(text)
+        return detected["entity"], detected["relationship"], detected["attribute"], detected_domain
+
+    def summarize(
+        self,
+        prompt: str,
+        detected_entities: List[str],
+        detected_relationships: List[str],
+        detected_attributes: List[str],
+        detected_domain: Optional[str]
+    ) -> Dict[str, Any]:
+        """
+        Score, missing parts and suggestions for a prompt's detections
+
+        Also returns "missing_indicator": the red "missing entities"
+        highlight to show in the prompt, or None.
+        """
         # Calculate score
         score = self._calculate_score(
             len(detected_entities),
@@ -192,21 +299,21 @@ class RealtimeValidator:
         suggestions = self._generate_suggestions(missing, detected_entities, detected_domain)
 
         # Add missing indicators to highlights
+        indicator = None
         if missing["needs_entities"]:
             # Find good positions to suggest entities
             if "create" in prompt.lower() or "database" in prompt.lower():
                 match = re.search(r'\b(create|database|system)\b', prompt, re.IGNORECASE)
                 if match:
-                    highlights.append({
+                    indicator = {
                         "type": "missing",
                         "text": "❓ Entités manquantes",
                         "start": match.end(),
                         "end": match.end() + 1,
                         "color": "red"
-                    })
+                    }
 
         return {
-            "highlights": sorted(highlights, key=lambda x: x["start"]),
             "score": score,
             "detected": {
                 "entities": detected_entities,
@@ -215,7 +322,8 @@ class RealtimeValidator:
                 "domain": detected_domain
             },
             "missing": missing,
-            "suggestions": suggestions
+            "suggestions": suggestions,
+            "missing_indicator": indicator
         }
 
     def _calculate_score(
@@ -325,8 +433,23 @@ Return JSON with:
     }}
 }}"""
 
+        # Looked up per call: the tier router scores prompts with its own RealtimeValidator
+        tier_router = get_model_tier_router()
+        decision = tier_router.route(prompt) if tier_router else None
+        start = time.perf_counter()
+
         try:
-            result = await self.llm_service.generate_json(prompt=analysis_prompt)
+            # A user is waiting on this: run ahead of queued extractions
+            result = await self.llm_service.generate_json(
+                prompt=analysis_prompt,
+                priority=Priority.INTERACTIVE,
+                schema=PromptAnalysisOutput if settings.LLM_STRUCTURED_OUTPUT else None,
+                tier=decision["tier"] if decision else None
+            )
+            if decision:
+                tier_router.record_call(decision, (time.perf_counter() - start) * 1000, True)
             return result
         except Exception as e:
+            if decision:
+                tier_router.record_call(decision, (time.perf_counter() - start) * 1000, False)
             return {"error": f"LLM analysis failed: {str(e)}"}
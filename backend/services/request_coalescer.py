@@ -0,0 +1,85 @@
+"""
+Request Coalescer
+Single-flight execution of identical in-flight LLM requests
+"""
+
+from typing import Any, Awaitable, Callable, Dict, Optional
+import asyncio
+import copy
+
+
+class RequestCoalescer:
+    """
+    Share one in-flight call between concurrent identical requests
+
+    The first caller for a key starts the work; callers arriving while it
+    runs await the same task. The result is snapshotted when the task
+    publishes it, and every waiter, the leader included, receives its own
+    copy of that snapshot (or the exception). The shared task is only
+    cancelled once every waiter has gone away.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[str, int] = {}
+        self.stats = {
+            "executed": 0,
+            "coalesced": 0,
+            "cancelled": 0,
+        }
+
+    async def run(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Run factory() once per key at a time and fan the result out"""
+        task = self._inflight.get(key)
+        is_leader = task is None
+
+        if is_leader:
+            task = asyncio.ensure_future(self._publish(factory))
+            self._inflight[key] = task
+            self._waiters[key] = 0
+            task.add_done_callback(lambda done, key=key: self._forget(key, done))
+            self.stats["executed"] += 1
+        else:
+            self.stats["coalesced"] += 1
+
+        self._waiters[key] += 1
+        try:
+            result = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._waiters.get(key) == 1 and not task.done():
+                task.cancel()
+                self.stats["cancelled"] += 1
+            raise
+        finally:
+            if key in self._waiters:
+                self._waiters[key] -= 1
+
+        # Each caller gets its own copy, so one caller mutating its result
+        # (even before the others resume) never affects another
+        return copy.deepcopy(result)
+
+    @staticmethod
+    async def _publish(factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Run factory() and snapshot its result before any waiter resumes"""
+        return copy.deepcopy(await factory())
+
+    def _forget(self, key: str, task: asyncio.Task):
+        """Drop a finished task so the next request starts fresh"""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+            self._waiters.pop(key, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Execution/coalescing counters and current in-flight keys"""
+        return {**self.stats, "in_flight": len(self._inflight)}
+
+
+_coalescer: Optional[RequestCoalescer] = None
+
+
+def get_request_coalescer() -> RequestCoalescer:
+    """Get the process-wide request coalescer"""
+    global _coalescer
+    if _coalescer is None:
+        _coalescer = RequestCoalescer()
+    return _coalescer
@@ -4,15 +4,20 @@ Generates realistic test data based on schema
 """
 
 from typing import Dict, Any, List
+import copy
 import random
 import string
 from datetime import datetime, timedelta
+from models.fingerprint import compute_fingerprints
+from services.fingerprint_memo import get_fingerprint_memo
 
 
 class SampleDataGenerator:
     """Generates sample data for testing databases"""
 
     def __init__(self):
+        self.memo = get_fingerprint_memo("sample_data")
+
         # Sample data pools
         self.first_names = [
             "John", "Jane", "Michael", "Sarah", "David", "Emily", "Robert", "Emma",
@@ -55,16 +60,27 @@ class SampleDataGenerator:
 
         Returns:
             Sample data as SQL INSERT statements or JSON
+
+        Memoized by ordered metamodel fingerprint: the same schema, row count and
+        format return the same rows instead of a fresh random draw.
         """
         entities = metamodel.get("entities", [])
 
         if format == "sql":
-            return self._generate_sql_inserts(entities, rows_per_table)
+            generate = self._generate_sql_inserts
         elif format == "json":
-            return self._generate_json_data(entities, rows_per_table)
+            generate = self._generate_json_data
         else:
             raise ValueError(f"Unsupported format: {format}")
 
+        key = (compute_fingerprints(metamodel)["ordered"], rows_per_table, format)
+        data = self.memo.get(key)
+        if data is None:
+            data = generate(entities, rows_per_table)
+            self.memo.set(key, data)
+        # JSON data is a dict the caller may change
+        return copy.deepcopy(data) if format == "json" else data
+
     def _generate_sql_inserts(self, entities: List[Dict], rows_per_table: int) -> str:
         """Generate SQL INSERT statements"""
         sql_statements = []
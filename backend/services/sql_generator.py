@@ -3,9 +3,15 @@ SQL Generator Service
 Generates SQL scripts from metamodel for different databases
 """
 
-from typing import Dict, Any
+from typing import Dict
 from jinja2 import Environment, FileSystemLoader
+import datetime
+import json
 import os
+from models.metamodel import Metamodel
+from services.fingerprint_memo import get_fingerprint_memo
+
+_TIMESTAMP_PLACEHOLDER = "\x00timestamp\x00"
 
 
 class SQLGenerator:
@@ -14,10 +20,11 @@ class SQLGenerator:
     def __init__(self):
         template_dir = os.path.join(os.path.dirname(__file__), "..", "templates")
         self.jinja_env = Environment(loader=FileSystemLoader(template_dir))
+        self.memo = get_fingerprint_memo("sql")
 
     def generate_sql(
         self,
-        metamodel: Dict[str, Any],
+        metamodel: Metamodel,
         dbms: str = "postgresql",
         options: Dict[str, bool] = None
     ) -> str:
@@ -28,12 +35,15 @@ class SQLGenerator:
         Phase 3 Implementation (All databases)
 
         Args:
-            metamodel: UML metamodel dictionary
+            metamodel: UML metamodel
             dbms: Target database system
             options: Generation options (indexes, constraints, comments)
 
         Returns:
             SQL script as string
+
+        Scripts are memoized by ordered metamodel fingerprint, dialect,
+        options and schema name; the timestamp is filled in on every call.
         """
         if options is None:
             options = {
@@ -42,6 +52,13 @@ class SQLGenerator:
                 "include_comments": True
             }
 
+        schema_name = metamodel.metadata.get("schema_name", "Generated Schema")
+        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        key = (metamodel.ordered_fingerprint(), dbms, json.dumps(options, sort_keys=True, default=str), schema_name)
+        sql_script = self.memo.get(key)
+        if sql_script is not None:
+            return sql_script.replace(_TIMESTAMP_PLACEHOLDER, timestamp, 1)
+
         # Get template for the specified DBMS
         template_name = f"{dbms}.sql.j2"
         try:
@@ -50,21 +67,22 @@ class SQLGenerator:
             # Fall back to PostgreSQL if template not found
             template = self.jinja_env.get_template("postgresql.sql.j2")
 
-        # Prepare data for template
-        import datetime
+        # Prepare data for template (the cached JSON form: templates print enum values)
+        serialized = metamodel.to_dict()
         data = {
-            "entities": metamodel.get("entities", []),
-            "relationships": metamodel.get("relationships", []),
+            "entities": serialized["entities"],
+            "relationships": serialized["relationships"],
             "metadata": {
-                "schema_name": metamodel.get("metadata", {}).get("schema_name", "Generated Schema"),
-                "timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                "schema_name": schema_name,
+                "timestamp": _TIMESTAMP_PLACEHOLDER  # filled in per call, so the script can be memoized
             },
             "options": options
         }
 
         # Render SQL
         sql_script = template.render(**data)
-        return sql_script
+        self.memo.set(key, sql_script)
+        return sql_script.replace(_TIMESTAMP_PLACEHOLDER, timestamp, 1)
 
     def _generate_create_table(self, entity: Dict, dbms: str) -> str:
         """Generate CREATE TABLE statement"""
@@ -0,0 +1,88 @@
+"""
+Structured Output
+JSON schemas for constrained LLM decoding and one-pass response validation
+"""
+
+from typing import Any, Dict, Type
+from functools import lru_cache
+from pydantic import BaseModel, ValidationError
+
+
+class StructuredOutputError(Exception):
+    """Raised when a structured response does not match its schema"""
+
+
+# Schema keywords that only document the model
+_ANNOTATIONS = ("$defs", "title", "description")
+
+
+def _inline_refs(node: Any, defs: Dict[str, Any]) -> Any:
+    if isinstance(node, dict):
+        if "$ref" in node:
+            return _inline_refs(defs[node["$ref"].rsplit("/", 1)[-1]], defs)
+        inlined = {}
+        for key, value in node.items():
+            if key == "properties":
+                # Keys here are field names, not keywords: keep them all
+                inlined[key] = {name: _inline_refs(field, defs) for name, field in value.items()}
+            elif key not in _ANNOTATIONS:
+                inlined[key] = _inline_refs(value, defs)
+        return inlined
+    if isinstance(node, list):
+        return [_inline_refs(item, defs) for item in node]
+    return node
+
+
+@lru_cache(maxsize=None)
+def _cached_schema(model: Type[BaseModel]) -> Dict[str, Any]:
+    schema = model.model_json_schema()
+    return _inline_refs(schema, schema.get("$defs", {}))
+
+
+def json_schema(model: Type[BaseModel]) -> Dict[str, Any]:
+    """
+    Self-contained JSON schema of a pydantic model
+
+    $refs are inlined and titles/descriptions dropped: grammar-based
+    decoders (Ollama's `format`) handle flat schemas best, and every token
+    of the schema is request overhead.
+    """
+    return _cached_schema(model)
+
+
+def parse_structured(text: str, model: Type[BaseModel]) -> Dict[str, Any]:
+    """
+    Parse and validate a structured response in one pass
+
+    There is no salvage step: decoding was constrained (or the provider
+    guaranteed JSON), so a mismatch is an error, not something to repair.
+    Returns plain JSON values with unset optional fields omitted.
+    """
+    try:
+        parsed = model.model_validate_json(text)
+    except ValidationError as e:
+        raise _mismatch(e, model)
+    return parsed.model_dump(mode="json", exclude_none=True)
+
+
+def validate_structured(data: Any, model: Type[BaseModel]) -> Dict[str, Any]:
+    """
+    Validate already parsed JSON against model
+
+    For structured responses that had to be finished outside constrained
+    decoding (continued after truncation and repaired). Returns the same
+    shape as parse_structured.
+    """
+    try:
+        parsed = model.model_validate(data)
+    except ValidationError as e:
+        raise _mismatch(e, model)
+    return parsed.model_dump(mode="json", exclude_none=True)
+
+
+def _mismatch(error: ValidationError, model: Type[BaseModel]) -> StructuredOutputError:
+    first = error.errors()[0]
+    location = ".".join(str(part) for part in first["loc"]) or "<root>"
+    return StructuredOutputError(
+        f"Response does not match {model.__name__} ({error.error_count()} errors; {location}: {first['msg']})"
+    )
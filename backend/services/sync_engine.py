@@ -3,16 +3,17 @@ Synchronization Engine
 Handles real-time synchronization between visual, code, and AI editors
 """
 
-from typing import Dict, Any, Callable
+from typing import Dict, Any, Callable, Optional, Tuple
 import asyncio
 
 
 class SyncEngine:
     """Service for synchronizing different editor views"""
 
-    def __init__(self):
+    def __init__(self, debounce_delay: float = 0.5):
         self.listeners = []
-        self.debounce_delay = 0.5  # 500ms
+        self.debounce_delay = debounce_delay  # seconds
+        self._pending: Dict[str, Tuple[asyncio.Task, Dict[str, bool]]] = {}
 
     def register_listener(self, callback: Callable):
         """
@@ -52,6 +53,35 @@ class SyncEngine:
 
     async def _debounce(self, func: Callable, *args):
         """Debounce function calls to avoid excessive updates"""
-        # TODO: Implement in Phase 2
         await asyncio.sleep(self.debounce_delay)
         return await func(*args)
+
+    def schedule(self, key: str, func: Callable, *args) -> asyncio.Task:
+        """
+        Run func(*args) once calls for key have been quiet for debounce_delay
+
+        A call still waiting out its delay is cancelled by the next call
+        with the same key, so a burst runs func once, with the arguments of
+        the last call. A call that is already running is left to finish.
+        """
+        previous = self._pending.get(key)
+        if previous is not None and not previous[1]["started"]:
+            previous[0].cancel()
+
+        state = {"started": False}
+
+        async def call():
+            state["started"] = True
+            return await func(*args)
+
+        task = asyncio.ensure_future(self._debounce(call))
+        self._pending[key] = (task, state)
+        return task
+
+    def cancel(self, key: Optional[str] = None):
+        """Cancel the pending call for key (every pending call if key is None)"""
+        keys = list(self._pending) if key is None else [key]
+        for name in keys:
+            pending = self._pending.pop(name, None)
+            if pending is not None and not pending[0].done():
+                pending[0].cancel()
@@ -0,0 +1,114 @@
+"""
+Token Budget Service
+Output-token budgeting and continuation of truncated LLM responses
+"""
+
+from typing import Awaitable, Callable, Optional, Tuple
+import re
+from config import settings
+
+
+# Rough cost of one extracted entity (name, description, ~6 attributes)
+# and one relationship in the extraction JSON format
+TOKENS_PER_ENTITY = 220
+TOKENS_PER_RELATIONSHIP = 70
+BASE_JSON_TOKENS = 150
+
+CONTINUATION_INSTRUCTION = (
+    "\n\nYour previous answer was cut off. This is what you produced so far:\n"
+    "{partial}\n\n"
+    "Continue from exactly where it stops. Output ONLY the remaining text, "
+    "without repeating anything and without markdown fences."
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count (about 4 characters per token for English)"""
+    return max(1, len(text) // 4)
+
+
+def estimate_schema_size(user_prompt: str) -> int:
+    """
+    Guess how many entities the extraction will produce
+
+    Longer descriptions mention more tables; list separators (commas,
+    "and", bullets) are a stronger signal than raw length.
+    """
+    words = len(user_prompt.split())
+    separators = len(re.findall(r",|;|\band\b|\bet\b|^\s*[-*\d]", user_prompt, re.IGNORECASE | re.MULTILINE))
+    estimate = 3 + words // 25 + separators // 2
+    return max(2, min(estimate, settings.MAX_ENTITIES))
+
+
+def clamp_budget(tokens: int) -> int:
+    """Keep a budget within the configured bounds"""
+    return max(settings.LLM_MIN_OUTPUT_TOKENS, min(tokens, settings.LLM_MAX_OUTPUT_TOKENS))
+
+
+def estimate_extraction_budget(user_prompt: str) -> int:
+    """Output budget for a schema extraction of user_prompt"""
+    entities = estimate_schema_size(user_prompt)
+    relationships = max(1, entities - 1)
+    tokens = BASE_JSON_TOKENS + entities * TOKENS_PER_ENTITY + relationships * TOKENS_PER_RELATIONSHIP
+    return clamp_budget(tokens)
+
+
+def estimate_output_budget(prompt: str) -> int:
+    """Default output budget for a generic JSON request"""
+    return clamp_budget(max(settings.LLM_DEFAULT_JSON_TOKENS, estimate_tokens(prompt) // 2))
+
+
+def merge_continuation(partial: str, continuation: str) -> str:
+    """
+    Append a continuation to a truncated response
+
+    Strips markdown fences the model may add and drops any prefix of the
+    continuation that repeats the tail of the partial text.
+    """
+    continuation = re.sub(r"^\s*```(?:json)?\s*", "", continuation)
+    continuation = re.sub(r"\s*```\s*$", "", continuation)
+
+    max_overlap = min(len(partial), len(continuation), 200)
+    for size in range(max_overlap, 0, -1):
+        if partial.endswith(continuation[:size]):
+            return partial + continuation[size:]
+    return partial + continuation
+
+
+async def generate_with_continuation(
+    complete: Callable[[str, int], Awaitable[Tuple[str, bool]]],
+    prompt: str,
+    max_tokens: int,
+    max_continuations: Optional[int] = None,
+    first: Optional[Tuple[str, bool]] = None
+) -> Tuple[str, bool]:
+    """
+    Run a completion, asking for continuations while it is truncated
+
+    Args:
+        complete: async (prompt, max_tokens) -> (text, truncated)
+        prompt: The original prompt
+        max_tokens: Output budget for each call
+        max_continuations: Extra calls allowed (defaults to settings)
+        first: (text, truncated) of an initial call already made elsewhere,
+            e.g. a cut-off JSON-mode response; it is continued instead of
+            running the prompt again
+
+    Returns:
+        (text, truncated): the full response text, and whether it is still
+        truncated because the continuation limit was reached
+    """
+    if max_continuations is None:
+        max_continuations = settings.LLM_MAX_CONTINUATIONS
+
+    text, truncated = first if first is not None else await complete(prompt, max_tokens)
+
+    attempts = 0
+    while truncated and attempts < max_continuations:
+        attempts += 1
+        print(f"[TOKEN_BUDGET] Response truncated at {len(text)} chars, continuation {attempts}/{max_continuations}")
+        continuation_prompt = prompt + CONTINUATION_INSTRUCTION.format(partial=text)
+        more, truncated = await complete(continuation_prompt, max_tokens)
+        text = merge_continuation(text, more)
+
+    return text, truncated
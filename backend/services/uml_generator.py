@@ -3,7 +3,7 @@ UML Metamodel Generator
 Creates internal UML metamodel representation
 """
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Union
 from models.metamodel import Entity, Relationship, Attribute, Metamodel, DataType, CardinalityType
 
 
@@ -27,6 +27,27 @@ class UMLGenerator:
                 "metadata": {...}
             }
         """
+        return self.build_metamodel(entities, relationships).to_dict()
+
+    def build_metamodel(
+        self,
+        entities: List[Dict],
+        relationships: List[Dict],
+        metadata: Optional[Dict[str, Any]] = None,
+        trusted: bool = False
+    ) -> Metamodel:
+        """
+        Build the typed metamodel from extracted entities and relationships
+
+        With trusted=True the dicts are known to match the metamodel schema
+        (structured LLM output, rule-based drafts): they are validated in one
+        pydantic-core pass, about twice as fast as the lenient per-field
+        conversion below (and faster than model_construct, which runs in Python).
+        """
+        metadata = {"version": "1.0", **(metadata or {})}
+        if trusted:
+            return Metamodel.model_validate({"entities": entities, "relationships": relationships, "metadata": metadata})
+
         # Convert dictionaries to Pydantic models
         entity_models = []
         for entity_dict in entities:
@@ -67,17 +88,15 @@ class UMLGenerator:
             )
             relationship_models.append(relationship)
 
-        # Create metamodel
-        metamodel = Metamodel(
-            entities=entity_models,
-            relationships=relationship_models,
-            metadata={"version": "1.0"}
+        # Create metamodel (its items are validated already)
+        metamodel = Metamodel.model_construct(
+            entities=tuple(entity_models),
+            relationships=tuple(relationship_models),
+            metadata=metadata
         )
+        return metamodel
 
-        # Convert to dict for JSON serialization
-        return metamodel.model_dump()
-
-    def validate_metamodel(self, metamodel: Dict[str, Any]) -> Dict[str, Any]:
+    def validate_metamodel(self, metamodel: Union[Metamodel, Dict[str, Any]]) -> Dict[str, Any]:
         """
         Validate metamodel structure
 
@@ -91,8 +110,8 @@ class UMLGenerator:
             }
         """
         try:
-            # Recreate Metamodel from dict to validate
-            metamodel_obj = Metamodel(**metamodel)
+            # Only dicts need parsing; a Metamodel is checked as is
+            metamodel_obj = metamodel if isinstance(metamodel, Metamodel) else Metamodel(**metamodel)
             validation_result = metamodel_obj.validate()
             return validation_result
         except Exception as e: